@@ -0,0 +1,140 @@
+"""
+Benchmark d'écriture concurrente : création de commandes (POST /order) par
+plusieurs threads pendant que d'autres relisent les commandes (GET /order/<id>),
+avec les pragmas SQLite par défaut puis avec les pragmas de l'application
+(WAL, synchronous=normal, mmap, cache, busy_timeout), avec les commandes
+réparties sur plusieurs fichiers SQLite (ORDER_SHARDS), et enfin avec l'écriture
+groupée (ORDER_GROUP_COMMIT), en synchronous=normal puis full (un fsync par commit).
+
+Usage : python benchmarks/bench_concurrent_orders.py [écrivains] [lecteurs] [durée_s]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from peewee import OperationalError  # noqa: E402
+
+from inf349 import create_app, db, order_writer, Product, Order  # noqa: E402
+from inf349.database import DEFAULT_SQLITE_PRAGMAS, create_database  # noqa: E402
+
+
+def prepare_database(path, pragmas):
+    # Le mode WAL est persistant : la base doit être créée avec les pragmas du scénario
+    db.initialize(create_database(path, pragmas=pragmas))
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.insert_many([
+        {"id": product_id, "name": f"Produit {product_id}", "description": "desc",
+         "price": 10.0 + product_id, "in_stock": True, "weight": 400, "image": "1.jpg"}
+        for product_id in range(1, 51)
+    ]).execute()
+    db.close()
+
+
+def run_scenario(label, pragmas, writers, readers, duration, shards=0, group_commit=False):
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "bench_concurrent_orders.sqlite")
+    prepare_database(path, pragmas)
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "SQLITE_PRAGMAS": pragmas,
+        "ORDER_SHARDS": shards,
+        "ORDER_SHARD_DATABASE": os.path.join(workdir, "orders-{shard}.sqlite"),
+        "ORDER_GROUP_COMMIT": group_commit,
+    })
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"orders": 0, "reads": 0, "locked": 0, "errors": 0, "latencies": []}
+    created_ids = []
+
+    def record(key, latency=None):
+        with lock:
+            results[key] += 1
+            if latency is not None:
+                results["latencies"].append(latency)
+
+    def call(send):
+        started_at = time.perf_counter()
+        try:
+            response = send()
+        except OperationalError as exc:
+            record("locked" if "locked" in str(exc) else "errors")
+            return None
+        return response, time.perf_counter() - started_at
+
+    def writer(index):
+        with app.test_client() as client:
+            product_id = index % 50 + 1
+            while not stop.is_set():
+                outcome = call(lambda: client.post(
+                    "/order", json={"product": {"id": product_id, "quantity": 1}}
+                ))
+                if outcome is None:
+                    continue
+                response, latency = outcome
+                if response.status_code == 302:
+                    record("orders", latency)
+                    with lock:
+                        created_ids.append(int(response.headers["Location"].rsplit("/", 1)[-1]))
+                else:
+                    record("errors")
+
+    def reader():
+        with app.test_client() as client:
+            while not stop.is_set():
+                if not created_ids:
+                    time.sleep(0.001)
+                    continue
+                order_id = created_ids[-1]
+                outcome = call(lambda: client.get(f"/order/{order_id}"))
+                if outcome is not None:
+                    record("reads" if outcome[0].status_code == 200 else "errors")
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    order_writer.configure()
+    db.connect(reuse_if_open=True)
+    journal_mode = db.execute_sql("PRAGMA journal_mode").fetchone()[0]
+    db.close()
+
+    latencies = sorted(results["latencies"])
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(
+        f"{label:<32} {journal_mode:>7} {results['orders'] / duration:>9.0f} {results['reads'] / duration:>9.0f}"
+        f" {p50:>8.1f} {p99:>8.1f} {results['locked']:>7} {results['errors']:>7}"
+    )
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+
+    print(f"{writers} écrivains, {readers} lecteurs, {duration:.0f} s par scénario")
+    print(f"{'scénario':<32} {'journal':>7} {'cmd/s':>9} {'lect./s':>9} {'p50 ms':>8} {'p99 ms':>8}"
+          f" {'locked':>7} {'erreurs':>7}")
+    run_scenario("pragmas par défaut", {}, writers, readers, duration)
+    run_scenario("pragmas optimisés", dict(DEFAULT_SQLITE_PRAGMAS), writers, readers, duration)
+    run_scenario("pragmas optimisés, 4 shards", dict(DEFAULT_SQLITE_PRAGMAS), writers, readers, duration, shards=4)
+    run_scenario("group commit", dict(DEFAULT_SQLITE_PRAGMAS), writers, readers, duration, group_commit=True)
+    durable = dict(DEFAULT_SQLITE_PRAGMAS, synchronous='full')
+    run_scenario("synchronous=full", durable, writers, readers, duration)
+    run_scenario("synchronous=full, group commit", durable, writers, readers, duration, group_commit=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de l'import du catalogue : insertion ligne par ligne (Product.create)
+contre import en continu par lots (iter_json_array + insert_many).
+
+Usage : python benchmarks/bench_import.py [nombre_de_produits] [--memory]
+
+L'option --memory ajoute une seconde passe mesurant le pic mémoire avec
+tracemalloc (qui ralentit fortement l'exécution, d'où la passe séparée).
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inf349 import db, import_products, Product, Order  # noqa: E402
+from inf349.importer import iter_json_array  # noqa: E402
+
+
+def build_feed(count):
+    products = [
+        {
+            "id": product_id,
+            "name": f"Produit {product_id}",
+            "description": "Description du produit " * 8,
+            "price": round(product_id * 1.37, 2),
+            "in_stock": product_id % 3 != 0,
+            "weight": 100 + product_id % 5000,
+            "image": f"{product_id % 50}.jpg",
+        }
+        for product_id in range(1, count + 1)
+    ]
+    return json.dumps({"products": products}).encode("utf-8")
+
+
+def reset_database(path):
+    if os.path.exists(path):
+        os.remove(path)
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+
+
+def run(label, path, load, measure_memory):
+    reset_database(path)
+    started_at = time.perf_counter()
+    count = load()
+    elapsed = time.perf_counter() - started_at
+    assert Product.select().count() == count
+    db.close()
+    line = f"{label:<24} {count:>8} produits  {elapsed:8.2f} s  {count / elapsed:>10.0f}/s"
+
+    if measure_memory:
+        reset_database(path)
+        tracemalloc.start()
+        load()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.close()
+        line += f"  pic mémoire {peak / 2**20:7.1f} Mo"
+    print(line)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    measure_memory = "--memory" in sys.argv
+    count = int(args[0]) if args else 100_000
+    feed = build_feed(count)
+    print(f"Flux de {count} produits ({len(feed) / 2**20:.1f} Mo)")
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_import.sqlite")
+
+    def row_by_row():
+        products = json.loads(feed.decode("utf-8"))["products"]
+        with db.atomic():
+            for product_data in products:
+                Product.create(**product_data)
+        return len(products)
+
+    def streaming():
+        return import_products(iter_json_array(io.BytesIO(feed), "products"))
+
+    run("ligne par ligne", path, row_by_row, measure_memory)
+    run("en continu, par lots", path, streaming, measure_memory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark du chemin de paiement (PUT /order/<id> avec credit_card) contre les
+services distants simulés (inf349.remote_standin), en HTTP réel : latence
+log-normale du service, puis erreurs 5xx (sans puis avec Idempotency-Key, donc
+réessayées), délais expirés et paiements asynchrones (PAYMENT_ASYNC).
+
+Usage : python benchmarks/bench_payments.py [clients] [durée_s] [latence]
+        (latence par défaut : lognormal:80:0.6)
+"""
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from inf349 import create_app, db, payment_queue, IdempotencyKey, Order, Product  # noqa: E402
+from inf349.importer import chunked  # noqa: E402
+from inf349.remote_standin import RemoteStandIn  # noqa: E402
+from inf349.resilience import percentile  # noqa: E402
+
+# Commandes payables créées par scénario (une par paiement)
+ORDERS = 20000
+
+CREDIT_CARD = {
+    "credit_card": {
+        "name": "John Doe",
+        "number": "4242 4242 4242 4242",
+        "expiration_year": 2099,
+        "expiration_month": 9,
+        "cvv": "123",
+    }
+}
+
+
+def prepare_database(path):
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order, IdempotencyKey])
+    Product.create(id=1, name="Produit", description="desc", price=10.0, in_stock=True, weight=400, image="1.jpg")
+    order = {"product_id": 1, "quantity": 1, "total_price": 10.0, "shipping_price": 5.0, "total_price_tax": 11.5,
+             "email": "client@example.com", "shipping_country": "Canada", "shipping_address": "1 rue du Test",
+             "shipping_postal_code": "G7X 3Y7", "shipping_city": "Chicoutimi", "shipping_province": "QC"}
+    with db.atomic():
+        for batch in chunked([order] * ORDERS, 500):
+            Order.insert_many(batch).execute()
+    db.close()
+
+
+def run_scenario(label, clients, duration, latency, error_rate=0.0, timeout_rate=0.0, async_payments=False,
+                 idempotency_keys=False):
+    standin = RemoteStandIn(
+        payment_latency=latency,
+        error_rate=error_rate,
+        timeout_rate=timeout_rate,
+        hang_seconds=30,
+        seed=1,
+    ).start()
+    path = os.path.join(tempfile.mkdtemp(), "bench_payments.sqlite")
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "PAYMENT_URL": standin.payment_url,
+        "PAYMENT_ASYNC": async_payments,
+        "PAYMENT_WORKERS": clients,
+        "PAYMENT_QUEUE_SIZE": 4 * clients,
+    })
+    with app.app_context():
+        prepare_database(path)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    order_ids = itertools.count(1)
+    latencies = []
+    statuses = {}
+
+    def client_loop():
+        with app.test_client() as client:
+            while not stop.is_set():
+                order_id = next(order_ids)
+                started_at = time.perf_counter()
+                headers = {"Idempotency-Key": f"bench-{order_id}"} if idempotency_keys else None
+                response = client.put(f"/order/{order_id}", json=CREDIT_CARD, headers=headers)
+                elapsed = time.perf_counter() - started_at
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                # Comme un navigateur : une seule commande à la fois, on suit l'URL d'état
+                while response.status_code == 202 and not stop.is_set():
+                    time.sleep(0.01)
+                    if client.get(response.headers["Location"]).get_json()["payment"]["status"] != "pending":
+                        break
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    drain_started_at = time.perf_counter()
+    payment_queue.join()
+    drain = time.perf_counter() - drain_started_at
+    payment_queue.configure()
+    standin.stop()
+
+    p50 = percentile(latencies, 0.5) * 1000
+    p99 = percentile(latencies, 0.99) * 1000
+    summary = " ".join(f"{status}:{count}" for status, count in sorted(statuses.items()))
+    print(f"{label:<28} {len(latencies) / duration:>8.0f} {p50:>8.1f} {p99:>9.1f} {drain:>8.1f}  {summary}")
+
+
+def main():
+    # Les erreurs injectées sont journalisées avec leur trace
+    logging.getLogger('inf349.payment').disabled = True
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    latency = sys.argv[3] if len(sys.argv) > 3 else "lognormal:80:0.6"
+
+    print(f"{clients} clients, {duration:.0f} s par scénario, latence du service {latency}")
+    print(f"{'scénario':<28} {'PUT/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'vidage s':>8}  statuts")
+    run_scenario("synchrone", clients, duration, latency)
+    run_scenario("synchrone, 5 % d'erreurs", clients, duration, latency, error_rate=0.05)
+    run_scenario("5 % d'erreurs, avec clé", clients, duration, latency, error_rate=0.05, idempotency_keys=True)
+    run_scenario("synchrone, 2 % sans réponse", clients, duration, latency, timeout_rate=0.02)
+    run_scenario("asynchrone (202)", clients, duration, latency, async_payments=True)
+
+
+if __name__ == "__main__":
+    main()
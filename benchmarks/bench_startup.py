@@ -0,0 +1,79 @@
+"""
+Benchmark du démarrage à froid d'un worker : création de l'application puis
+premier rendu de chaque template, avec et sans cache de bytecode Jinja.
+
+Chaque mesure est faite dans un nouvel interpréteur Python, comme un worker
+fraîchement démarré.
+
+Usage : python benchmarks/bench_startup.py [répétitions]
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+WORKER = r"""
+import json, sys, time
+started_at = time.perf_counter()
+from inf349 import create_app, db, Product, Order
+db.init(sys.argv[1])
+config = {"TESTING": True, "DATABASE": sys.argv[1]}
+if sys.argv[2]:
+    config["TEMPLATE_BYTECODE_CACHE_DIR"] = sys.argv[2]
+config["PRECOMPILE_TEMPLATES"] = sys.argv[3] == "1"
+app = create_app(config)
+ready_at = time.perf_counter()
+with app.app_context():
+    compile_started_at = time.perf_counter()
+    for name in ("list_products.html", "order_form.html", "order_confirmation.html", "payment_form.html"):
+        app.jinja_env.get_template(name)
+    first_render = time.perf_counter() - compile_started_at
+print(json.dumps({"startup": ready_at - started_at, "first_request_templates": first_render}))
+"""
+
+
+def run_worker(db_path, cache_dir, precompile):
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, db_path, cache_dir or "", "1" if precompile else "0"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench_startup.sqlite")
+    cache_dir = os.path.join(workdir, "jinja-cache")
+
+    scenarios = [
+        ("sans cache (compilation paresseuse)", None, False, False),
+        ("sans cache, précompilation", None, True, False),
+        ("cache de bytecode froid", cache_dir, True, True),
+        ("cache de bytecode chaud", cache_dir, True, False),
+    ]
+    print(f"{'scénario':<38} {'démarrage':>10} {'1re requête':>12}  (médiane sur {repeat}, ms)")
+    for label, directory, precompile, clear_each_time in scenarios:
+        results = []
+        for _ in range(repeat):
+            if clear_each_time:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            results.append(run_worker(db_path, directory, precompile))
+        startup = median([result["startup"] for result in results]) * 1000
+        first = median([result["first_request_templates"] for result in results]) * 1000
+        print(f"{label:<38} {startup:>10.1f} {first:>12.1f}")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,107 @@
-from flask import Flask, jsonify, render_template, request, redirect, url_for
+from flask import Flask, Response, current_app, jsonify, render_template, request, redirect, send_from_directory, stream_with_context, url_for
+import hashlib
+import hmac
 import os
 import json
+import queue
+import time
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from urllib import error as urllib_error
-from urllib import request as urllib_request
 from peewee import *
+from playhouse.sqlite_ext import FTS5Model, RowIDField, SearchField
 from inf349.taxes import calculate_total_with_tax, TAX_RATES
 from inf349.shipping import calculate_shipping_price
-
-# Database setup
-db = SqliteDatabase('database.db')
+from inf349.assets import IMMUTABLE_MAX_AGE, AssetManifest
+from inf349.cache import LRUCache, OrderCache
+from inf349.catalog import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    CatalogCache,
+    encode_cursor,
+    is_paginated_catalog_query,
+    parse_catalog_query,
+)
+from inf349.database import DEFAULT_SQLITE_PRAGMAS, create_database
+from inf349.http_client import HTTPClient, is_connect_failure
+from inf349.idempotency import (
+    MAX_KEY_LENGTH,
+    IdempotencyKeyInProgress,
+    IdempotencyKeyReused,
+    IdempotencyStore,
+    request_fingerprint,
+)
+from inf349.images import ImageManifest, build_image_variants, render_responsive_image
+from inf349.importer import ImportProgress, chunked, iter_json_array
+from inf349.migrations import (
+    IDEMPOTENCY_KEY_CREATED_AT_INDEX,
+    ORDER_CREATED_AT_INDEX,
+    ORDER_INDEXES,
+    ORDER_PROVINCE_INDEX,
+    get_schema_version,
+    migrate_database,
+)
+from inf349.rendering import (
+    FRAGMENT_VERSION_VAR,
+    FragmentCacheExtension,
+    RenderCache,
+    configure_bytecode_cache,
+    precompile_templates,
+)
+from inf349.orders import (
+    EXPORT_FORMATS,
+    ORDER_LIST_FIELDS,
+    iter_csv,
+    iter_ndjson,
+    parse_export_query,
+    parse_order_list_query,
+    serialize_order_row,
+)
+from inf349.payments import PAYMENT_FAILED, PAYMENT_PAID, PAYMENT_PENDING, PaymentQueue
+from inf349.resilience import AdaptiveTimeout, CircuitBreaker, RetryBudget, RetryPolicy
+from inf349.sharding import OrderShards
+from inf349.search import (
+    DESCRIPTION_WEIGHT,
+    NAME_WEIGHT,
+    PRODUCT_INDEX_TRIGGERS,
+    build_match_expression,
+)
+from inf349.sync import BackgroundRefresher, CatalogSyncer
+from inf349.writer import GroupCommitQueue
+
+# Database setup : la base concrète (app.config['DATABASE'], simple ou avec pool) est liée par create_app
+db = DatabaseProxy()
+db.initialize(create_database('database.db'))
+
+# Cache du catalogue (invalidé à chaque écriture de produit)
+catalog_cache = CatalogCache()
+
+# Commandes sérialisées pour GET /order/<id> (mises à jour à chaque écriture de commande)
+order_cache = OrderCache()
+
+# Écritures de commandes groupées par transaction (désactivé par défaut)
+order_writer = GroupCommitQueue()
+
+# Connexions keep-alive vers les services distants (produits, paiement)
+http_client = HTTPClient()
+
+# Débits exécutés en arrière-plan quand PAYMENT_ASYNC est actif
+payment_queue = PaymentQueue()
+
+# Service de paiement : échec immédiat quand il est en panne, délai d'attente selon son p99
+payment_breaker = CircuitBreaker()
+payment_timeout = AdaptiveTimeout()
+
+# Nouvelles tentatives de paiement (cas sûrs seulement), bornées par un budget global
+payment_retry = RetryPolicy()
+payment_retry_budget = RetryBudget()
+
+# Routes servies depuis le cache du catalogue, sans connexion à la base si le cache est chaud
+CATALOG_ENDPOINTS = {'list_products', 'api_list_products', 'ui_list_products', 'ui_order_form'}
+
+# Routes qui n'utilisent jamais la base de données
+NO_DATABASE_ENDPOINTS = {'static', 'api_metrics'}
 
 class BaseModel(Model):
     class Meta:
@@ -26,6 +116,42 @@ class Product(BaseModel):
     weight = IntegerField()
     image = CharField()
 
+    class Meta:
+        # Index pour la pagination par curseur et les filtres de /api/products
+        # (SQLite ajoute l'id, alias du rowid, à la fin de chaque index)
+        indexes = (
+            (('price',), False),
+            (('weight',), False),
+            (('in_stock', 'price'), False),
+            (('in_stock', 'weight'), False),
+        )
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        catalog_cache.invalidate()
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super().delete_instance(*args, **kwargs)
+        catalog_cache.invalidate()
+        return result
+
+class ProductIndex(FTS5Model):
+    """Index plein texte (FTS5) de Product.name et Product.description."""
+    rowid = RowIDField()
+    name = SearchField()
+    description = SearchField()
+
+    class Meta:
+        database = db
+        table_name = 'product_index'
+        options = {
+            'content': 'product',
+            'content_rowid': 'id',
+            'tokenize': "unicode61 remove_diacritics 2",
+        }
+
+
 class Order(BaseModel):
     id = AutoField()
     # Product details
@@ -52,6 +178,235 @@ class Order(BaseModel):
     transaction_id = CharField(null=True)
     transaction_success = BooleanField(null=True)
     transaction_amount_charged = FloatField(null=True)
+    # État du paiement asynchrone (pending, paid, failed) et erreurs du dernier échec (JSON)
+    payment_status = CharField(null=True)
+    payment_error = TextField(null=True)
+    # Début du débit en cours (pending) : au-delà de PAYMENT_CLAIM_LEASE, il est considéré abandonné
+    payment_claimed_at = DateTimeField(null=True)
+    # Date de création (UTC), nulle pour les commandes antérieures à la migration 2
+    created_at = DateTimeField(null=True, default=datetime.utcnow)
+
+    class Meta:
+        # Mêmes index que les migrations, pour les bases créées par create_tables()
+        indexes = tuple(
+            (columns, False)
+            for columns in ORDER_INDEXES + (ORDER_CREATED_AT_INDEX, ORDER_PROVINCE_INDEX)
+        )
+
+    def save(self, *args, **kwargs):
+        result = super().save(*args, **kwargs)
+        if self._meta.database.in_transaction():
+            # Pas encore validée : l'appelant met le cache à jour après le commit
+            order_cache.discard(self.id)
+        else:
+            order_cache.put(self.id, serialize_order(self))
+        return result
+
+    def delete_instance(self, *args, **kwargs):
+        result = super().delete_instance(*args, **kwargs)
+        order_cache.discard(self.id)
+        return result
+
+
+# Shards des commandes (configurés par create_app, désactivés par défaut)
+order_shards = OrderShards(Order)
+
+
+class IdempotencyKey(BaseModel):
+    """Réponse enregistrée pour un en-tête Idempotency-Key de PUT /order/<id>."""
+    key = CharField(primary_key=True, max_length=MAX_KEY_LENGTH)
+    fingerprint = CharField()
+    # Nuls tant que la requête est en cours
+    status_code = IntegerField(null=True)
+    response_body = TextField(null=True)
+    response_headers = TextField(null=True)
+    # Début de la réservation : bail des requêtes en cours, propriétaire de la réservation et purge
+    created_at = DateTimeField(default=datetime.utcnow)
+
+    class Meta:
+        table_name = 'idempotency_key'
+        # Même index que la migration 6, pour les bases créées par create_tables()
+        indexes = ((IDEMPOTENCY_KEY_CREATED_AT_INDEX, False),)
+
+
+idempotency_keys = IdempotencyStore(IdempotencyKey)
+
+# Commandes insérées par requête INSERT dans POST /orders/batch
+ORDER_BATCH_INSERT_SIZE = 100
+
+MISSING_PRODUCT_ERRORS = {
+    "product": {
+        "code": "missing-fields",
+        "name": "La création d'une commande nécessite un produit"
+    }
+}
+
+OUT_OF_INVENTORY_ERRORS = {
+    "product": {
+        "code": "out-of-inventory",
+        "name": "Le produit demandé n'est pas en inventaire"
+    }
+}
+
+
+def parse_order_product(product_payload):
+    """Retourne (product_id, quantity) pour le champ « product » d'une commande, ou None s'il est invalide."""
+    if (
+        not isinstance(product_payload, dict)
+        or 'id' not in product_payload
+        or 'quantity' not in product_payload
+    ):
+        return None
+    try:
+        product_id = int(product_payload['id'])
+        quantity = int(product_payload['quantity'])
+    except (TypeError, ValueError):
+        return None
+    if quantity < 1:
+        return None
+    return product_id, quantity
+
+
+def order_fields_for(product, quantity):
+    total_price = product.price * quantity
+    try:
+        shipping_price = calculate_shipping_price(product.weight * quantity)
+    except ValueError:
+        shipping_price = 0
+    return {
+        'product_id': product.id,
+        'quantity': quantity,
+        'total_price': total_price,
+        'total_price_tax': total_price,
+        'shipping_price': shipping_price,
+    }
+
+
+def create_order_record(**fields):
+    """Crée une commande, dans un shard (id snowflake) si le sharding est actif."""
+    if order_shards.enabled:
+        model, fields['id'] = order_shards.allocate()
+    else:
+        model = Order
+    if order_writer.enabled:
+        order = order_writer.execute(model._meta.database, lambda: model.create(**fields))
+        order_cache.put(order.id, serialize_order(order))
+        return order
+    return model.create(**fields)
+
+
+def save_order(order):
+    """Enregistre une commande, via le thread d'écriture groupée s'il est actif."""
+    if order_writer.enabled:
+        order_writer.execute(order._meta.database, order.save)
+        order_cache.put(order.id, serialize_order(order))
+    else:
+        order.save()
+
+
+def create_order_records(rows):
+    """Crée plusieurs commandes avec insert_many, dans une transaction par base.
+
+    Retourne les commandes créées, dans l'ordre de rows.
+    """
+    orders = [None] * len(rows)
+    if order_shards.enabled:
+        by_model = {}
+        for index, fields in enumerate(rows):
+            model, order_id = order_shards.allocate()
+            by_model.setdefault(model, []).append((index, dict(fields, id=order_id)))
+        for model, entries in by_model.items():
+            with model._meta.database.atomic():
+                for batch in chunked(entries, ORDER_BATCH_INSERT_SIZE):
+                    model.insert_many([fields for _, fields in batch]).execute()
+            for index, fields in entries:
+                orders[index] = model(**fields)
+    else:
+        with db.atomic():
+            for batch in chunked(list(enumerate(rows)), ORDER_BATCH_INSERT_SIZE):
+                # Les rowid sont attribués dans l'ordre d'insertion
+                order_ids = sorted(row.id for row in Order.insert_many(
+                    [fields for _, fields in batch]
+                ).returning(Order.id).execute())
+                for (index, fields), order_id in zip(batch, order_ids):
+                    orders[index] = Order(id=order_id, **fields)
+
+    # insert_many ne passe pas par Order.save : mise à jour du cache après le commit
+    for order in orders:
+        order_cache.put(order.id, serialize_order(order))
+    return orders
+
+
+def load_order(order_id):
+    """Retourne la commande order_id (depuis son shard), ou None."""
+    model = order_shards.model_for(order_id)
+    return model.get_or_none(model.id == order_id)
+
+
+def load_order_payload(order_id):
+    order = load_order(order_id)
+    return serialize_order(order) if order is not None else None
+
+
+def iter_export_orders(params):
+    """Commandes filtrées de chaque base (principale puis shards), lues en continu.
+
+    namedtuples().iterator() évite d'instancier les modèles et de garder les
+    lignes en mémoire : l'export utilise une mémoire constante.
+    """
+    for model in order_shards.all_models():
+        query = model.select().order_by(model.id)
+        if params['paid'] is not None:
+            query = query.where(model.paid == params['paid'])
+        if params['province'] is not None:
+            query = query.where(model.shipping_province == params['province'])
+        if params['created_from'] is not None:
+            query = query.where(model.created_at >= params['created_from'])
+        if params['created_to'] is not None:
+            query = query.where(model.created_at < params['created_to'])
+        for row in query.namedtuples().iterator():
+            payload = serialize_order(row)
+            payload['created_at'] = row.created_at.isoformat() if row.created_at else None
+            yield payload
+
+
+def query_orders_page(params):
+    """Retourne une page de commandes (pagination par curseur sur l'id) et le curseur suivant.
+
+    Chaque base (principale puis shards) fournit au plus limit + 1 lignes,
+    fusionnées par id : les id sont uniques entre les bases.
+    """
+    descending = params['sort'] == '-id'
+    limit = params['limit']
+    rows = []
+    for model in order_shards.all_models():
+        query = model.select(*[getattr(model, name) for name in ORDER_LIST_FIELDS])
+        if params['paid'] is not None:
+            query = query.where(model.paid == params['paid'])
+        if params['email'] is not None:
+            query = query.where(model.email == params['email'])
+        if params['shipping_province'] is not None:
+            query = query.where(model.shipping_province == params['shipping_province'])
+        if params['product_id'] is not None:
+            query = query.where(model.product_id == params['product_id'])
+        if params['cursor'] is not None:
+            query = query.where(model.id < params['cursor'] if descending else model.id > params['cursor'])
+        query = query.order_by(model.id.desc() if descending else model.id)
+        rows.extend(query.limit(limit + 1).tuples())
+
+    rows.sort(key=lambda row: row[0], reverse=descending)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(params['sort'], None, rows[-1][0])
+    return [serialize_order_row(row) for row in rows], next_cursor
+
+
+def create_order_shard_schema():
+    for database, model in zip(order_shards.databases, order_shards.models):
+        with database.connection_context():
+            migrate_database(database)
+            model.create_table(safe=True)
 
 
 def serialize_order(order):
@@ -138,6 +493,26 @@ def missing_customer_information_for_payment_response():
     }), 422
 
 
+def admin_token_error():
+    """Retourne None si la requête porte le jeton ADMIN_TOKEN (Authorization: Bearer), sinon un 403.
+
+    Sans ADMIN_TOKEN configuré, les routes d'administration sont fermées.
+    """
+    token = current_app.config.get('ADMIN_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    scheme, _, provided = authorization.partition(' ')
+    if token and scheme.lower() == 'bearer' and hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+        return None
+    return jsonify({
+        "errors": {
+            "authorization": {
+                "code": "forbidden",
+                "name": "Un jeton d'administration valide est requis"
+            }
+        }
+    }), 403
+
+
 def already_paid_response():
     return jsonify({
         "errors": {
@@ -149,6 +524,48 @@ def already_paid_response():
     }), 422
 
 
+def payment_pending_response():
+    return jsonify({
+        "errors": {
+            "order": {
+                "code": "payment-pending",
+                "name": "Un paiement est déjà en cours pour cette commande."
+            }
+        }
+    }), 422
+
+
+def payment_service_error_response():
+    return jsonify({
+        "errors": {
+            "payment": {
+                "code": "service-error",
+                "name": "Le paiement n'a pas pu être traité"
+            }
+        }
+    }), 500
+
+
+def payment_queue_full_response():
+    return jsonify({
+        "errors": {
+            "payment": {
+                "code": "service-unavailable",
+                "name": "Trop de paiements sont en attente, veuillez réessayer plus tard"
+            }
+        }
+    }), 503, {"Retry-After": "1"}
+
+
+def serialize_payment_status(order):
+    # Les commandes payées avant les paiements asynchrones n'ont pas d'état
+    status = order.payment_status or (PAYMENT_PAID if order.paid else None)
+    return {
+        "status": status,
+        "errors": json.loads(order.payment_error) if order.payment_error else None,
+    }
+
+
 def has_complete_customer_information(order):
     return all([
         order.email,
@@ -189,50 +606,218 @@ def http_post_json(url, payload, timeout=10, extra_headers=None):
     headers = {"Content-Type": "application/json"}
     if isinstance(extra_headers, dict):
         headers.update(extra_headers)
-    req = urllib_request.Request(
-        url,
-        data=body,
-        headers=headers,
-        method="POST",
-    )
-    try:
-        with urllib_request.urlopen(req, timeout=timeout) as response:
-            status_code = response.getcode()
-            text = response.read().decode("utf-8")
-            return RemoteHTTPResponse(status_code, text)
-    except urllib_error.HTTPError as exc:
-        text = exc.read().decode("utf-8") if exc.fp else ""
-        return RemoteHTTPResponse(exc.code, text)
+    result = http_client.request("POST", url, body=body, headers=headers, timeout=timeout)
+    return RemoteHTTPResponse(result.status, result.body.decode("utf-8"))
 
 
 def http_get_json(url, timeout=10):
-    req = urllib_request.Request(url, method="GET")
-    with urllib_request.urlopen(req, timeout=timeout) as response:
-        text = response.read().decode("utf-8")
-        return json.loads(text) if text else {}
+    result = http_client.request("GET", url, headers={"Accept": "application/json"}, timeout=timeout)
+    if result.status >= 400:
+        raise urllib_error.HTTPError(url, result.status, f"HTTP {result.status}", result.headers, None)
+    text = result.body.decode("utf-8")
+    return json.loads(text) if text else {}
+
+
+def load_catalog_products():
+    return list(Product.select().dicts())
+
+
+def get_catalog_products():
+    return catalog_cache.get(load_catalog_products)
 
 
-def fetch_products_from_remote():
-    products_url = 'http://dimensweb.uqac.ca/~jgnault/shops/products/'
-    payload = http_get_json(products_url, timeout=10)
-    return payload.get('products', [])
+def get_catalog_products_by_name():
+    return sorted(get_catalog_products(), key=lambda product: product['name'])
 
 
-def bootstrap_products_if_needed():
+CATALOG_SORT_FIELDS = {
+    'id': (Product.id, False),
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'weight': (Product.weight, False),
+    '-weight': (Product.weight, True),
+}
+
+
+def query_catalog_page(params):
+    """Retourne une page de produits (pagination par curseur) et le curseur suivant."""
+    query = Product.select()
+    if params['in_stock'] is not None:
+        query = query.where(Product.in_stock == params['in_stock'])
+    if params['min_price'] is not None:
+        query = query.where(Product.price >= params['min_price'])
+    if params['max_price'] is not None:
+        query = query.where(Product.price <= params['max_price'])
+    if params['min_weight'] is not None:
+        query = query.where(Product.weight >= params['min_weight'])
+    if params['max_weight'] is not None:
+        query = query.where(Product.weight <= params['max_weight'])
+
+    sort_field, descending = CATALOG_SORT_FIELDS[params['sort']]
+    if params['cursor'] is not None:
+        value, last_id = params['cursor']
+        if sort_field is Product.id:
+            query = query.where(Product.id < last_id if descending else Product.id > last_id)
+        else:
+            position = Tuple(sort_field, Product.id)
+            query = query.where(position < Tuple(value, last_id) if descending else position > Tuple(value, last_id))
+
+    if sort_field is Product.id:
+        ordering = [Product.id.desc() if descending else Product.id]
+    elif descending:
+        ordering = [sort_field.desc(), Product.id.desc()]
+    else:
+        ordering = [sort_field, Product.id]
+
+    limit = params['limit']
+    products = list(query.order_by(*ordering).limit(limit + 1).dicts())
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        next_cursor = encode_cursor(params['sort'], last[sort_field.name], last['id'])
+    return products, next_cursor
+
+
+def create_search_index():
+    """Crée l'index FTS5 et ses triggers ; retourne True si l'index vient d'être créé.
+
+    Un nouvel index est rempli depuis la table Product ; un index existant est
+    déjà tenu à jour par les triggers et n'est pas reconstruit (flask rebuild-search-index).
+    """
+    created = not ProductIndex.table_exists()
+    db.create_tables([ProductIndex], safe=True)
+    for statement in PRODUCT_INDEX_TRIGGERS:
+        db.execute_sql(statement)
+    if created:
+        ProductIndex.rebuild()
+    return created
+
+
+def search_products(text, limit=DEFAULT_PAGE_SIZE):
+    """Retourne les produits correspondant à text, du plus pertinent au moins pertinent."""
+    expression = build_match_expression(text)
+    if expression is None:
+        return []
+    rank = ProductIndex.bm25(NAME_WEIGHT, DESCRIPTION_WEIGHT)
+    query = (
+        Product.select()
+        .join(ProductIndex, on=(Product.id == ProductIndex.rowid))
+        .where(ProductIndex.match(expression))
+        .order_by(rank, Product.id)
+        .limit(limit)
+    )
+    return list(query.dicts())
+
+
+PRODUCTS_URL = 'http://dimensweb.uqac.ca/~jgnault/shops/products/'
+PAYMENT_URL = 'http://dimensweb.uqac.ca/~jgnault/shops/pay/'
+
+# Nombre de produits par requête INSERT lors d'un import
+PRODUCT_IMPORT_BATCH_SIZE = 500
+
+PRODUCT_IMPORT_FIELDS = [
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.in_stock,
+    Product.weight,
+    Product.image,
+]
+
+
+def stream_products_from_remote(consumer, url=PRODUCTS_URL, timeout=10):
+    """Appelle consumer() avec un itérateur sur les produits du flux distant, lu en continu."""
+    with http_client.stream('GET', url, headers={'Accept': 'application/json'}, timeout=timeout) as response:
+        if response.status >= 400:
+            response.read()
+            raise urllib_error.HTTPError(url, response.status, f"HTTP {response.status}", response.headers, None)
+        result = consumer(iter_json_array(response, 'products'))
+        # Fin du corps lue : la connexion peut retourner au pool
+        response.read()
+        return result
+
+
+def import_products(products_data, batch_size=PRODUCT_IMPORT_BATCH_SIZE, progress=None):
+    """Insère ou met à jour les produits par lots (insert_many + upsert sur l'id).
+
+    Les produits sont consommés au fur et à mesure : la mémoire utilisée dépend
+    de la taille d'un lot, pas de la taille du flux. Retourne le nombre de produits.
+    """
+    columns = [field.name for field in PRODUCT_IMPORT_FIELDS]
+    count = 0
+    with db.atomic():
+        for batch in chunked(products_data, batch_size):
+            rows = [tuple(product_data.get(column) for column in columns) for product_data in batch]
+            (Product
+                .insert_many(rows, fields=PRODUCT_IMPORT_FIELDS)
+                .on_conflict(conflict_target=[Product.id], preserve=PRODUCT_IMPORT_FIELDS[1:])
+                .execute())
+            count += len(rows)
+            if progress is not None:
+                progress(len(rows))
+    catalog_cache.invalidate()
+    return count
+
+
+def import_products_from_remote(url=PRODUCTS_URL):
+    return stream_products_from_remote(
+        lambda products_data: import_products(products_data, progress=ImportProgress()),
+        url=url,
+    )
+
+
+def create_schema(output=None):
+    """Met à niveau les tables existantes, puis crée celles qui manquent."""
+    applied = migrate_database(db, output=output)
+    db.create_tables([Product, Order, IdempotencyKey], safe=True)
+    create_search_index()
+    return applied
+
+
+def bootstrap_products_if_needed(url=PRODUCTS_URL):
     db.connect(reuse_if_open=True)
     try:
-        db.create_tables([Product, Order], safe=True)
+        create_schema(output=print)
         if Product.select().count() == 0:
-            products_data = fetch_products_from_remote()
-            with db.atomic():
-                for product_data in products_data:
-                    Product.create(**product_data)
-            print(f"Successfully fetched and stored {len(products_data)} products.")
+            count = import_products_from_remote(url)
+            print(f"Successfully fetched and stored {count} products.")
+    finally:
+        db.close()
+
+
+def load_products_by_id():
+    return {product['id']: product for product in Product.select().dicts()}
+
+
+def apply_product_changes(changed, removed_ids):
+    """Écrit les produits modifiés et retire de la vente ceux absents du flux."""
+    with db.atomic():
+        if changed:
+            import_products(changed)
+        if removed_ids:
+            Product.update(in_stock=False).where(Product.id.in_(removed_ids)).execute()
+    # Publie une nouvelle version du catalogue
+    catalog_cache.invalidate()
+
+
+def sync_products(syncer):
+    """Exécute une synchronisation incrémentale du catalogue avec sa propre connexion."""
+    db.connect(reuse_if_open=True)
+    try:
+        return syncer.run_once()
     finally:
         db.close()
 
 
-def process_payment(order, credit_card_info):
+def process_payment(order, credit_card_info, charge=None, idempotency_key=None):
+    """Valide la carte puis débite la commande avec charge(order, payment_request, idempotency_key).
+
+    Retourne None ou une réponse d'erreur ; par défaut le débit est fait tout de
+    suite, après réservation de la commande (charge_claimed_payment).
+    """
     if order.paid:
         return already_paid_response()
     
@@ -348,9 +933,27 @@ def process_payment(order, credit_card_info):
         },
         "amount_charged": amount_charged_cents
     }
+    return (charge or charge_claimed_payment)(order, payment_request, idempotency_key)
+
+
+def payment_idempotency_key(order_id, idempotency_key):
+    """Jeton transmis au service de paiement pour la clé Idempotency-Key du client.
+
+    Lié à la commande : la même clé envoyée pour deux commandes donne deux jetons.
+    """
+    return hashlib.sha256(f"{order_id}\n{idempotency_key}".encode('utf-8')).hexdigest()
+
+
+def charge_payment(order, payment_request, idempotency_key=None):
+    """Envoie payment_request au service de paiement ; retourne None si la commande est payée.
+
+    Avec idempotency_key (en-tête Idempotency-Key du client), le service de
+    paiement reçoit un jeton d'idempotence et les réponses 5xx sont réessayées.
+    """
     # Use Python logging instead of temp file logging
     logger = logging.getLogger('inf349.payment')
     # Prepare masked debug info
+    formatted_number = payment_request['credit_card']['number']
     masked_number = formatted_number
     try:
         num = formatted_number.replace(' ', '')
@@ -367,6 +970,8 @@ def process_payment(order, credit_card_info):
         'Accept': 'application/json',
         'User-Agent': 'inf349-app/1.0'
     }
+    if idempotency_key is not None:
+        extra_headers['Idempotency-Key'] = payment_idempotency_key(order.id, idempotency_key)
     # Log headers (mask Authorization if present)
     try:
         safe_headers = {k: ('<redacted>' if k.lower() == 'authorization' else v) for k, v in extra_headers.items()}
@@ -374,13 +979,12 @@ def process_payment(order, credit_card_info):
     except Exception:
         logger.debug('Outgoing headers could not be serialized')
 
+    if not payment_breaker.allow():
+        logger.warning('Payment circuit is open, failing fast (retry in %.1fs)', payment_breaker.retry_after())
+        return payment_service_unavailable_response()
+
     try:
-        response = http_post_json(
-            'http://dimensweb.uqac.ca/~jgnault/shops/pay/',
-            payment_request,
-            timeout=10,
-            extra_headers=extra_headers,
-        )
+        response = post_payment_request(payment_request, extra_headers)
 
         # Log response status and body
         try:
@@ -407,8 +1011,10 @@ def process_payment(order, credit_card_info):
             order.transaction_id = transaction.get('id')
             order.transaction_success = transaction.get('success')
             order.transaction_amount_charged = transaction.get('amount_charged')
+            order.payment_status = PAYMENT_PAID
+            order.payment_error = None
 
-            order.save()
+            save_order(order)
             return None
 
         elif response.status_code == 422:
@@ -455,15 +1061,174 @@ def process_payment(order, credit_card_info):
     except (urllib_error.URLError, TimeoutError, ValueError, json.JSONDecodeError) as exc:
         logger = logging.getLogger('inf349.payment')
         logger.exception('Exception while contacting payment service')
-        return (jsonify({
-            "errors": {
-                "payment": {
-                    "code": "service-unavailable",
-                    "name": "Le service de paiement est temporairement indisponible"
-                }
+        return payment_service_unavailable_response()
+
+
+def payment_service_unavailable_response():
+    return (jsonify({
+        "errors": {
+            "payment": {
+                "code": "service-unavailable",
+                "name": "Le service de paiement est temporairement indisponible"
             }
-        }), 503)
+        }
+    }), 503)
+
+
+def post_payment_request(payment_request, extra_headers):
+    """Appelle le service de paiement à travers le disjoncteur, avec le délai adaptatif.
 
+    Les erreurs réseau, les délais expirés et les statuts 5xx comptent comme des
+    échecs ; un refus de carte (422) montre un service en bonne santé.
+
+    Seuls les cas sûrs sont réessayés : un échec de connexion (la requête n'est
+    pas partie) et, avec un en-tête Idempotency-Key, une réponse 5xx. Un délai
+    expiré n'est jamais réessayé : le débit a peut-être eu lieu.
+    """
+    logger = logging.getLogger('inf349.payment')
+    idempotent = 'Idempotency-Key' in extra_headers
+    delays = payment_retry.backoff()
+    payment_retry_budget.record_call()
+    attempt = 1
+    while True:
+        started_at = time.perf_counter()
+        try:
+            response = http_post_json(
+                current_app.config.get('PAYMENT_URL', PAYMENT_URL),
+                payment_request,
+                timeout=payment_timeout.current(),
+                extra_headers=extra_headers,
+            )
+        except (urllib_error.URLError, TimeoutError) as exc:
+            elapsed = time.perf_counter() - started_at
+            payment_timeout.observe(elapsed)
+            payment_breaker.record_failure()
+            logger.info('Payment attempt %d failed after %.1f ms: %r', attempt, elapsed * 1000, exc)
+            if not is_connect_failure(exc) or not can_retry_payment(attempt):
+                raise
+        except Exception:
+            # Toute autre erreur (réponse illisible, ...) est un échec : un appel
+            # d'essai (half_open) ne doit pas garder sa place indéfiniment
+            payment_breaker.record_failure()
+            raise
+        else:
+            elapsed = time.perf_counter() - started_at
+            payment_timeout.observe(elapsed)
+            logger.info('Payment attempt %d: status=%s in %.1f ms', attempt, response.status_code, elapsed * 1000)
+            if response.status_code < 500:
+                payment_breaker.record_success()
+                return response
+            payment_breaker.record_failure()
+            if not idempotent or not can_retry_payment(attempt):
+                return response
+
+        delay = next(delays)
+        logger.info('Retrying payment in %.0f ms', delay * 1000)
+        payment_retry.sleep(delay)
+        attempt += 1
+
+
+def can_retry_payment(attempt):
+    """Vrai s'il reste une tentative, que le disjoncteur laisse passer et que le budget le permet."""
+    return (
+        attempt < payment_retry.max_attempts
+        and payment_breaker.allow()
+        and payment_retry_budget.try_spend()
+    )
+
+
+def claim_payment(order):
+    """Réserve le débit de la commande (état pending) ; retourne False si un autre débit est en cours.
+
+    Réservation atomique : un seul débit concurrent l'obtient, qu'il soit fait
+    tout de suite ou en file. Un pending plus ancien que PAYMENT_CLAIM_LEASE
+    secondes (processus arrêté pendant le débit) peut être réservé de nouveau.
+    """
+    model = type(order)
+    now = datetime.utcnow()
+    expired = now - timedelta(seconds=current_app.config['PAYMENT_CLAIM_LEASE'])
+    claimed = model.update(payment_status=PAYMENT_PENDING, payment_claimed_at=now).where(
+        (model.id == order.id)
+        & (model.paid == False)
+        & (
+            model.payment_status.is_null()
+            | (model.payment_status == PAYMENT_FAILED)
+            | ((model.payment_status == PAYMENT_PENDING)
+               & (model.payment_claimed_at.is_null() | (model.payment_claimed_at < expired)))
+        )
+    ).execute()
+    if not claimed:
+        return False
+    order.payment_status = PAYMENT_PENDING
+    order.payment_claimed_at = now
+    order_cache.discard(order.id)
+    return True
+
+
+def charge_claimed_payment(order, payment_request, idempotency_key=None):
+    """Débit immédiat (synchrone) : réserve la commande puis appelle charge_payment.
+
+    Retourne None si la commande est payée, sinon une réponse d'erreur ; un échec
+    est enregistré (failed) pour que la commande puisse être payée de nouveau.
+    """
+    if not claim_payment(order):
+        return payment_pending_response()
+    try:
+        error = charge_payment(order, payment_request, idempotency_key)
+    except Exception:
+        record_payment_failure(order, payment_service_error_response())
+        raise
+    if error is not None:
+        record_payment_failure(order, error)
+    return error
+
+
+def enqueue_payment(order, payment_request, idempotency_key=None):
+    """Passe la commande à l'état pending et planifie son débit (PAYMENT_ASYNC).
+
+    Retourne None si le débit est en file, sinon une réponse d'erreur.
+    """
+    model = type(order)
+    previous_status = order.payment_status
+    if not claim_payment(order):
+        return payment_pending_response()
+
+    app = current_app._get_current_object()
+    try:
+        payment_queue.submit(lambda: run_queued_payment(app, order.id, payment_request, idempotency_key))
+    except queue.Full:
+        model.update(payment_status=previous_status, payment_claimed_at=None).where(model.id == order.id).execute()
+        order.payment_status = previous_status
+        order.payment_claimed_at = None
+        return payment_queue_full_response()
+    return None
+
+
+def run_queued_payment(app, order_id, payment_request, idempotency_key=None):
+    """Débit exécuté par un thread de payment_queue, avec sa propre connexion."""
+    with app.app_context():
+        db.connect(reuse_if_open=True)
+        try:
+            order = load_order(order_id)
+            try:
+                error = charge_payment(order, payment_request, idempotency_key)
+            except Exception:
+                record_payment_failure(order, payment_service_error_response())
+                raise
+            if error is not None:
+                record_payment_failure(order, error)
+        finally:
+            if not db.is_closed():
+                db.close()
+            order_shards.close()
+
+
+def record_payment_failure(order, error):
+    response = error[0]
+    payload = response.get_json(silent=True) or {}
+    order.payment_status = PAYMENT_FAILED
+    order.payment_error = json.dumps(payload.get("errors", payload), ensure_ascii=False)
+    save_order(order)
 
 
 def create_app(test_config=None):
@@ -472,6 +1237,90 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE=os.path.join(app.instance_path, 'inf349.sqlite'),
+        CATALOG_CACHE=True,
+        # Niveaux de compression des réponses du catalogue (gzip 1-9, brotli 0-11)
+        CATALOG_GZIP_LEVEL=6,
+        CATALOG_BROTLI_QUALITY=5,
+        PRODUCTS_URL=PRODUCTS_URL,
+        PAYMENT_URL=PAYMENT_URL,
+        # Intervalle (secondes) de synchronisation du catalogue en arrière-plan, 0 pour désactiver
+        CATALOG_SYNC_INTERVAL=300,
+        # Part maximale des produits en stock qu'une synchronisation peut retirer de la vente ;
+        # au-delà (ou flux vide), le flux est rejeté et le catalogue conservé
+        CATALOG_SYNC_MAX_REMOVED_RATIO=0.5,
+        # Empreintes de contenu dans les URL des fichiers statiques (cache immutable)
+        STATIC_FINGERPRINT=True,
+        # Cache des pages UI et des fragments {% cache %} (entrées LRU), par version du catalogue
+        RENDER_CACHE=True,
+        RENDER_CACHE_SIZE=64,
+        FRAGMENT_CACHE_SIZE=1024,
+        # Dossier du cache de bytecode Jinja (None pour désactiver) et compilation au démarrage
+        TEMPLATE_BYTECODE_CACHE_DIR=None,
+        PRECOMPILE_TEMPLATES=False,
+        # Pool de connexions SQLite (taille maximale, durée de vie et attente en secondes)
+        DATABASE_POOL=False,
+        DATABASE_POOL_MAX_CONNECTIONS=8,
+        DATABASE_POOL_STALE_TIMEOUT=300,
+        DATABASE_POOL_TIMEOUT=10,
+        # Pragmas SQLite appliqués à chaque connexion (WAL, mmap, cache, busy_timeout)
+        SQLITE_PRAGMAS=dict(DEFAULT_SQLITE_PRAGMAS),
+        # Nombre de fichiers SQLite (shards) pour les commandes, 0 pour tout garder dans DATABASE ;
+        # ORDER_ID_WORKER (0 à 15) distingue les processus qui génèrent des id ; par défaut chaque
+        # processus en réserve un libre par un verrou de fichier à côté des shards
+        ORDER_SHARDS=0,
+        ORDER_SHARD_DATABASE=os.path.join(app.instance_path, 'orders-{shard}.sqlite'),
+        ORDER_ID_WORKER=None,
+        # Cache des commandes sérialisées (entrées LRU, TTL en secondes pour les écritures d'autres processus).
+        # Invalidé seulement dans le processus qui écrit : à activer avec un seul processus (worker)
+        ORDER_CACHE=False,
+        ORDER_CACHE_SIZE=4096,
+        ORDER_CACHE_TTL=10,
+        # Nombre maximal de commandes par appel à POST /orders/batch
+        ORDER_BATCH_MAX_SIZE=500,
+        # Jeton des routes qui exposent les commandes de tous les clients (Authorization: Bearer) ;
+        # sans jeton, ces routes répondent 403
+        ADMIN_TOKEN=None,
+        # Thread d'écriture groupée des commandes : lots d'au plus ORDER_GROUP_COMMIT_BATCH écritures,
+        # validés au plus ORDER_GROUP_COMMIT_DELAY secondes après la première
+        ORDER_GROUP_COMMIT=False,
+        ORDER_GROUP_COMMIT_BATCH=256,
+        ORDER_GROUP_COMMIT_DELAY=0.002,
+        # Connexions keep-alive conservées par hôte distant, et durée (secondes) avant d'en ouvrir une neuve
+        HTTP_POOL_SIZE=4,
+        HTTP_POOL_IDLE_TIMEOUT=30,
+        # Paiements asynchrones : PUT /order/<id> répond 202 et le débit est fait par
+        # PAYMENT_WORKERS threads, avec au plus PAYMENT_QUEUE_SIZE débits en attente
+        PAYMENT_ASYNC=False,
+        PAYMENT_WORKERS=4,
+        PAYMENT_QUEUE_SIZE=64,
+        # Durée (secondes) après laquelle un débit resté pending (processus arrêté) peut être relancé
+        PAYMENT_CLAIM_LEASE=300,
+        # Disjoncteur du service de paiement : ouvert après PAYMENT_BREAKER_FAILURES échecs
+        # consécutifs, appel d'essai après PAYMENT_BREAKER_RESET secondes
+        PAYMENT_BREAKER_FAILURES=5,
+        PAYMENT_BREAKER_RESET=30,
+        # Délai d'attente du paiement : PAYMENT_TIMEOUT_FACTOR x p99 observé, borné par
+        # PAYMENT_TIMEOUT_MIN et PAYMENT_TIMEOUT (aussi utilisé avant les premières mesures)
+        PAYMENT_TIMEOUT=10,
+        PAYMENT_TIMEOUT_MIN=1,
+        PAYMENT_TIMEOUT_FACTOR=3,
+        # Durée de conservation (secondes) des réponses rejouées pour un même Idempotency-Key,
+        # et attente maximale d'une requête concurrente portant la même clé
+        IDEMPOTENCY_KEY_TTL=86400,
+        IDEMPOTENCY_WAIT_TIMEOUT=30,
+        # Durée maximale (secondes) d'une requête avec Idempotency-Key : au-delà, sa réservation
+        # est considérée abandonnée (PAYMENT_RETRY_ATTEMPTS x PAYMENT_TIMEOUT, plus les attentes)
+        IDEMPOTENCY_LEASE=120,
+        # Intervalle (secondes) minimal entre deux purges des clés expirées
+        IDEMPOTENCY_PURGE_INTERVAL=60,
+        # Nouvelles tentatives de paiement : au plus PAYMENT_RETRY_ATTEMPTS appels, attentes
+        # aléatoires entre PAYMENT_RETRY_BASE_DELAY et PAYMENT_RETRY_MAX_DELAY secondes, et sur
+        # 10 secondes au plus PAYMENT_RETRY_BUDGET_MIN + PAYMENT_RETRY_BUDGET_RATIO x appels
+        PAYMENT_RETRY_ATTEMPTS=3,
+        PAYMENT_RETRY_BASE_DELAY=0.05,
+        PAYMENT_RETRY_MAX_DELAY=1.0,
+        PAYMENT_RETRY_BUDGET_RATIO=0.1,
+        PAYMENT_RETRY_BUDGET_MIN=3,
     )
 
     if test_config is None:
@@ -487,12 +1336,170 @@ def create_app(test_config=None):
     except OSError:
         pass
 
+    # Arrête les threads d'écriture liés aux bases précédentes avant d'en changer
+    order_writer.configure(
+        enabled=app.config['ORDER_GROUP_COMMIT'],
+        max_batch=app.config['ORDER_GROUP_COMMIT_BATCH'],
+        max_delay=app.config['ORDER_GROUP_COMMIT_DELAY'],
+    )
+
+    # Termine les débits en file de l'application précédente
+    payment_queue.configure(
+        enabled=app.config['PAYMENT_ASYNC'],
+        workers=app.config['PAYMENT_WORKERS'],
+        max_pending=app.config['PAYMENT_QUEUE_SIZE'],
+    )
+
+    payment_breaker.configure(
+        failure_threshold=app.config['PAYMENT_BREAKER_FAILURES'],
+        reset_timeout=app.config['PAYMENT_BREAKER_RESET'],
+    )
+    payment_timeout.configure(
+        initial=app.config['PAYMENT_TIMEOUT'],
+        minimum=app.config['PAYMENT_TIMEOUT_MIN'],
+        maximum=app.config['PAYMENT_TIMEOUT'],
+        factor=app.config['PAYMENT_TIMEOUT_FACTOR'],
+    )
+    payment_retry.configure(
+        max_attempts=app.config['PAYMENT_RETRY_ATTEMPTS'],
+        base_delay=app.config['PAYMENT_RETRY_BASE_DELAY'],
+        max_delay=app.config['PAYMENT_RETRY_MAX_DELAY'],
+    )
+    payment_retry_budget.configure(
+        ratio=app.config['PAYMENT_RETRY_BUDGET_RATIO'],
+        min_retries=app.config['PAYMENT_RETRY_BUDGET_MIN'],
+    )
+
+    idempotency_keys.configure(
+        ttl=app.config['IDEMPOTENCY_KEY_TTL'],
+        wait_timeout=app.config['IDEMPOTENCY_WAIT_TIMEOUT'],
+        lease=app.config['IDEMPOTENCY_LEASE'],
+        purge_interval=app.config['IDEMPOTENCY_PURGE_INTERVAL'],
+    )
+
+    http_client.configure(
+        pool_size=app.config['HTTP_POOL_SIZE'],
+        idle_timeout=app.config['HTTP_POOL_IDLE_TIMEOUT'],
+    )
+
+    pool_options = {}
+    if app.config['DATABASE_POOL']:
+        pool_options = dict(
+            max_connections=app.config['DATABASE_POOL_MAX_CONNECTIONS'],
+            stale_timeout=app.config['DATABASE_POOL_STALE_TIMEOUT'],
+            timeout=app.config['DATABASE_POOL_TIMEOUT'],
+        )
+    if not db.is_closed():
+        db.close()
+    db.initialize(create_database(
+        app.config['DATABASE'],
+        pragmas=app.config['SQLITE_PRAGMAS'],
+        pool=app.config['DATABASE_POOL'],
+        **pool_options
+    ))
+
+    catalog_cache.reset(
+        enabled=app.config['CATALOG_CACHE'],
+        gzip_level=app.config['CATALOG_GZIP_LEVEL'],
+        brotli_quality=app.config['CATALOG_BROTLI_QUALITY'],
+    )
+    order_cache.configure(
+        enabled=app.config['ORDER_CACHE'],
+        maxsize=app.config['ORDER_CACHE_SIZE'],
+        ttl=app.config['ORDER_CACHE_TTL'],
+    )
+
+    order_shards.configure(
+        [app.config['ORDER_SHARD_DATABASE'].format(shard=shard) for shard in range(app.config['ORDER_SHARDS'])],
+        pragmas=app.config['SQLITE_PRAGMAS'],
+        worker_id=app.config['ORDER_ID_WORKER'],
+    )
+    create_order_shard_schema()
+
+    catalog_syncer = CatalogSyncer(
+        app.config['PRODUCTS_URL'],
+        load_products_by_id,
+        apply_product_changes,
+        invalidate=catalog_cache.invalidate,
+        client=http_client,
+        max_removed_ratio=app.config['CATALOG_SYNC_MAX_REMOVED_RATIO'],
+    )
+    app.extensions['catalog_sync'] = catalog_syncer
+
     if not app.config.get("TESTING"):
         try:
-            bootstrap_products_if_needed()
+            bootstrap_products_if_needed(app.config['PRODUCTS_URL'])
         except Exception as exc:
             print(f"Error bootstrapping products: {exc}")
 
+        if app.config['CATALOG_SYNC_INTERVAL']:
+            app.extensions['catalog_refresher'] = BackgroundRefresher(
+                lambda: sync_products(catalog_syncer),
+                app.config['CATALOG_SYNC_INTERVAL'],
+            ).start()
+
+    images_dir = os.path.join(app.static_folder, 'images')
+    image_manifest = ImageManifest(images_dir)
+
+    if app.config['STATIC_FINGERPRINT']:
+        asset_manifest = AssetManifest(app.static_folder, auto_reload=app.debug)
+
+        @app.url_defaults
+        def fingerprint_static_url(endpoint, values):
+            if endpoint == 'static' and 'filename' in values:
+                values['filename'] = asset_manifest.fingerprint(values['filename'])
+
+        def serve_static(filename):
+            original, immutable = asset_manifest.resolve(filename)
+            response = send_from_directory(app.static_folder, original)
+            if immutable:
+                response.cache_control.public = True
+                response.cache_control.max_age = IMMUTABLE_MAX_AGE
+                response.cache_control.immutable = True
+            return response
+
+        app.view_functions['static'] = serve_static
+
+        @app.cli.command('build-assets')
+        def build_assets_command():
+            """Write the static asset fingerprint manifest."""
+            manifest = asset_manifest.build()
+            print(f'Fingerprinted {len(manifest)} static files.')
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if app.config['TEMPLATE_BYTECODE_CACHE_DIR']:
+        configure_bytecode_cache(app.jinja_env, app.config['TEMPLATE_BYTECODE_CACHE_DIR'])
+    page_cache = None
+    fragment_cache = None
+
+    def catalog_render_version():
+        # Version du catalogue et préfixe des URL : clé des pages et des fragments en cache
+        return (catalog_cache.version, request.script_root)
+
+    if app.config['RENDER_CACHE']:
+        page_cache = LRUCache(app.config['RENDER_CACHE_SIZE'])
+        fragment_cache = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+        app.jinja_env.fragment_cache = fragment_cache
+        app.jinja_env.fragment_cache_version = catalog_render_version
+        render_cache = RenderCache(page_cache, catalog_render_version, render_template)
+
+    def render_catalog_page(template_name, load_context, inputs=()):
+        """Rend une page qui ne dépend que du catalogue (et des entrées déclarées)."""
+        if page_cache is None:
+            return render_template(template_name, **load_context())
+        return render_cache.render_template(template_name, load_context, inputs)
+
+    @app.template_global()
+    def responsive_image(filename, alt, lazy=True):
+        """Balise <picture> avec srcset/sizes pour une image de static/images."""
+        return render_responsive_image(
+            image_manifest,
+            lambda path: url_for('static', filename='images/' + path),
+            filename,
+            alt,
+            lazy=lazy,
+        )
+
     @app.errorhandler(422)
     def handle_422_error(error):
         response = getattr(error, 'description', None)
@@ -512,105 +1519,237 @@ def create_app(test_config=None):
 
     @app.before_request
     def before_request():
-        db.connect()
-
-    @app.after_request
-    def after_request(response):
-        db.close()
+        # Le catalogue en cache n'a pas besoin de connexion à la base
+        if request.method == 'GET' and request.endpoint in CATALOG_ENDPOINTS and catalog_cache.is_warm():
+            return
+        if request.endpoint in NO_DATABASE_ENDPOINTS:
+            return
+        # Commande en cache : pas de connexion (la vue se connecte au besoin si l'entrée expire entre-temps)
+        if request.endpoint == 'get_order' and request.view_args['order_id'] in order_cache:
+            return
+        db.connect(reuse_if_open=True)
+
+    @app.teardown_request
+    def teardown_request(exc):
+        # Exécuté même si la vue lève une exception : la connexion retourne au pool
+        if not db.is_closed():
+            db.close()
+        order_shards.close()
+
+    def encode_catalog(products):
+        # Même sortie que jsonify, encodée une seule fois par version du catalogue
+        return f"{app.json.dumps({'products': products})}\n".encode('utf-8')
+
+    def catalog_json_response():
+        encoded = catalog_cache.get_encoded(load_catalog_products, encode_catalog)
+        body, content_encoding = encoded.body_for(request.accept_encodings)
+        if encoded.matches(request.if_none_match):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=app.json.mimetype)
+            if content_encoding is not None:
+                response.headers['Content-Encoding'] = content_encoding
+        response.set_etag(encoded.etags[content_encoding])
+        response.vary.add('Accept-Encoding')
         return response
 
     @app.route('/')
     def list_products():
-        products = list(Product.select().dicts())
-        return jsonify({'products': products})
+        return catalog_json_response()
 
     @app.route('/ui/products')
     def ui_list_products():
-        products = list(Product.select().dicts())
-        return render_template('list_products.html', products=products)
+        return render_catalog_page('list_products.html', lambda: {'products': get_catalog_products()})
     
     @app.route('/api/products')
     def api_list_products():
         """API endpoint pour obtenir les produits en JSON"""
-        products = list(Product.select().dicts())
-        return jsonify({'products': products})
-
-    @app.route('/order', methods=['POST'])
-    def create_order():
-        payload = request.get_json(silent=True) or {}
-        product_payload = payload.get('product')
+        if not is_paginated_catalog_query(request.args):
+            return catalog_json_response()
 
-        if (
-            not isinstance(product_payload, dict)
-            or 'id' not in product_payload
-            or 'quantity' not in product_payload
-        ):
+        try:
+            params = parse_catalog_query(request.args)
+        except ValueError:
             return jsonify({
                 "errors": {
-                    "product": {
-                        "code": "missing-fields",
-                        "name": "La création d'une commande nécessite un produit"
+                    "products": {
+                        "code": "invalid-parameters",
+                        "name": "Les paramètres de pagination ou de filtre sont invalides"
                     }
                 }
             }), 422
 
+        products, next_cursor = query_catalog_page(params)
+        return jsonify({'products': products, 'next_cursor': next_cursor})
+
+    @app.route('/api/products/search')
+    def api_search_products():
+        """Recherche plein texte dans le nom et la description des produits"""
+        text = request.args.get('q', '')
         try:
-            product_id = int(product_payload['id'])
-            quantity = int(product_payload['quantity'])
-        except (TypeError, ValueError):
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+
+        if build_match_expression(text) is None or not 1 <= limit <= MAX_PAGE_SIZE:
             return jsonify({
                 "errors": {
-                    "product": {
-                        "code": "missing-fields",
-                        "name": "La création d'une commande nécessite un produit"
+                    "search": {
+                        "code": "invalid-parameters",
+                        "name": "La recherche nécessite au moins un mot et une limite valide"
                     }
                 }
             }), 422
 
-        if quantity < 1:
+        return jsonify({'products': search_products(text, limit)})
+
+    @app.route('/api/metrics')
+    def api_metrics():
+        """Compteurs internes de l'application (caches, etc.)"""
+        return jsonify({
+            'catalog_cache': catalog_cache.stats(),
+            'catalog_sync': catalog_syncer.stats(),
+            'render_cache': page_cache.stats() if page_cache is not None else None,
+            'fragment_cache': fragment_cache.stats() if fragment_cache is not None else None,
+            'database_pool': db.obj.pool_stats() if hasattr(db.obj, 'pool_stats') else None,
+            'order_shards': order_shards.stats() if order_shards.enabled else None,
+            'order_cache': order_cache.stats(),
+            'order_writer': order_writer.stats(),
+            'http_client': http_client.stats(),
+            'payment_queue': payment_queue.stats(),
+            'payment_service': {
+                'breaker': payment_breaker.stats(),
+                'timeout': payment_timeout.stats(),
+                'retry_budget': payment_retry_budget.stats(),
+            },
+            'idempotency': idempotency_keys.stats(),
+        })
+
+    @app.route('/order', methods=['POST'])
+    def create_order():
+        payload = request.get_json(silent=True) or {}
+        parsed = parse_order_product(payload.get('product'))
+        if parsed is None:
+            return jsonify({"errors": MISSING_PRODUCT_ERRORS}), 422
+
+        product_id, quantity = parsed
+        product = Product.get_or_none(Product.id == product_id)
+        if not product or not product.in_stock:
+            return jsonify({"errors": OUT_OF_INVENTORY_ERRORS}), 422
+
+        order = create_order_record(**order_fields_for(product, quantity))
+
+        response = jsonify({})
+        response.status_code = 302
+        response.headers['Location'] = f"/order/{order.id}"
+        return response
+
+    @app.route('/orders/batch', methods=['POST'])
+    def create_orders_batch():
+        payload = request.get_json(silent=True) or {}
+        items = payload.get('orders')
+        max_size = app.config['ORDER_BATCH_MAX_SIZE']
+        if not isinstance(items, list) or not items or len(items) > max_size:
             return jsonify({
                 "errors": {
-                    "product": {
+                    "orders": {
                         "code": "missing-fields",
-                        "name": "La création d'une commande nécessite un produit"
+                        "name": f"Le lot doit contenir entre 1 et {max_size} commandes"
                     }
                 }
             }), 422
 
-        product = Product.get_or_none(Product.id == product_id)
-        if not product or not product.in_stock:
+        # Validation de tous les éléments, puis une seule requête IN pour les produits
+        parsed = [
+            parse_order_product(item.get('product')) if isinstance(item, dict) else None
+            for item in items
+        ]
+        product_ids = {entry[0] for entry in parsed if entry is not None}
+        products = {
+            product.id: product
+            for product in Product.select().where(Product.id.in_(list(product_ids)))
+        } if product_ids else {}
+
+        results = [None] * len(items)
+        pending = []
+        for index, entry in enumerate(parsed):
+            if entry is None:
+                results[index] = {"status": 422, "errors": MISSING_PRODUCT_ERRORS}
+                continue
+            product = products.get(entry[0])
+            if product is None or not product.in_stock:
+                results[index] = {"status": 422, "errors": OUT_OF_INVENTORY_ERRORS}
+                continue
+            pending.append((index, order_fields_for(product, entry[1])))
+
+        for (index, _), order in zip(pending, create_order_records([fields for _, fields in pending])):
+            results[index] = {
+                "status": 201,
+                "location": f"/order/{order.id}",
+                "order": serialize_order(order),
+            }
+
+        if len(pending) == len(items):
+            status_code = 201
+        elif pending:
+            status_code = 207
+        else:
+            status_code = 422
+        return jsonify({"orders": results}), status_code
+
+    @app.route('/orders')
+    def list_orders():
+        """Liste paginée des commandes, filtrée par paiement, courriel, province ou produit"""
+        forbidden = admin_token_error()
+        if forbidden is not None:
+            return forbidden
+
+        try:
+            params = parse_order_list_query(request.args)
+        except ValueError:
             return jsonify({
                 "errors": {
-                    "product": {
-                        "code": "out-of-inventory",
-                        "name": "Le produit demandé n'est pas en inventaire"
+                    "orders": {
+                        "code": "invalid-parameters",
+                        "name": "Les paramètres de pagination ou de filtre sont invalides"
                     }
                 }
             }), 422
 
-        total_price = product.price * quantity
+        orders, next_cursor = query_orders_page(params)
+        return jsonify({'orders': orders, 'next_cursor': next_cursor})
+
+    @app.route('/orders/export')
+    def export_orders():
+        """Export de toutes les commandes filtrées, en NDJSON ou en CSV"""
+        forbidden = admin_token_error()
+        if forbidden is not None:
+            return forbidden
+
         try:
-            shipping_price = calculate_shipping_price(product.weight * quantity)
+            params = parse_export_query(request.args)
         except ValueError:
-            shipping_price = 0
+            return jsonify({
+                "errors": {
+                    "export": {
+                        "code": "invalid-parameters",
+                        "name": "Les paramètres de format ou de filtre sont invalides"
+                    }
+                }
+            }), 422
 
-        order = Order.create(
-            product_id=product.id,
-            quantity=quantity,
-            total_price=total_price,
-            total_price_tax=total_price,
-            shipping_price=shipping_price,
+        serializer = iter_csv if params['format'] == 'csv' else iter_ndjson
+        response = Response(
+            stream_with_context(serializer(iter_export_orders(params))),
+            mimetype=EXPORT_FORMATS[params['format']],
         )
-
-        response = jsonify({})
-        response.status_code = 302
-        response.headers['Location'] = f"/order/{order.id}"
+        response.headers['Content-Disposition'] = f"attachment; filename=orders.{params['format']}"
         return response
 
     @app.route('/order/<int:order_id>', methods=['GET'])
     def get_order(order_id):
-        order = Order.get_or_none(Order.id == order_id)
-        if order is None:
+        payload = order_cache.get(order_id, lambda: load_order_payload(order_id))
+        if payload is None:
             return jsonify({
                 "errors": {
                     "order": {
@@ -620,14 +1759,60 @@ def create_app(test_config=None):
                 }
             }), 404
 
-        return jsonify({"order": serialize_order(order)}), 200
+        return jsonify({"order": payload}), 200
     
 
 
 
     @app.route('/order/<int:order_id>', methods=['PUT'])
     def update_order_client(order_id):
-        order = Order.get_or_none(Order.id == order_id)
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return apply_order_update(order_id)
+
+        if not key.strip() or len(key) > MAX_KEY_LENGTH:
+            return jsonify({
+                "errors": {
+                    "idempotency_key": {
+                        "code": "invalid-idempotency-key",
+                        "name": f"L'en-tête Idempotency-Key doit contenir de 1 à {MAX_KEY_LENGTH} caractères"
+                    }
+                }
+            }), 422
+
+        def run_update():
+            response = app.make_response(apply_order_update(order_id, key))
+            return response.status_code, response.get_data(as_text=True), response.headers
+
+        fingerprint = request_fingerprint(request.method, request.path, request.get_json(silent=True))
+        try:
+            stored = idempotency_keys.execute(key, fingerprint, run_update)
+        except IdempotencyKeyReused:
+            return jsonify({
+                "errors": {
+                    "idempotency_key": {
+                        "code": "idempotency-key-reused",
+                        "name": "Cette clé d'idempotence a déjà été utilisée pour une autre requête"
+                    }
+                }
+            }), 422
+        except IdempotencyKeyInProgress:
+            return jsonify({
+                "errors": {
+                    "idempotency_key": {
+                        "code": "request-in-progress",
+                        "name": "Une requête avec cette clé d'idempotence est encore en cours"
+                    }
+                }
+            }), 409, {"Retry-After": "1"}
+
+        response = Response(stored.body, status=stored.status_code, mimetype=app.json.mimetype, headers=stored.headers)
+        if stored.replayed:
+            response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+    def apply_order_update(order_id, idempotency_key=None):
+        order = load_order(order_id)
         if order is None:
             return jsonify({
                 "errors": {
@@ -706,7 +1891,7 @@ def create_app(test_config=None):
                 except ValueError:
                     order.total_price_tax = order.total_price
 
-            order.save()
+            save_order(order)
             return jsonify({"order": serialize_order(order)}), 200
 
         # credit_card payload mode
@@ -719,17 +1904,53 @@ def create_app(test_config=None):
         if not has_complete_customer_information(order):
             return missing_customer_information_for_payment_response()
 
-        payment_error = process_payment(order, payload.get("credit_card"))
+        if payment_queue.enabled:
+            payment_error = process_payment(
+                order, payload.get("credit_card"), charge=enqueue_payment, idempotency_key=idempotency_key,
+            )
+            if payment_error is not None:
+                return payment_error
+            status_url = url_for('get_order_payment', order_id=order.id)
+            return jsonify({
+                "payment": dict(serialize_payment_status(order), url=status_url),
+            }), 202, {"Location": status_url}
+
+        payment_error = process_payment(order, payload.get("credit_card"), idempotency_key=idempotency_key)
         if payment_error is not None:
             return payment_error
 
         return jsonify({"order": serialize_order(order)}), 200
 
+    @app.route('/order/<int:order_id>/payment', methods=['GET'])
+    def get_order_payment(order_id):
+        order = load_order(order_id)
+        if order is None:
+            return jsonify({
+                "errors": {
+                    "order": {
+                        "code": "not-found",
+                        "name": "La commande demandée est introuvable"
+                    }
+                }
+            }), 404
+
+        return jsonify({"payment": serialize_payment_status(order)}), 200
+
     @app.route('/ui/order', methods=['GET', 'POST'])
     def ui_order_form():
-        products = list(Product.select().order_by(Product.name))
-
         if request.method == 'POST':
+            # Version lue avant les produits, pour les fragments {% cache %} du formulaire
+            fragment_version = catalog_render_version()
+            products = get_catalog_products_by_name()
+
+            def render_form_error(error, status_code=422):
+                return render_template(
+                    'order_form.html',
+                    products=products,
+                    error=error,
+                    **{FRAGMENT_VERSION_VAR: fragment_version}
+                ), status_code
+
             product_id = request.form.get('product_id', '').strip()
             quantity = request.form.get('quantity', '').strip()
             email = request.form.get('email', '').strip()
@@ -741,51 +1962,27 @@ def create_app(test_config=None):
 
             # Validation des champs obligatoires
             if not all([product_id, quantity, email, shipping_country, shipping_address, shipping_postal_code, shipping_city, shipping_province]):
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="Tous les champs sont obligatoires."
-                ), 422
+                return render_form_error("Tous les champs sont obligatoires.")
 
             try:
                 product_id = int(product_id)
                 quantity = int(quantity)
             except ValueError:
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="Veuillez fournir un produit et une quantité valides."
-                ), 422
+                return render_form_error("Veuillez fournir un produit et une quantité valides.")
 
             if quantity < 1:
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="La quantité doit être supérieure ou égale à 1."
-                ), 422
+                return render_form_error("La quantité doit être supérieure ou égale à 1.")
 
             if shipping_province not in TAX_RATES:
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="La province sélectionnée est invalide."
-                ), 422
+                return render_form_error("La province sélectionnée est invalide.")
 
             try:
                 product = Product.get_by_id(product_id)
             except Product.DoesNotExist:
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="Le produit sélectionné est introuvable."
-                ), 404
+                return render_form_error("Le produit sélectionné est introuvable.", 404)
 
             if not product.in_stock:
-                return render_template(
-                    'order_form.html',
-                    products=products,
-                    error="Le produit sélectionné n'est pas en inventaire."
-                ), 422
+                return render_form_error("Le produit sélectionné n'est pas en inventaire.")
 
             total_price = product.price * quantity
             # Calcul du prix de livraison
@@ -801,7 +1998,7 @@ def create_app(test_config=None):
             except Exception:
                 total_price_tax = total_price
 
-            order = Order.create(
+            order = create_order_record(
                 product_id=product.id,
                 quantity=quantity,
                 total_price=total_price,
@@ -817,14 +2014,13 @@ def create_app(test_config=None):
 
             return redirect(url_for('ui_order_confirmation', order_id=order.id))
 
-        return render_template('order_form.html', products=products)
+        return render_catalog_page('order_form.html', lambda: {'products': get_catalog_products_by_name()})
 
     @app.route('/ui/order/<int:order_id>', methods=['GET', 'POST'])
     def ui_order_confirmation(order_id):
-        try:
-            order = Order.get_by_id(order_id)
-            product = Product.get_by_id(order.product_id)
-        except (Order.DoesNotExist, Product.DoesNotExist):
+        order = load_order(order_id)
+        product = Product.get_or_none(Product.id == order.product_id) if order is not None else None
+        if product is None:
             return "Commande introuvable.", 404
 
         payment_error = None
@@ -847,6 +2043,8 @@ def create_app(test_config=None):
 
             if error_payload.get('errors', {}).get('order', {}).get('code') == 'already-paid':
                 payment_error = "Cette commande est déjà payée."
+            elif error_payload.get('errors', {}).get('order', {}).get('code') == 'payment-pending':
+                payment_error = "Un paiement est déjà en cours pour cette commande."
             elif status_code == 422 and error_payload.get('errors', {}).get('credit_card', {}).get('code') == 'card-declined':
                 payment_error = "Paiement refusé : la carte de crédit a été refusée."
             elif status_code == 422:
@@ -866,10 +2064,9 @@ def create_app(test_config=None):
 
     @app.route('/ui/order/<int:order_id>/payment', methods=['GET', 'POST'])
     def ui_payment_form(order_id):
-        try:
-            order = Order.get_by_id(order_id)
-            product = Product.get_by_id(order.product_id)
-        except (Order.DoesNotExist, Product.DoesNotExist):
+        order = load_order(order_id)
+        product = Product.get_or_none(Product.id == order.product_id) if order is not None else None
+        if product is None:
             return "Commande introuvable.", 404
 
         if order.paid:
@@ -922,25 +2119,69 @@ def create_app(test_config=None):
     @app.cli.command('init-db')
     def init_db_command():
         """Clear existing data and create new tables."""
-        init_db()
+        init_db(app.config['PRODUCTS_URL'])
         print('Initialized the database.')
 
+    @app.cli.command('migrate-db')
+    def migrate_db_command():
+        """Apply pending schema migrations."""
+        db.connect(reuse_if_open=True)
+        try:
+            applied = create_schema(output=print)
+            print(f'Database schema at version {get_schema_version(db)} '
+                  f'({len(applied)} migrations applied).')
+        finally:
+            db.close()
+
+    if app.config['PRECOMPILE_TEMPLATES']:
+        precompile_templates(app.jinja_env)
+
+    @app.cli.command('compile-templates')
+    def compile_templates_command():
+        """Compile all templates into the bytecode cache."""
+        names = precompile_templates(app.jinja_env)
+        print(f'Compiled {len(names)} templates.')
+
+    @app.cli.command('build-images')
+    def build_images_command():
+        """Generate resized AVIF/WebP/JPEG variants of the product images."""
+        manifest = build_image_variants(images_dir)
+        print(f'Generated image variants for {len(manifest)} images.')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the product full-text search index from the Product table."""
+        db.connect(reuse_if_open=True)
+        try:
+            create_search_index()
+            ProductIndex.rebuild()
+            print('Rebuilt the product search index.')
+        finally:
+            db.close()
+
+    @app.cli.command('sync-products')
+    def sync_products_command():
+        """Synchronize the product catalog with the remote feed."""
+        changed = sync_products(catalog_syncer)
+        print(f'Synchronized the catalog ({changed} products changed).')
+
     return app
 
-def init_db():
+def init_db(products_url=PRODUCTS_URL):
     """Clear existing data and create new tables."""
     db.connect()
-    db.drop_tables([Product, Order], safe=True)
-    db.create_tables([Product, Order])
+    db.drop_tables([ProductIndex, Product, Order, IdempotencyKey], safe=True)
+    create_schema()
+    for database, model in zip(order_shards.databases, order_shards.models):
+        with database.connection_context():
+            model.drop_table(safe=True)
+    create_order_shard_schema()
+    catalog_cache.invalidate()
     
     # Fetch products from remote service and populate the database
     try:
-        products_data = fetch_products_from_remote()
-        
-        with db.atomic():
-            for product_data in products_data:
-                Product.create(**product_data)
-        print(f"Successfully fetched and stored {len(products_data)} products.")
+        count = import_products_from_remote(products_url)
+        print(f"Successfully fetched and stored {count} products.")
 
     except (urllib_error.URLError, TimeoutError, ValueError, json.JSONDecodeError) as e:
         print(f"Error fetching products: {e}")
@@ -0,0 +1,115 @@
+"""
+Empreintes de contenu des fichiers statiques : url_for('static', ...) produit
+styles.<hash>.css, servi avec un cache long et « immutable ».
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+from werkzeug.security import safe_join
+
+ASSET_MANIFEST_NAME = 'assets-manifest.json'
+
+# Un an : le nom du fichier change dès que son contenu change
+IMMUTABLE_MAX_AGE = 31536000
+
+HASH_LENGTH = 12
+
+_HASHED_NAME_RE = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % HASH_LENGTH)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(filename, digest):
+    directory, name = os.path.split(filename)
+    stem, ext = os.path.splitext(name)
+    return '/'.join(part for part in (directory, f"{stem}.{digest}{ext}") if part)
+
+
+class AssetManifest:
+    """Associe chaque fichier statique à son nom avec empreinte.
+
+    Le manifeste est lu depuis static/assets-manifest.json s'il a été généré
+    (flask build-assets) ; sinon les empreintes sont calculées à la demande puis
+    mémorisées. Avec auto_reload, une modification du fichier est détectée.
+    """
+
+    def __init__(self, static_folder, auto_reload=False):
+        self.static_folder = static_folder
+        self.auto_reload = auto_reload
+        self._names = {}
+        self._lock = threading.Lock()
+        try:
+            with open(os.path.join(static_folder, ASSET_MANIFEST_NAME), encoding='utf-8') as handle:
+                self._names = {filename: (None, name) for filename, name in json.load(handle).items()}
+        except (OSError, ValueError):
+            pass
+
+    def _path(self, filename):
+        # Chaîne vide (fichier inexistant) pour un chemin hors du dossier static
+        return safe_join(self.static_folder, filename) or ''
+
+    def _is_content_hashed(self, filename):
+        # Fichiers déjà nommés d'après leur contenu (ex. variantes d'images)
+        return _HASHED_NAME_RE.match(os.path.basename(filename)) is not None and os.path.isfile(self._path(filename))
+
+    def fingerprint(self, filename):
+        """Retourne le nom avec empreinte de filename (ou filename s'il n'existe pas)."""
+        cached = self._names.get(filename)
+        if cached is not None:
+            mtime, name = cached
+            if not self.auto_reload or mtime is None:
+                return name
+            try:
+                if os.path.getmtime(self._path(filename)) == mtime:
+                    return name
+            except OSError:
+                return filename
+
+        if self._is_content_hashed(filename):
+            return filename
+        path = self._path(filename)
+        try:
+            mtime = os.path.getmtime(path)
+            name = hashed_name(filename, file_digest(path))
+        except OSError:
+            return filename
+        with self._lock:
+            self._names[filename] = (mtime, name)
+        return name
+
+    def resolve(self, requested):
+        """Retourne (fichier à servir, immutable) pour un chemin demandé."""
+        if os.path.isfile(self._path(requested)):
+            return requested, self._is_content_hashed(requested)
+
+        directory, name = os.path.split(requested)
+        match = _HASHED_NAME_RE.match(name)
+        if match is None:
+            return requested, False
+        original = '/'.join(part for part in (directory, match['stem'] + match['ext']) if part)
+        # Une empreinte périmée sert le contenu courant, sans cache long
+        return original, self.fingerprint(original) == requested
+
+    def build(self, extensions=('.css', '.js', '.svg', '.ico', '.jpg', '.png', '.webp', '.avif')):
+        """Calcule toutes les empreintes et écrit le manifeste ; retourne son contenu."""
+        manifest = {}
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                filename = os.path.relpath(os.path.join(root, name), self.static_folder).replace(os.sep, '/')
+                if not name.endswith(extensions) or self._is_content_hashed(filename):
+                    continue
+                manifest[filename] = hashed_name(filename, file_digest(self._path(filename)))
+        with open(os.path.join(self.static_folder, ASSET_MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=1, sort_keys=True)
+        with self._lock:
+            self._names = {filename: (None, name) for filename, name in manifest.items()}
+        return manifest
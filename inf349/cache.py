@@ -0,0 +1,141 @@
+"""
+Cache LRU en mémoire, borné en nombre d'entrées, avec expiration optionnelle (TTL),
+et cache « write-through » des commandes sérialisées.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+
+    def __init__(self, maxsize=128, ttl=None, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize doit être supérieur ou égal à 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        # Sans effet sur les statistiques ni sur l'ordre LRU
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and (entry[1] is None or entry[1] > self.clock())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class OrderCache:
+    """Commandes sérialisées (serialize_order), indexées par id.
+
+    Chaque écriture d'une commande remplace son entrée (write-through) : un
+    lecteur du même processus ne voit jamais une version périmée. Une écriture
+    faite par un autre processus reste invisible jusqu'au TTL : le cache est
+    donc désactivé par défaut (ORDER_CACHE) et réservé aux déploiements à un
+    seul processus.
+    """
+
+    def __init__(self):
+        self.cache = None
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.cache is not None
+
+    def configure(self, enabled=True, maxsize=4096, ttl=None):
+        with self._lock:
+            self.cache = LRUCache(maxsize, ttl) if enabled else None
+            self.writes = 0
+
+    def __contains__(self, order_id):
+        cache = self.cache
+        return cache is not None and order_id in cache
+
+    def get(self, order_id, loader):
+        """Retourne la commande sérialisée, en appelant loader() si elle n'est pas en cache."""
+        cache = self.cache
+        if cache is None:
+            return loader()
+        payload = cache.get(order_id)
+        if payload is not None:
+            return payload
+
+        writes = self.writes
+        payload = loader()
+        if payload is not None:
+            with self._lock:
+                # Une écriture pendant le chargement a pu rendre le résultat périmé
+                if writes == self.writes:
+                    cache.set(order_id, payload)
+        return payload
+
+    def put(self, order_id, payload):
+        cache = self.cache
+        if cache is None:
+            return
+        with self._lock:
+            self.writes += 1
+            cache.set(order_id, payload)
+
+    def discard(self, order_id):
+        cache = self.cache
+        if cache is None:
+            return
+        with self._lock:
+            self.writes += 1
+            cache.delete(order_id)
+
+    def stats(self):
+        return self.cache.stats() if self.cache is not None else None
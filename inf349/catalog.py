@@ -0,0 +1,254 @@
+"""
+Cache en mémoire du catalogue de produits, versionné et invalidé explicitement
+à chaque écriture dans la table Product, et paramètres de pagination par curseur.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import math
+import threading
+
+import brotli
+
+
+# Pagination de /api/products
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CATALOG_SORT_OPTIONS = ('id', 'price', '-price', 'weight', '-weight')
+# Types JSON acceptés pour la valeur de tri d'un curseur, selon la colonne triée
+# (les curseurs de GET /orders n'ont pas de valeur : None)
+CURSOR_VALUE_TYPES = {
+    'id': (int, type(None)),
+    'price': (int, float),
+    'weight': (int,),
+}
+CATALOG_QUERY_PARAMS = {
+    'limit', 'cursor', 'sort', 'in_stock',
+    'min_price', 'max_price', 'min_weight', 'max_weight',
+}
+
+
+# Niveaux de compression par défaut : proches du maximum en taille, bien plus rapides
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+
+
+class EncodedCatalog:
+    """Réponse JSON du catalogue, encodée une seule fois par version.
+
+    Chaque codage (identité, gzip, br) a son propre ETag fort : deux corps
+    différents ne partagent jamais un validateur (RFC 9110, section 8.8.3).
+    Les variantes compressées sont calculées à la première demande, une seule
+    fois même si plusieurs requêtes la demandent en même temps.
+    """
+
+    def __init__(self, version, body, gzip_level=DEFAULT_GZIP_LEVEL, brotli_quality=DEFAULT_BROTLI_QUALITY):
+        self.version = version
+        self.body = body
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.etags = {None: self.etag, 'gzip': f"{self.etag}-gzip", 'br': f"{self.etag}-br"}
+        self._compressed = {}
+        self._lock = threading.Lock()
+
+    def body_for(self, accept_encodings):
+        """Choisit la variante acceptée par le client ; retourne (corps, codage)."""
+        if accept_encodings.quality('br') > 0:
+            return self.compressed('br'), 'br'
+        if accept_encodings.quality('gzip') > 0:
+            return self.compressed('gzip'), 'gzip'
+        return self.body, None
+
+    def compressed(self, encoding):
+        """Corps compressé avec encoding ('gzip' ou 'br'), calculé au premier appel."""
+        with self._lock:
+            body = self._compressed.get(encoding)
+            if body is None:
+                if encoding == 'br':
+                    body = brotli.compress(self.body, quality=self.brotli_quality)
+                else:
+                    body = gzip.compress(self.body, compresslevel=self.gzip_level, mtime=0)
+                self._compressed[encoding] = body
+            return body
+
+    def matches(self, if_none_match):
+        """Vrai si If-None-Match contient l'ETag d'une des variantes de cette version."""
+        return any(if_none_match.contains_weak(etag) for etag in self.etags.values())
+
+
+class CatalogCache:
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.gzip_level = DEFAULT_GZIP_LEVEL
+        self.brotli_quality = DEFAULT_BROTLI_QUALITY
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._products = None
+        self._encoded = None
+        # Encodage en cours (Event) : les requêtes concurrentes attendent son résultat
+        self._encoding = None
+        self._lock = threading.Lock()
+
+    def get(self, loader):
+        """Retourne la liste des produits, en appelant loader() si le cache est vide."""
+        if not self.enabled:
+            self.misses += 1
+            return loader()
+
+        with self._lock:
+            if self._products is not None:
+                self.hits += 1
+                return self._products
+            version = self.version
+
+        products = loader()
+
+        with self._lock:
+            self.misses += 1
+            # Une invalidation pendant le chargement rend le résultat périmé
+            if version == self.version:
+                self._products = products
+        return products
+
+    def get_encoded(self, loader, encoder):
+        """Retourne le catalogue encodé (EncodedCatalog) pour la version courante.
+
+        Après une invalidation, une seule requête encode le catalogue ; les
+        autres attendent son résultat au lieu de l'encoder chacune.
+        """
+        if not self.enabled:
+            return self._encode(self.version, loader, encoder)
+
+        while True:
+            with self._lock:
+                if self._encoded is not None:
+                    self.hits += 1
+                    return self._encoded
+                encoding = self._encoding
+                if encoding is None:
+                    encoding = self._encoding = threading.Event()
+                    version = self.version
+                    break
+            encoding.wait()
+
+        try:
+            encoded = self._encode(version, loader, encoder)
+            with self._lock:
+                if version == self.version:
+                    self._encoded = encoded
+        finally:
+            with self._lock:
+                self._encoding = None
+            encoding.set()
+        return encoded
+
+    def _encode(self, version, loader, encoder):
+        return EncodedCatalog(
+            version, encoder(self.get(loader)),
+            gzip_level=self.gzip_level, brotli_quality=self.brotli_quality,
+        )
+
+    def is_warm(self):
+        return self.enabled and self._products is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._products = None
+            self._encoded = None
+            self.version += 1
+
+    def reset(self, enabled=True, gzip_level=DEFAULT_GZIP_LEVEL, brotli_quality=DEFAULT_BROTLI_QUALITY):
+        with self._lock:
+            self.enabled = enabled
+            self.gzip_level = gzip_level
+            self.brotli_quality = brotli_quality
+            self._products = None
+            self._encoded = None
+            self.version += 1
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def encode_cursor(sort, value, last_id):
+    raw = json.dumps([sort, value, last_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """Retourne (valeur, id) du dernier produit de la page précédente."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError):
+        raise ValueError("Curseur invalide")
+    if cursor_sort != sort or not _is_int(last_id):
+        raise ValueError("Curseur invalide")
+    # La valeur va telle quelle dans la requête SQL : liste, objet ou type inattendu refusés
+    value_types = CURSOR_VALUE_TYPES[sort.lstrip('-')]
+    if isinstance(value, bool) or not isinstance(value, value_types):
+        raise ValueError("Curseur invalide")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError("Curseur invalide")
+    return value, last_id
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_bool(value):
+    normalized = value.strip().lower()
+    if normalized in {'1', 'true'}:
+        return True
+    if normalized in {'0', 'false'}:
+        return False
+    raise ValueError(f"Booléen invalide: {value}")
+
+
+def _parse_number(value):
+    if value is None:
+        return None
+    number = float(value)
+    if number != number:  # NaN
+        raise ValueError("Nombre invalide")
+    return number
+
+
+def is_paginated_catalog_query(args):
+    return any(key in args for key in CATALOG_QUERY_PARAMS)
+
+
+def parse_catalog_query(args):
+    """Valide les paramètres de pagination et de filtre, lève ValueError sinon."""
+    sort = args.get('sort', 'id')
+    if sort not in CATALOG_SORT_OPTIONS:
+        raise ValueError(f"Tri invalide: {sort}")
+
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"La limite doit être entre 1 et {MAX_PAGE_SIZE}")
+
+    in_stock = args.get('in_stock')
+    cursor = args.get('cursor')
+    return {
+        'sort': sort,
+        'limit': limit,
+        'cursor': decode_cursor(cursor, sort) if cursor else None,
+        'in_stock': parse_bool(in_stock) if in_stock is not None else None,
+        'min_price': _parse_number(args.get('min_price')),
+        'max_price': _parse_number(args.get('max_price')),
+        'min_weight': _parse_number(args.get('min_weight')),
+        'max_weight': _parse_number(args.get('max_weight')),
+    }
@@ -0,0 +1,84 @@
+"""
+Connexions SQLite : pragmas de performance et pool de connexions instrumenté
+(playhouse.pool).
+"""
+import threading
+import time
+
+from peewee import SqliteDatabase
+from playhouse.pool import MaxConnectionsExceeded, PooledSqliteDatabase
+
+# Pragmas appliqués à chaque nouvelle connexion :
+# - journal WAL : les lectures ne bloquent plus les écritures (et inversement) ;
+# - synchronous=normal : sûr en WAL, sans fsync à chaque commit ;
+# - mmap_size (256 Mo) et cache_size (négatif = en Kio, ici 64 Mo) : moins d'appels read() ;
+# - busy_timeout (ms) : un écrivain attend le verrou au lieu d'échouer avec « database is locked ».
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 268435456,
+    'cache_size': -65536,
+    'busy_timeout': 5000,
+}
+
+
+class InstrumentedPooledSqliteDatabase(PooledSqliteDatabase):
+    """Pool de connexions SQLite qui compte les emprunts et les attentes.
+
+    Une attente survient lorsque les max_connections connexions sont déjà
+    empruntées : connect() patiente alors jusqu'à `timeout` secondes.
+    """
+
+    def __init__(self, database, **kwargs):
+        # Une connexion du pool peut être réutilisée par un autre thread
+        kwargs.setdefault('check_same_thread', False)
+        super().__init__(database, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self._waiting = threading.local()
+        self._stats_lock = threading.Lock()
+
+    def connect(self, reuse_if_open=False):
+        self._waiting.flag = False
+        started_at = time.monotonic()
+        try:
+            return super().connect(reuse_if_open)
+        except MaxConnectionsExceeded:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            if self._waiting.flag:
+                with self._stats_lock:
+                    self.waits += 1
+                    self.wait_time += time.monotonic() - started_at
+
+    def _connect(self):
+        try:
+            conn = super()._connect()
+        except MaxConnectionsExceeded:
+            self._waiting.flag = True
+            raise
+        self.checkouts += 1
+        return conn
+
+    def pool_stats(self):
+        return {
+            "max_connections": self._max_connections,
+            "checked_out": len(self._in_use),
+            "idle": len(self._connections),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "wait_time_ms": round(self.wait_time * 1000, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+def create_database(path, pragmas=None, pool=False, **pool_options):
+    """Construit la base SQLite de l'application (simple ou avec pool de connexions)."""
+    pragmas = DEFAULT_SQLITE_PRAGMAS if pragmas is None else pragmas
+    if pool:
+        return InstrumentedPooledSqliteDatabase(path, pragmas=pragmas, **pool_options)
+    return SqliteDatabase(path, pragmas=pragmas)
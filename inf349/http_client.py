@@ -0,0 +1,248 @@
+"""
+Client HTTP avec connexions persistantes (keep-alive), regroupées par hôte.
+
+Chaque appel réutilise une connexion TCP (et TLS) déjà ouverte vers le même
+hôte au lieu d'en ouvrir une nouvelle : pas de résolution DNS ni de poignée de
+main par requête. Les erreurs réseau sont levées en URLError (ou TimeoutError),
+comme avec urllib ; un échec de connexion lève ConnectError (sous-classe de
+URLError), qui garantit que la requête n'est pas partie.
+
+request() lit toute la réponse ; stream() la donne à lire en continu (flux de
+produits), sur les mêmes connexions.
+"""
+import contextlib
+import http.client
+import select
+import socket
+import threading
+import time
+from collections import deque
+from urllib import error as urllib_error
+from urllib.parse import urlsplit
+
+from inf349.resilience import percentile
+
+# Latences conservées par hôte pour les percentiles
+LATENCY_SAMPLES = 1024
+
+# Erreurs d'une connexion réutilisée que le serveur a fermée entre deux requêtes
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class ConnectError(urllib_error.URLError):
+    """Échec de la connexion (DNS, refus, délai, TLS) : la requête n'a pas été envoyée."""
+
+
+def is_connect_failure(exc):
+    """Vrai si exc montre que la requête n'a jamais atteint le serveur."""
+    if isinstance(exc, ConnectError):
+        return True
+    return isinstance(exc, urllib_error.URLError) and isinstance(
+        exc.reason, (ConnectionRefusedError, socket.gaierror)
+    )
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def as_dict(self):
+        latencies = list(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+                "p50": round(percentile(latencies, 0.5) * 1000, 3) if latencies else None,
+                "p99": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+            },
+        }
+
+
+class HTTPResult:
+    """Réponse lue entièrement : statut, en-têtes et corps (bytes)."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class HTTPClient:
+    """Pools de connexions http.client par hôte (schéma, hôte, port).
+
+    Au plus pool_size connexions inactives sont conservées par hôte ; au-delà,
+    les connexions sont fermées après usage. Une connexion inactive depuis plus
+    de idle_timeout secondes, ou fermée par le serveur, n'est pas réutilisée.
+    """
+
+    def __init__(self, pool_size=4, idle_timeout=30, user_agent='inf349-app/1.0'):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.user_agent = user_agent
+        self._idle = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def configure(self, pool_size=4, idle_timeout=30):
+        self.close()
+        with self._lock:
+            self.pool_size = pool_size
+            self.idle_timeout = idle_timeout
+            self._stats = {}
+
+    def _key(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise urllib_error.URLError(f"URL non prise en charge: {url}")
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return (parts.scheme, parts.hostname, port), path
+
+    def _host_stats(self, key):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = HostStats()
+        return stats
+
+    def _acquire(self, key, timeout):
+        """Retourne (connexion, réutilisée)."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                connection, released_at = idle.pop()
+                if now - released_at <= self.idle_timeout and not self._is_dropped(connection):
+                    connection.timeout = timeout
+                    if connection.sock is not None:
+                        connection.sock.settimeout(timeout)
+                    self._host_stats(key).connections_reused += 1
+                    return connection, True
+                connection.close()
+            self._host_stats(key).connections_opened += 1
+
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(host, port, timeout=timeout), False
+
+    @staticmethod
+    def _is_dropped(connection):
+        # Une connexion inactive lisible a été fermée (ou a reçu des données inattendues)
+        if connection.sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([connection.sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _release(self, key, connection, response):
+        if response.will_close:
+            connection.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=10):
+        """Exécute la requête et lit toute la réponse ; retourne un HTTPResult."""
+        with self.stream(method, url, body=body, headers=headers, timeout=timeout) as response:
+            return HTTPResult(response.status, response.headers, response.read())
+
+    @contextlib.contextmanager
+    def stream(self, method, url, body=None, headers=None, timeout=10):
+        """Envoie la requête et donne la réponse (http.client.HTTPResponse) à lire en continu.
+
+        La connexion retourne au pool si le corps a été lu jusqu'au bout, sinon
+        elle est fermée. Les erreurs de lecture du corps sont levées en URLError.
+        """
+        key, path = self._key(url)
+        request_headers = {'User-Agent': self.user_agent, 'Connection': 'keep-alive'}
+        if headers:
+            request_headers.update(headers)
+
+        started_at = time.perf_counter()
+        try:
+            connection, response = self._open(key, method, path, body, request_headers, timeout)
+            try:
+                yield response
+            except (urllib_error.URLError, TimeoutError):
+                connection.close()
+                raise
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                raise urllib_error.URLError(exc)
+            except BaseException:
+                connection.close()
+                raise
+            if response.isclosed():
+                self._release(key, connection, response)
+            else:
+                connection.close()
+        except (urllib_error.URLError, TimeoutError):
+            with self._lock:
+                self._host_stats(key).errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            with self._lock:
+                stats = self._host_stats(key)
+                stats.requests += 1
+                stats.latencies.append(elapsed)
+
+    def _open(self, key, method, path, body, headers, timeout):
+        """Envoie la requête ; retourne (connexion, réponse) dès la réception des en-têtes."""
+        while True:
+            connection, reused = self._acquire(key, timeout)
+            if connection.sock is None:
+                try:
+                    connection.connect()
+                except OSError as exc:
+                    connection.close()
+                    raise ConnectError(exc)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                return connection, connection.getresponse()
+            except _STALE_CONNECTION_ERRORS as exc:
+                connection.close()
+                # Connexion réutilisée fermée par le serveur : nouvel essai sur une
+                # connexion neuve, seulement pour une requête sans effet de bord
+                if reused and method in ('GET', 'HEAD'):
+                    continue
+                raise urllib_error.URLError(exc)
+            except TimeoutError:
+                connection.close()
+                raise
+            except (OSError, http.client.HTTPException) as exc:
+                connection.close()
+                raise urllib_error.URLError(exc)
+
+    def close(self):
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle = {}
+        for idle in pools:
+            for connection, _ in idle:
+                connection.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pool_size": self.pool_size,
+                "idle_connections": sum(len(idle) for idle in self._idle.values()),
+                "hosts": {
+                    f"{scheme}://{host}:{port}": stats.as_dict()
+                    for (scheme, host, port), stats in self._stats.items()
+                },
+            }
@@ -0,0 +1,214 @@
+"""
+Clés d'idempotence (en-tête Idempotency-Key) : la première requête portant une
+clé est exécutée et sa réponse est enregistrée avec l'empreinte de la requête ;
+les requêtes suivantes avec la même clé reçoivent cette réponse sans être
+exécutées de nouveau.
+
+Une requête concurrente avec la même clé attend la fin de la première (Event
+dans le même processus, lecture périodique de la base entre processus). Les
+réponses 5xx ne sont pas enregistrées : la requête pourra être réessayée. Une
+réservation sans réponse plus ancienne que le bail (lease, durée maximale d'une
+requête) est abandonnée (processus arrêté pendant la requête) : la clé peut
+être réservée de nouveau. La réponse n'est enregistrée que si la réservation
+appartient toujours à la requête (même created_at).
+
+Les clés expirées sont supprimées au plus toutes les purge_interval secondes,
+lors d'une requête portant une clé.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from peewee import IntegrityError
+
+logger = logging.getLogger('inf349.idempotency')
+
+MAX_KEY_LENGTH = 255
+
+# En-têtes de la réponse rejoués avec elle
+REPLAYED_HEADERS = ('Location',)
+
+
+class IdempotencyKeyReused(Exception):
+    """La clé a déjà servi pour une requête différente."""
+
+
+class IdempotencyKeyInProgress(Exception):
+    """Une requête avec la même clé est encore en cours après le délai d'attente."""
+
+
+def request_fingerprint(method, path, payload):
+    """Empreinte SHA-256 de la méthode, du chemin et du corps JSON (clés triées)."""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(f"{method} {path}\n{body}".encode('utf-8')).hexdigest()
+
+
+class StoredResponse:
+    def __init__(self, status_code, body, headers, replayed):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+        self.replayed = replayed
+
+
+class IdempotencyStore:
+    """Réponses enregistrées par clé dans `model` (clé, empreinte, statut, corps, en-têtes)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.ttl = timedelta(hours=24)
+        self.wait_timeout = 30
+        self.lease = timedelta(seconds=120)
+        self.purge_interval = 60
+        self.poll_interval = 0.05
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.conflicts = 0
+        self.purged = 0
+        self._next_purge = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def configure(self, ttl=86400, wait_timeout=30, lease=120, purge_interval=60):
+        with self._lock:
+            self.ttl = timedelta(seconds=ttl)
+            self.wait_timeout = wait_timeout
+            self.lease = timedelta(seconds=lease)
+            self.purge_interval = purge_interval
+            self.executed = self.replayed = self.waited = self.conflicts = self.purged = 0
+            self._next_purge = 0
+
+    def execute(self, key, fingerprint, handler):
+        """Exécute handler() une seule fois par clé ; retourne un StoredResponse.
+
+        handler() retourne (statut, corps, en-têtes). Lève IdempotencyKeyReused
+        ou IdempotencyKeyInProgress.
+        """
+        self._purge_if_due()
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            with self._lock:
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = self._in_flight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+                    self.waited += 1
+
+            if not owner:
+                # Même clé en cours dans ce processus : on attend sa réponse
+                if not event.wait(max(deadline - time.monotonic(), 0)):
+                    raise self._conflict(IdempotencyKeyInProgress(key))
+                continue
+
+            try:
+                stored, reserved_at = self._claim(key, fingerprint, deadline)
+                if stored is not None:
+                    return stored
+                return self._run(key, reserved_at, handler)
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                event.set()
+
+    def _claim(self, key, fingerprint, deadline):
+        """Réserve la clé ; retourne (réponse enregistrée, None) ou (None, created_at de la réservation)."""
+        while True:
+            row = self.model.get_or_none(self.model.key == key)
+            now = datetime.utcnow()
+            if row is not None and row.created_at < now - self.ttl:
+                row.delete_instance()
+                row = None
+            elif row is not None and row.status_code is None and self._release_abandoned(row, now):
+                row = None
+
+            if row is None:
+                try:
+                    return None, self.model.create(key=key, fingerprint=fingerprint, created_at=now).created_at
+                except IntegrityError:
+                    # Réservée entre-temps par un autre processus
+                    continue
+
+            if row.fingerprint != fingerprint:
+                raise self._conflict(IdempotencyKeyReused(key))
+            if row.status_code is not None:
+                with self._lock:
+                    self.replayed += 1
+                return StoredResponse(row.status_code, row.response_body, json.loads(row.response_headers), True), None
+
+            # En cours dans un autre processus
+            if time.monotonic() >= deadline:
+                raise self._conflict(IdempotencyKeyInProgress(key))
+            time.sleep(self.poll_interval)
+
+    def _release_abandoned(self, row, now):
+        """Supprime la réservation de row si elle dépasse le bail ; retourne True si supprimée."""
+        expired = now - self.lease
+        if row.created_at >= expired:
+            return False
+        # Suppression conditionnelle : un seul processus reprend la clé
+        self.model.delete().where(
+            (self.model.key == row.key)
+            & self.model.status_code.is_null()
+            & (self.model.created_at < expired)
+        ).execute()
+        return True
+
+    def _run(self, key, reserved_at, handler):
+        # Seule la réservation de cette requête est modifiée : si elle a été
+        # reprise après le bail, la ligne de l'autre requête est conservée
+        owned = (self.model.key == key) & (self.model.created_at == reserved_at)
+        try:
+            status_code, body, headers = handler()
+        except Exception:
+            self.model.delete().where(owned).execute()
+            raise
+
+        if status_code >= 500:
+            self.model.delete().where(owned).execute()
+        else:
+            updated = self.model.update(
+                status_code=status_code,
+                response_body=body,
+                response_headers=json.dumps({name: headers[name] for name in REPLAYED_HEADERS if name in headers}),
+            ).where(owned).execute()
+            if not updated:
+                logger.warning('Idempotency key %r was taken over after its lease, response not stored', key)
+        with self._lock:
+            self.executed += 1
+        return StoredResponse(status_code, body, headers, False)
+
+    def _purge_if_due(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+        self.purge()
+
+    def purge(self):
+        """Supprime les clés expirées (plus anciennes que ttl) ; retourne leur nombre."""
+        count = self.model.delete().where(self.model.created_at < datetime.utcnow() - self.ttl).execute()
+        with self._lock:
+            self.purged += count
+        return count
+
+    def _conflict(self, exc):
+        with self._lock:
+            self.conflicts += 1
+        return exc
+
+    def stats(self):
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "conflicts": self.conflicts,
+            "purged": self.purged,
+            "in_flight": len(self._in_flight),
+        }
@@ -0,0 +1,153 @@
+"""
+Pipeline d'images responsive : génération de miniatures (AVIF, WebP, JPEG) aux
+noms dérivés du contenu, et balise <picture> avec srcset/sizes pour les templates.
+"""
+import hashlib
+import json
+import os
+import threading
+from io import BytesIO
+
+from markupsafe import Markup, escape
+
+# Largeurs générées (px) ; une largeur supérieure à l'original est ignorée
+IMAGE_WIDTHS = (160, 320, 480, 640)
+
+# Formats, du plus compact au plus compatible ; le dernier sert de repli pour <img>
+IMAGE_FORMATS = ('avif', 'webp', 'jpeg')
+
+IMAGE_QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80}
+
+IMAGE_MIMETYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+IMAGE_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+# Largeur d'affichage d'une carte produit (grille de 3, 2 puis 1 colonne, conteneur de 1100px)
+PRODUCT_IMAGE_SIZES = '(max-width: 640px) 100vw, (max-width: 960px) 50vw, 350px'
+
+VARIANTS_DIR = 'variants'
+MANIFEST_NAME = 'manifest.json'
+
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def _encode(image, image_format):
+    output = BytesIO()
+    options = {'quality': IMAGE_QUALITY[image_format]}
+    if image_format == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif image_format == 'webp':
+        options['method'] = 6
+    image.save(output, format=image_format.upper(), **options)
+    return output.getvalue()
+
+
+def build_image_variants(source_dir, widths=IMAGE_WIDTHS, formats=IMAGE_FORMATS, output=print):
+    """Génère les variantes de chaque image de source_dir dans source_dir/variants.
+
+    Chaque fichier est nommé d'après le hash de son contenu (ex. 3-320w.1a2b3c4d5e6f.webp),
+    ce qui permet de le servir avec un cache « immutable ». Les variantes obsolètes
+    sont supprimées et le manifeste est réécrit. Retourne le manifeste.
+    """
+    try:
+        from PIL import Image, features
+    except ImportError:
+        raise RuntimeError("Pillow est requis pour générer les images (pip install Pillow)")
+
+    # AVIF et WebP dépendent des bibliothèques avec lesquelles Pillow a été compilé
+    formats = [image_format for image_format in formats if image_format == 'jpeg' or features.check(image_format)]
+
+    output_dir = os.path.join(source_dir, VARIANTS_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {}
+    written = set()
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        stem = os.path.splitext(filename)[0]
+        with Image.open(os.path.join(source_dir, filename)) as original:
+            original = original.convert('RGB')
+            entry = {'width': original.width, 'height': original.height, 'variants': {}}
+            targets = [width for width in widths if width < original.width] + [original.width]
+            for width in sorted(set(targets)):
+                height = round(original.height * width / original.width)
+                resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+                for image_format in formats:
+                    data = _encode(resized, image_format)
+                    digest = hashlib.sha256(data).hexdigest()[:12]
+                    name = f"{stem}-{width}w.{digest}.{IMAGE_EXTENSIONS[image_format]}"
+                    path = os.path.join(output_dir, name)
+                    if not os.path.exists(path):
+                        with open(path, 'wb') as handle:
+                            handle.write(data)
+                    written.add(name)
+                    entry['variants'].setdefault(image_format, []).append([width, f"{VARIANTS_DIR}/{name}"])
+        manifest[filename] = entry
+        output(f"Generated variants for {filename}")
+
+    for name in os.listdir(output_dir):
+        if name != MANIFEST_NAME and name not in written:
+            os.remove(os.path.join(output_dir, name))
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as handle:
+        json.dump(manifest, handle, indent=1, sort_keys=True)
+    return manifest
+
+
+class ImageManifest:
+    """Manifeste des variantes générées, chargé une seule fois (paresseusement)."""
+
+    def __init__(self, images_dir):
+        self.path = os.path.join(images_dir, VARIANTS_DIR, MANIFEST_NAME)
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    try:
+                        with open(self.path, encoding='utf-8') as handle:
+                            self._entries = json.load(handle)
+                    except (OSError, ValueError):
+                        self._entries = {}
+        return self._entries
+
+    def get(self, filename):
+        return self.entries.get(filename)
+
+
+def render_responsive_image(manifest, url_for_image, filename, alt, sizes=PRODUCT_IMAGE_SIZES, lazy=True):
+    """Construit une balise <picture> (ou <img> si l'image n'a pas de variantes).
+
+    url_for_image(path) retourne l'URL d'un fichier relatif au dossier des images.
+    """
+    loading = 'lazy' if lazy else 'eager'
+    entry = manifest.get(filename)
+    if entry is None:
+        return Markup('<img src="{}" alt="{}" loading="{}" decoding="async">').format(
+            url_for_image(filename), alt, loading
+        )
+
+    def srcset(image_format):
+        return ', '.join(f"{url_for_image(path)} {width}w" for width, path in entry['variants'][image_format])
+
+    formats = [image_format for image_format in IMAGE_FORMATS if image_format in entry['variants']]
+    fallback = formats[-1]
+    fallback_src = url_for_image(entry['variants'][fallback][-1][1])
+
+    parts = ['<picture>']
+    for image_format in formats[:-1]:
+        parts.append(
+            f'<source type="{IMAGE_MIMETYPES[image_format]}" srcset="{escape(srcset(image_format))}" '
+            f'sizes="{escape(sizes)}">'
+        )
+    parts.append(
+        f'<img src="{escape(fallback_src)}" srcset="{escape(srcset(fallback))}" sizes="{escape(sizes)}" '
+        f'width="{entry["width"]}" height="{entry["height"]}" alt="{escape(alt)}" '
+        f'loading="{loading}" decoding="async">'
+    )
+    parts.append('</picture>')
+    return Markup(''.join(parts))
@@ -0,0 +1,130 @@
+"""
+Import en continu du flux de produits : analyse JSON incrémentale et découpage
+en lots pour des insertions groupées (insert_many).
+"""
+import codecs
+import json
+import time
+from itertools import islice
+
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _StreamBuffer:
+    """Tampon de texte alimenté au fur et à mesure depuis un flux binaire."""
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            self.text = self.text[self.pos:] + self.decoder.decode(b'', final=True)
+        else:
+            self.text = self.text[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Retourne le prochain caractère significatif (sans le consommer)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError("Fin inattendue du flux JSON")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Caractère '{char}' attendu dans le flux JSON")
+        self.pos += 1
+
+    def decode_value(self, decoder):
+        """Décode la prochaine valeur JSON complète, en lisant davantage au besoin."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Un nombre en fin de tampon peut être tronqué : on relit pour confirmer
+            if end == len(self.text) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(stream, key, read_size=READ_SIZE):
+    """Itère sur les éléments du tableau `key` d'un objet JSON, sans charger tout le flux.
+
+    Les autres clés de l'objet racine sont décodées puis ignorées.
+    """
+    buffer = _StreamBuffer(stream, read_size)
+    decoder = json.JSONDecoder()
+
+    buffer.expect('{')
+    if buffer.peek() == '}':
+        return
+    while True:
+        name = buffer.decode_value(decoder)
+        buffer.expect(':')
+        if name == key:
+            buffer.expect('[')
+            if buffer.peek() == ']':
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.decode_value(decoder)
+                    if buffer.peek() == ',':
+                        buffer.pos += 1
+                        continue
+                    buffer.expect(']')
+                    break
+        else:
+            buffer.decode_value(decoder)
+
+        if buffer.peek() == ',':
+            buffer.pos += 1
+            continue
+        buffer.expect('}')
+        return
+
+
+def chunked(iterable, size):
+    """Découpe un itérable en listes d'au plus `size` éléments."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class ImportProgress:
+    """Affiche l'avancement d'un import (nombre de produits et débit)."""
+
+    def __init__(self, label='products', output=print):
+        self.label = label
+        self.output = output
+        self.count = 0
+        self.started_at = time.perf_counter()
+
+    def __call__(self, batch_size):
+        self.count += batch_size
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.count / elapsed if elapsed > 0 else 0
+        self.output(f"Imported {self.count} {self.label} ({rate:.0f}/s)")
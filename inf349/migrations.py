@@ -0,0 +1,124 @@
+"""
+Migrations versionnées du schéma (playhouse.migrate).
+
+La version du schéma est stockée dans PRAGMA user_version. Chaque migration est
+appliquée dans une transaction avec la nouvelle version ; elle ne modifie que
+les tables existantes et ignore ce qui est déjà en place, si bien qu'une base
+neuve créée par create_tables() passe directement à la dernière version.
+"""
+from peewee import CharField, DateTimeField, TextField
+from playhouse.migrate import SqliteMigrator, make_index_name, migrate
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Déclare une migration ; les versions doivent être consécutives."""
+    def register(function):
+        expected = len(MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"Version de migration {version} inattendue (attendue : {expected})")
+        MIGRATIONS.append((version, description, function))
+        return function
+    return register
+
+
+def latest_version(migrations=None):
+    migrations = MIGRATIONS if migrations is None else migrations
+    return migrations[-1][0] if migrations else 0
+
+
+def get_schema_version(database):
+    return database.execute_sql('PRAGMA user_version').fetchone()[0]
+
+
+def set_schema_version(database, version):
+    database.execute_sql(f'PRAGMA user_version = {int(version)}')
+
+
+def add_index_if_missing(migrator, database, table, columns, unique=False):
+    if not database.table_exists(table):
+        return
+    name = make_index_name(table, columns)
+    if name not in {index.name for index in database.get_indexes(table)}:
+        migrate(migrator.add_index(table, columns, unique))
+
+
+def add_column_if_missing(migrator, database, table, column, field):
+    if not database.table_exists(table):
+        return
+    if column not in {info.name for info in database.get_columns(table)}:
+        migrate(migrator.add_column(table, column, field))
+
+
+def migrate_database(database, migrations=None, output=None):
+    """Applique les migrations en attente ; retourne la liste des versions appliquées."""
+    migrations = MIGRATIONS if migrations is None else migrations
+    migrator = SqliteMigrator(database)
+    current = get_schema_version(database)
+    applied = []
+    for version, description, function in migrations:
+        if version <= current:
+            continue
+        with database.atomic():
+            function(migrator, database)
+            set_schema_version(database, version)
+        applied.append(version)
+        if output is not None:
+            output(f"Applied migration {version}: {description}")
+    return applied
+
+
+# Recherches de support et de rapprochement des paiements
+ORDER_INDEXES = (
+    ('product_id',),
+    ('email',),
+    ('paid',),
+    ('transaction_id',),
+)
+
+
+@migration(1, "index de la table order (product_id, email, paid, transaction_id)")
+def add_order_indexes(migrator, database):
+    for columns in ORDER_INDEXES:
+        add_index_if_missing(migrator, database, 'order', columns)
+
+
+# Filtre par date de l'export des commandes
+ORDER_CREATED_AT_INDEX = ('created_at',)
+
+
+@migration(2, "colonne order.created_at et son index")
+def add_order_created_at(migrator, database):
+    # Les commandes existantes gardent une date nulle
+    add_column_if_missing(migrator, database, 'order', 'created_at', DateTimeField(null=True))
+    add_index_if_missing(migrator, database, 'order', ORDER_CREATED_AT_INDEX)
+
+
+# Filtre par province de GET /orders
+ORDER_PROVINCE_INDEX = ('shipping_province',)
+
+
+@migration(3, "index de order.shipping_province")
+def add_order_province_index(migrator, database):
+    add_index_if_missing(migrator, database, 'order', ORDER_PROVINCE_INDEX)
+
+
+@migration(4, "colonnes order.payment_status et order.payment_error (paiements asynchrones)")
+def add_order_payment_status(migrator, database):
+    add_column_if_missing(migrator, database, 'order', 'payment_status', CharField(null=True))
+    add_column_if_missing(migrator, database, 'order', 'payment_error', TextField(null=True))
+
+
+@migration(5, "colonne order.payment_claimed_at (bail des paiements pending)")
+def add_order_payment_claimed_at(migrator, database):
+    add_column_if_missing(migrator, database, 'order', 'payment_claimed_at', DateTimeField(null=True))
+
+
+# Purge des clés d'idempotence expirées
+IDEMPOTENCY_KEY_CREATED_AT_INDEX = ('created_at',)
+
+
+@migration(6, "index de idempotency_key.created_at (purge des clés expirées)")
+def add_idempotency_key_created_at_index(migrator, database):
+    add_index_if_missing(migrator, database, 'idempotency_key', IDEMPOTENCY_KEY_CREATED_AT_INDEX)
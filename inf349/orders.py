@@ -0,0 +1,185 @@
+"""
+Export et liste des commandes : paramètres de filtre, sérialisation en continu
+(NDJSON ou CSV) avec la structure de serialize_order, et sérialisation compacte
+des lignes (tuples) de GET /orders.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from inf349.catalog import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, parse_bool
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Lignes regroupées par morceau envoyé au client
+EXPORT_CHUNK_ROWS = 500
+
+# Colonnes CSV : chemin du champ dans le dictionnaire de serialize_order
+ORDER_EXPORT_COLUMNS = (
+    ('id', ('id',)),
+    ('created_at', ('created_at',)),
+    ('product_id', ('product', 'id')),
+    ('quantity', ('product', 'quantity')),
+    ('total_price', ('total_price',)),
+    ('total_price_tax', ('total_price_tax',)),
+    ('shipping_price', ('shipping_price',)),
+    ('paid', ('paid',)),
+    ('email', ('email',)),
+    ('shipping_country', ('shipping_information', 'country')),
+    ('shipping_address', ('shipping_information', 'address')),
+    ('shipping_postal_code', ('shipping_information', 'postal_code')),
+    ('shipping_city', ('shipping_information', 'city')),
+    ('shipping_province', ('shipping_information', 'province')),
+    ('credit_card_name', ('credit_card', 'name')),
+    ('credit_card_first_digits', ('credit_card', 'first_digits')),
+    ('credit_card_last_digits', ('credit_card', 'last_digits')),
+    ('credit_card_expiration_year', ('credit_card', 'expiration_year')),
+    ('credit_card_expiration_month', ('credit_card', 'expiration_month')),
+    ('transaction_id', ('transaction', 'id')),
+    ('transaction_success', ('transaction', 'success')),
+    ('transaction_amount_charged', ('transaction', 'amount_charged')),
+)
+
+
+def parse_datetime(value):
+    """Date (AAAA-MM-JJ) ou date et heure ISO 8601, en UTC."""
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_export_query(args):
+    """Valide les paramètres de l'export, lève ValueError sinon.
+
+    `from` est inclus et `to` exclu : from=2026-10-17&to=2026-10-18 exporte
+    les commandes du 17 octobre.
+    """
+    export_format = args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format invalide: {export_format}")
+
+    paid = args.get('paid')
+    province = args.get('province')
+    created_from = args.get('from')
+    created_to = args.get('to')
+    return {
+        'format': export_format,
+        'paid': parse_bool(paid) if paid is not None else None,
+        'province': province.strip().upper() if province else None,
+        'created_from': parse_datetime(created_from) if created_from else None,
+        'created_to': parse_datetime(created_to) if created_to else None,
+    }
+
+
+# Colonnes lues par GET /orders, dans l'ordre des tuples
+ORDER_LIST_FIELDS = (
+    'id', 'product_id', 'quantity', 'total_price', 'total_price_tax', 'shipping_price',
+    'email', 'shipping_province', 'paid', 'transaction_id', 'created_at',
+)
+
+ORDER_LIST_SORT_OPTIONS = ('id', '-id')
+
+
+def parse_order_list_query(args):
+    """Valide les paramètres de GET /orders, lève ValueError sinon."""
+    sort = args.get('sort', 'id')
+    if sort not in ORDER_LIST_SORT_OPTIONS:
+        raise ValueError(f"Tri invalide: {sort}")
+
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"La limite doit être entre 1 et {MAX_PAGE_SIZE}")
+
+    paid = args.get('paid')
+    email = args.get('email')
+    province = args.get('shipping_province')
+    product_id = args.get('product_id')
+    cursor = args.get('cursor')
+    return {
+        'sort': sort,
+        'limit': limit,
+        'cursor': decode_cursor(cursor, sort)[1] if cursor else None,
+        'paid': parse_bool(paid) if paid is not None else None,
+        'email': email.strip() if email else None,
+        'shipping_province': province.strip().upper() if province else None,
+        'product_id': int(product_id) if product_id is not None else None,
+    }
+
+
+def serialize_order_row(row):
+    """Représentation compacte d'une commande lue en tuple (ORDER_LIST_FIELDS)."""
+    (order_id, product_id, quantity, total_price, total_price_tax, shipping_price,
+     email, shipping_province, paid, transaction_id, created_at) = row
+    return {
+        "id": order_id,
+        "product": {"id": product_id, "quantity": quantity},
+        "total_price": total_price,
+        "total_price_tax": total_price_tax,
+        "shipping_price": shipping_price,
+        "email": email,
+        "shipping_province": shipping_province,
+        "paid": paid,
+        "transaction_id": transaction_id,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+
+
+# Premiers caractères d'une formule pour un tableur (injection CSV)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """Neutralise un texte qu'un tableur interpréterait comme une formule (préfixe ')."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _value_at(payload, path):
+    for key in path:
+        if not isinstance(payload, dict):
+            return None
+        payload = payload.get(key)
+    return payload
+
+
+def _ndjson_line(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def iter_ndjson(payloads, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Une commande JSON par ligne, envoyée par morceaux de chunk_rows lignes."""
+    lines = []
+    for payload in payloads:
+        lines.append(_ndjson_line(payload))
+        if len(lines) >= chunk_rows:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_csv(payloads, chunk_rows=EXPORT_CHUNK_ROWS):
+    """En-tête puis une ligne CSV par commande, envoyées par morceaux.
+
+    Les textes saisis par les clients qui commencent comme une formule sont
+    préfixés d'une apostrophe, pour ne pas être exécutés à l'ouverture.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in ORDER_EXPORT_COLUMNS])
+    rows = 0
+    for payload in payloads:
+        writer.writerow([_csv_cell(_value_at(payload, path)) for _, path in ORDER_EXPORT_COLUMNS])
+        rows += 1
+        if rows >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue()
@@ -0,0 +1,123 @@
+"""
+Paiements asynchrones : une file bornée et un petit nombre de threads qui
+appellent le service de paiement, pour que les threads des requêtes n'attendent
+pas sa réponse.
+
+Une commande passe par les états pending (débit en file ou en cours), paid
+(débit accepté) et failed (débit refusé ou service indisponible ; un nouveau
+PUT peut relancer le paiement).
+"""
+import logging
+import queue
+import threading
+
+logger = logging.getLogger('inf349.payment')
+
+PAYMENT_PENDING = 'pending'
+PAYMENT_PAID = 'paid'
+PAYMENT_FAILED = 'failed'
+
+_STOP = object()
+
+
+class PaymentQueue:
+    """File d'au plus max_pending débits, exécutés par `workers` threads.
+
+    submit() lève queue.Full quand la file est pleine : l'appelant répond 503
+    au lieu de bloquer le thread de la requête.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.workers = 4
+        self.max_pending = 64
+        self.submitted = 0
+        self.completed = 0
+        self.failures = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._queue = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=False, workers=4, max_pending=64):
+        self.stop()
+        self.enabled = enabled
+        self.workers = workers
+        self.max_pending = max_pending
+        self.submitted = self.completed = self.failures = self.rejected = 0
+
+    def _start(self):
+        self._queue = queue.Queue(self.max_pending)
+        self._threads = [
+            threading.Thread(target=self._run, args=(self._queue,), name=f'payment-worker-{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job):
+        """Planifie job() ; lève queue.Full si max_pending débits attendent déjà."""
+        with self._lock:
+            if self._queue is None:
+                self._start()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                raise
+            self.submitted += 1
+
+    def _run(self, jobs):
+        while True:
+            job = jobs.get()
+            try:
+                if job is _STOP:
+                    return
+                with self._lock:
+                    self._in_flight += 1
+                try:
+                    job()
+                    succeeded = True
+                except Exception:
+                    logger.exception('Payment job failed')
+                    succeeded = False
+                with self._lock:
+                    self._in_flight -= 1
+                    if succeeded:
+                        self.completed += 1
+                    else:
+                        self.failures += 1
+            finally:
+                jobs.task_done()
+
+    def join(self):
+        """Attend la fin des débits en file (tests, arrêt du serveur)."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def stop(self):
+        """Termine les débits en file puis arrête les threads."""
+        with self._lock:
+            jobs, threads = self._queue, self._threads
+            self._queue, self._threads = None, []
+        if jobs is None:
+            return
+        for _ in threads:
+            jobs.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def stats(self):
+        if not self.enabled:
+            return None
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
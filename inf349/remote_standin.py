@@ -0,0 +1,305 @@
+"""
+Serveur local qui imite les services distants (flux de produits et paiement de
+dimensweb.uqac.ca) pour les benchmarks et les tests hors ligne, avec une
+latence tirée d'une distribution, des erreurs 5xx et des délais expirés
+injectés à un taux donné.
+
+Usage :
+    python -m inf349.remote_standin --port 8001 --products 500 \\
+        --payment-latency lognormal:80:0.6 --error-rate 0.02 --timeout-rate 0.01
+
+puis pointer l'application vers ce serveur dans instance/config.py :
+PRODUCTS_URL = 'http://127.0.0.1:8001/products/' et
+PAYMENT_URL = 'http://127.0.0.1:8001/pay/'.
+
+Distributions de latence (millisecondes) : fixed:MS, uniform:MIN:MAX,
+normal:MOYENNE:ÉCART, lognormal:MÉDIANE:SIGMA, exponential:MOYENNE et
+pareto:MINIMUM:ALPHA (queue lourde).
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Cartes de test du service de paiement
+ACCEPTED_CARD = '4242424242424242'
+DECLINED_CARD = '4000000000000002'
+
+INJECTED_ERROR_STATUSES = (500, 502, 503)
+
+
+def parse_latency(spec):
+    """Retourne sample(rng) -> secondes pour une distribution décrite par spec."""
+    kind, _, params = spec.partition(':')
+    try:
+        values = [float(value) for value in params.split(':')] if params else []
+        if kind == 'fixed':
+            delay_ms, = values
+            return lambda rng: delay_ms / 1000
+        if kind == 'uniform':
+            low_ms, high_ms = values
+            return lambda rng: rng.uniform(low_ms, high_ms) / 1000
+        if kind == 'normal':
+            mean_ms, stddev_ms = values
+            return lambda rng: max(rng.gauss(mean_ms, stddev_ms), 0) / 1000
+        if kind == 'lognormal':
+            median_ms, sigma = values
+            return lambda rng: median_ms * rng.lognormvariate(0, sigma) / 1000
+        if kind == 'exponential':
+            mean_ms, = values
+            rate = 1 / mean_ms
+            return lambda rng: rng.expovariate(rate) / 1000
+        if kind == 'pareto':
+            minimum_ms, alpha = values
+            return lambda rng: minimum_ms * rng.paretovariate(alpha) / 1000
+    except (ValueError, ZeroDivisionError):
+        pass
+    raise ValueError(f"Distribution de latence invalide : {spec}")
+
+
+def build_products(count, seed=0):
+    """Catalogue de count produits, dans le format du flux distant."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": product_id,
+            "name": f"Produit {product_id}",
+            "description": f"Description du produit {product_id}",
+            "price": round(rng.uniform(1, 500), 2),
+            "in_stock": rng.random() > 0.2,
+            "weight": rng.randint(50, 5000),
+            "image": f"{product_id % 50}.jpg",
+        }
+        for product_id in range(1, count + 1)
+    ]
+
+
+def card_error(code, name):
+    return 422, {"errors": {"credit_card": {"code": code, "name": name}}}
+
+
+def payment_response(payload, transaction_id):
+    """Réponse (statut, corps) du service de paiement pour payload."""
+    card = payload.get("credit_card") if isinstance(payload, dict) else None
+    amount = payload.get("amount_charged") if isinstance(payload, dict) else None
+    required = {"name", "number", "expiration_year", "expiration_month", "cvv"}
+    if not isinstance(card, dict) or not required.issubset(card) or not isinstance(amount, int):
+        return 422, {"errors": {"payment": {"code": "missing-fields", "name": "Champs manquants"}}}
+
+    number = str(card["number"]).replace(" ", "")
+    if number == DECLINED_CARD:
+        return card_error("card-declined", "La carte de crédit a été déclinée.")
+    if number != ACCEPTED_CARD:
+        return card_error("incorrect-number", "Le numéro de carte est invalide.")
+    today = time.gmtime()
+    if (card["expiration_year"], card["expiration_month"]) < (today.tm_year, today.tm_mon):
+        return card_error("card-expired", "La carte de crédit est expirée.")
+
+    return 200, {
+        "credit_card": {
+            "name": card["name"],
+            "first_digits": number[:4],
+            "last_digits": number[-4:],
+            "expiration_year": card["expiration_year"],
+            "expiration_month": card["expiration_month"],
+        },
+        "transaction": {
+            "id": transaction_id,
+            "success": True,
+            "amount_charged": amount,
+        },
+    }
+
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client parti avant la réponse (délai expiré côté application) : attendu ici
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class RemoteStandIn:
+    """Serveur HTTP/1.1 (keep-alive) : GET …/products/ et POST …/pay/.
+
+    error_rate et timeout_rate sont des probabilités par requête : une erreur
+    répond 500, 502 ou 503 ; un délai expiré attend hang_seconds avant de
+    répondre 504 (le client aura abandonné avant).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, products=50, payment_latency='fixed:0',
+                 products_latency='fixed:0', error_rate=0.0, timeout_rate=0.0, hang_seconds=30, seed=None):
+        self.products = build_products(products)
+        self.catalog = json.dumps({"products": self.products}).encode('utf-8')
+        self.catalog_etag = '"%s"' % hashlib.sha1(self.catalog).hexdigest()
+        self.payment_latency = parse_latency(payment_latency)
+        self.products_latency = parse_latency(products_latency)
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.counts = {}
+        self._rng = random.Random(seed)
+        self._transactions = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.server = StandInHTTPServer((host, port), self._handler_class())
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def products_url(self):
+        return f"{self.base_url}/products/"
+
+    @property
+    def payment_url(self):
+        return f"{self.base_url}/pay/"
+
+    def _draw(self, latency):
+        """Tire (latence, incident) : incident vaut None, 'timeout' ou un statut 5xx."""
+        with self._lock:
+            delay = latency(self._rng)
+            roll = self._rng.random()
+            error_status = self._rng.choice(INJECTED_ERROR_STATUSES)
+        if roll < self.timeout_rate:
+            return delay, 'timeout'
+        if roll < self.timeout_rate + self.error_rate:
+            return delay, error_status
+        return delay, None
+
+    def _count(self, endpoint, status):
+        with self._lock:
+            by_status = self.counts.setdefault(endpoint, {})
+            by_status[status] = by_status.get(status, 0) + 1
+
+    def _next_transaction_id(self):
+        with self._lock:
+            self._transactions += 1
+            return f"STANDIN{self._transactions:010d}"
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, endpoint, status, body, headers=()):
+                standin._count(endpoint, status)
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                if body is not None:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body is not None:
+                    self.wfile.write(body)
+
+            def _incident(self, endpoint, latency):
+                delay, incident = standin._draw(latency)
+                time.sleep(delay)
+                if incident == 'timeout':
+                    time.sleep(standin.hang_seconds)
+                    self._send(endpoint, 504, b'{"errors": {"gateway": {"code": "timeout"}}}')
+                    return True
+                if incident is not None:
+                    status = incident
+                    self._send(endpoint, status, json.dumps({
+                        "errors": {"server": {"code": "injected-error", "name": f"Erreur {status} simulée"}}
+                    }).encode('utf-8'))
+                    return True
+                return False
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/__stats':
+                    with standin._lock:
+                        counts = json.dumps(standin.counts).encode('utf-8')
+                    self._send('stats', 200, counts)
+                    return
+                if not path.endswith('/products/'):
+                    self._send('unknown', 404, b'{}')
+                    return
+                if self._incident('products', standin.products_latency):
+                    return
+                headers = [("ETag", standin.catalog_etag)]
+                if self.headers.get("If-None-Match") == standin.catalog_etag:
+                    self._send('products', 304, None, headers)
+                    return
+                self._send('products', 200, standin.catalog, headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length)
+                if not self.path.split('?', 1)[0].endswith('/pay/'):
+                    self._send('unknown', 404, b'{}')
+                    return
+                if self._incident('pay', standin.payment_latency):
+                    return
+                try:
+                    payload = json.loads(raw or b'{}')
+                except ValueError:
+                    payload = None
+                status, body = payment_response(payload, standin._next_transaction_id())
+                self._send('pay', status, json.dumps(body).encode('utf-8'))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Sert les requêtes dans un thread en arrière-plan ; retourne self."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='remote-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Services distants simulés (produits et paiement).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--products', type=int, default=50, help="taille du catalogue")
+    parser.add_argument('--payment-latency', default='fixed:0', help="ex. lognormal:80:0.6")
+    parser.add_argument('--products-latency', default='fixed:0', help="ex. uniform:20:200")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="part des réponses 5xx")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="part des requêtes sans réponse")
+    parser.add_argument('--hang-seconds', type=float, default=30, help="attente avant la réponse 504")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    standin = RemoteStandIn(
+        host=args.host,
+        port=args.port,
+        products=args.products,
+        payment_latency=args.payment_latency,
+        products_latency=args.products_latency,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+    print(f"Produits : {standin.products_url}")
+    print(f"Paiement : {standin.payment_url}")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
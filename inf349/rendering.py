@@ -0,0 +1,100 @@
+"""
+Cache de rendu des templates : pages complètes et fragments Jinja ({% cache %}),
+et compilation anticipée des templates (cache de bytecode sur disque).
+
+Les clés incluent la version du catalogue, de sorte qu'une écriture dans la
+table Product rend immédiatement obsolètes les rendus précédents.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+TEMPLATE_EXTENSIONS = ('.html',)
+
+# Variable de contexte : version du catalogue lue avant le chargement des données de la page
+FRAGMENT_VERSION_VAR = 'fragment_cache_version'
+
+
+class FragmentCacheExtension(Extension):
+    """Ajoute la balise {% cache "nom", cle... %}...{% endcache %}.
+
+    Le fragment est mis en cache dans environment.fragment_cache (un LRUCache),
+    sous la clé (version, "nom", cle...). La version est celle passée dans le
+    contexte (FRAGMENT_VERSION_VAR), lue avant le chargement des données : une
+    invalidation pendant le rendu ne peut pas ranger d'anciennes données sous la
+    nouvelle version. À défaut, environment.fragment_cache_version() est utilisé.
+    Sans cache configuré, le contenu est simplement rendu.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None, fragment_cache_version=lambda: None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key_parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key_parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.ContextReference(), nodes.List(key_parts)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, context, key_parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        version = context.get(FRAGMENT_VERSION_VAR)
+        if version is None:
+            version = self.environment.fragment_cache_version()
+        key = (version, *key_parts)
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            cache.set(key, rendered)
+        return rendered
+
+
+class RenderCache:
+    """Pages rendues, indexées par template, version du catalogue et entrées déclarées."""
+
+    def __init__(self, cache, version, render):
+        self.cache = cache
+        self.version = version
+        self.render = render
+
+    def render_template(self, template_name, load_context, inputs=()):
+        """Retourne le rendu en cache, ou rend template_name avec load_context().
+
+        La version est lue avant load_context() et transmise aux fragments.
+        """
+        version = self.version()
+        key = (template_name, version, *inputs)
+        rendered = self.cache.get(key)
+        if rendered is None:
+            context = load_context()
+            context[FRAGMENT_VERSION_VAR] = version
+            rendered = self.render(template_name, **context)
+            self.cache.set(key, rendered)
+        return rendered
+
+
+def configure_bytecode_cache(environment, directory):
+    """Active le cache de bytecode Jinja dans directory (partagé entre les workers)."""
+    os.makedirs(directory, exist_ok=True)
+    environment.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile_templates(environment, extensions=TEMPLATE_EXTENSIONS):
+    """Compile tous les templates maintenant plutôt qu'à la première requête.
+
+    Les templates compilés restent dans le cache de l'environnement et, si un
+    cache de bytecode est configuré, y sont écrits. Retourne leurs noms.
+    """
+    names = [name for name in environment.list_templates() if name.endswith(extensions)]
+    for name in names:
+        environment.get_template(name)
+    return names
@@ -0,0 +1,236 @@
+"""
+Protection des appels aux services distants : disjoncteur (circuit breaker),
+délai d'attente adapté aux latences observées, et nouvelles tentatives avec
+attente aléatoire et budget global.
+
+Quand le service de paiement ne répond plus, le disjoncteur s'ouvre après
+quelques échecs consécutifs et les appels échouent aussitôt, sans occuper un
+thread pendant tout le délai d'attente. Après reset_timeout secondes, quelques
+appels d'essai (état half_open) décident de le refermer ou de le rouvrir.
+
+Les nouvelles tentatives attendent un délai aléatoire (RetryPolicy) et
+puisent dans un budget commun à tous les appels (RetryBudget) : pendant une
+panne, elles ne multiplient pas la charge sur le service.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def percentile(values, fraction):
+    """Valeur au rang fraction (0 à 1) des valeurs triées, None si vide."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class CircuitBreaker:
+    """Disjoncteur à trois états : closed, open puis half_open.
+
+    allow() indique si un appel peut partir ; l'appelant signale ensuite son
+    issue avec record_success() ou record_failure(). failure_threshold échecs
+    consécutifs ouvrent le circuit ; en half_open, au plus half_open_calls
+    appels d'essai partent en même temps.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, half_open_calls=1, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.configure(failure_threshold, reset_timeout, half_open_calls)
+
+    def configure(self, failure_threshold=5, reset_timeout=30, half_open_calls=1):
+        """Change les seuils et referme le circuit."""
+        with self._lock:
+            self.failure_threshold = failure_threshold
+            self.reset_timeout = reset_timeout
+            self.half_open_calls = half_open_calls
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.trials = 0
+            self.times_opened = 0
+            self.rejected = 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self.trials = 0
+            if self.state == HALF_OPEN:
+                if self.trials >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self.trials += 1
+            return True
+
+    def retry_after(self):
+        """Secondes avant le prochain appel d'essai (0 si le circuit est fermé)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return max(self.reset_timeout - (self.clock() - self.opened_at), 0)
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.trials = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self.trials = 0
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 3),
+        }
+
+
+class AdaptiveTimeout:
+    """Délai d'attente égal à factor fois le p99 des latences récentes.
+
+    Tant que min_samples latences n'ont pas été observées, le délai vaut
+    initial ; il reste toujours entre minimum et maximum. Un appel expiré doit
+    être observé avec sa durée, ce qui fait remonter le délai.
+    """
+
+    def __init__(self, initial=10.0, minimum=1.0, maximum=10.0, factor=3.0, window=256, min_samples=20):
+        self._lock = threading.Lock()
+        self.configure(initial, minimum, maximum, factor, window, min_samples)
+
+    def configure(self, initial=10.0, minimum=1.0, maximum=10.0, factor=3.0, window=256, min_samples=20):
+        """Change les bornes et oublie les latences observées."""
+        with self._lock:
+            self.initial = initial
+            self.minimum = minimum
+            self.maximum = maximum
+            self.factor = factor
+            self.min_samples = min_samples
+            self._latencies = deque(maxlen=window)
+
+    def observe(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def current(self):
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial
+            p99 = percentile(self._latencies, 0.99)
+        return min(max(p99 * self.factor, self.minimum), self.maximum)
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+        p50 = percentile(latencies, 0.5)
+        p99 = percentile(latencies, 0.99)
+        return {
+            "timeout": round(self.current(), 3),
+            "samples": len(latencies),
+            "p50_ms": round(p50 * 1000, 3) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 3) if p99 is not None else None,
+        }
+
+
+class RetryPolicy:
+    """Nombre maximal de tentatives et attentes entre elles (« decorrelated jitter »).
+
+    Chaque attente est tirée uniformément entre base_delay et trois fois la
+    précédente, plafonnée à max_delay : les clients qui ont échoué en même
+    temps ne réessaient pas en même temps.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.05, max_delay=1.0, rng=None, sleep=time.sleep):
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+        self.configure(max_attempts, base_delay, max_delay)
+
+    def configure(self, max_attempts=3, base_delay=0.05, max_delay=1.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self):
+        """Générateur des attentes successives (secondes)."""
+        delay = self.base_delay
+        while True:
+            delay = min(self.max_delay, self.rng.uniform(self.base_delay, delay * 3))
+            yield delay
+
+
+class RetryBudget:
+    """Budget global de nouvelles tentatives sur une fenêtre glissante.
+
+    Sur les `window` dernières secondes, les nouvelles tentatives ne peuvent
+    dépasser min_retries plus ratio fois le nombre d'appels : pendant une
+    panne, les tentatives n'ajoutent qu'une fraction de la charge normale.
+    """
+
+    def __init__(self, ratio=0.1, min_retries=3, window=10.0, clock=time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.configure(ratio, min_retries, window)
+
+    def configure(self, ratio=0.1, min_retries=3, window=10.0):
+        with self._lock:
+            self.ratio = ratio
+            self.min_retries = min_retries
+            self.window = window
+            self._calls = deque()
+            self._retries = deque()
+            self.calls = 0
+            self.retries = 0
+            self.exhausted = 0
+
+    def _prune(self, now):
+        for timestamps in (self._calls, self._retries):
+            while timestamps and now - timestamps[0] > self.window:
+                timestamps.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            self._calls.append(now)
+            self.calls += 1
+
+    def try_spend(self):
+        """Réserve une nouvelle tentative ; retourne False si le budget est épuisé."""
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._calls):
+                self.exhausted += 1
+                return False
+            self._retries.append(now)
+            self.retries += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            self._prune(self.clock())
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "exhausted": self.exhausted,
+                "available": round(self.min_retries + self.ratio * len(self._calls) - len(self._retries), 2),
+            }
@@ -0,0 +1,45 @@
+"""
+Recherche plein texte des produits (SQLite FTS5).
+
+L'index product_index est une table FTS5 à contenu externe qui reflète
+Product.name et Product.description ; des triggers SQLite le maintiennent
+à jour à chaque insertion, modification ou suppression de produit.
+"""
+import re
+
+PRODUCT_INDEX_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS product_index_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_index(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_index_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_index(product_index, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_index_au AFTER UPDATE ON product BEGIN
+        INSERT INTO product_index(product_index, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO product_index(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END""",
+)
+
+# Poids bm25 par colonne : un terme trouvé dans le nom compte plus que dans la description
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_expression(text):
+    """Transforme la saisie de l'utilisateur en requête FTS5 (tous les mots, en préfixe).
+
+    Chaque mot est mis entre guillemets pour neutraliser la syntaxe FTS5
+    (opérateurs, colonnes, parenthèses). Retourne None si aucun mot n'est trouvé.
+    """
+    if not isinstance(text, str):
+        return None
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
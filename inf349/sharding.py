@@ -0,0 +1,234 @@
+"""
+Répartition des commandes sur plusieurs fichiers SQLite (shards).
+
+SQLite n'accepte qu'un écrivain à la fois par fichier : chaque shard est une
+base distincte contenant sa propre table « order ». Les identifiants sont de
+type snowflake et encodent le shard, ce qui permet de retrouver une commande à
+partir de son seul id :
+
+    | 41 bits : ms depuis ORDER_ID_EPOCH_MS | 4 bits : shard | 4 bits : worker | 4 bits : séquence |
+
+Les 53 bits restent exacts dans un nombre JSON lu par JavaScript (2^53).
+
+Le worker distingue les processus qui génèrent des id en parallèle ; chacun
+réserve le sien par un verrou de fichier (order-worker-N.lock, à côté des
+shards), relâché à sa fin. Un processus créé par fork après la configuration
+(serveur pre-fork avec préchargement de l'application) réserve son propre id
+à sa première commande. La séquence distingue les id d'un même worker dans une
+même milliseconde.
+"""
+import itertools
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows : ORDER_ID_WORKER doit être fixé explicitement
+    fcntl = None
+
+from inf349.database import create_database
+
+# 2025-01-01T00:00:00Z
+ORDER_ID_EPOCH_MS = 1735689600000
+
+TIMESTAMP_BITS = 41
+SHARD_BITS = 4
+WORKER_BITS = 4
+SEQUENCE_BITS = 4
+
+MAX_SHARDS = 1 << SHARD_BITS
+MAX_WORKERS = 1 << WORKER_BITS
+
+WORKER_SHIFT = SEQUENCE_BITS
+SHARD_SHIFT = SEQUENCE_BITS + WORKER_BITS
+TIMESTAMP_SHIFT = SEQUENCE_BITS + WORKER_BITS + SHARD_BITS
+
+SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+
+# Les id plus petits (AutoField) désignent les commandes de la base principale ;
+# tout id généré plus de 2^28 ms (environ 74,6 heures) après ORDER_ID_EPOCH_MS le dépasse
+MIN_SHARDED_ID = 1 << 40
+
+
+class SnowflakeGenerator:
+    """Génère des id de commande uniques, croissants dans le temps, pour un worker."""
+
+    def __init__(self, worker_id, clock=time.time):
+        if not 0 <= worker_id < MAX_WORKERS:
+            raise ValueError(f"Le worker doit être entre 0 et {MAX_WORKERS - 1}")
+        self.worker_id = worker_id
+        self.clock = clock
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def _now_ms(self):
+        return int(self.clock() * 1000) - ORDER_ID_EPOCH_MS
+
+    def next_id(self, shard):
+        if not 0 <= shard < MAX_SHARDS:
+            raise ValueError(f"Le shard doit être entre 0 et {MAX_SHARDS - 1}")
+        with self._lock:
+            now = self._now_ms()
+            # Horloge qui recule : on reste sur la dernière milliseconde émise
+            if now <= self._last_ms:
+                now = self._last_ms
+                self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+                if self._sequence == 0:
+                    # Séquence épuisée : on attend la milliseconde suivante
+                    while now <= self._last_ms:
+                        time.sleep(0.0001)
+                        now = max(self._now_ms(), now)
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return (
+                (now << TIMESTAMP_SHIFT)
+                | (shard << SHARD_SHIFT)
+                | (self.worker_id << WORKER_SHIFT)
+                | self._sequence
+            )
+
+
+def shard_of(order_id):
+    """Retourne le shard d'un id snowflake, ou None pour un id de la base principale."""
+    if order_id < MIN_SHARDED_ID:
+        return None
+    return (order_id >> SHARD_SHIFT) & (MAX_SHARDS - 1)
+
+
+class WorkerIdLock:
+    """Réserve un id de worker pour ce processus par un verrou exclusif sur un fichier.
+
+    Deux processus qui partagent les shards ne peuvent pas tenir le même id ;
+    le verrou est relâché par release() ou à la fin du processus.
+    """
+
+    def __init__(self, directory, worker_id=None):
+        self.worker_id = None
+        self._file = None
+        if fcntl is None:
+            if worker_id is None:
+                raise ValueError("ORDER_ID_WORKER est obligatoire sans verrou de fichier (fcntl)")
+            self.worker_id = worker_id
+            return
+
+        candidates = range(MAX_WORKERS) if worker_id is None else [worker_id]
+        for candidate in candidates:
+            if not 0 <= candidate < MAX_WORKERS:
+                raise ValueError(f"Le worker doit être entre 0 et {MAX_WORKERS - 1}")
+            lock_file = open(os.path.join(directory, f'order-worker-{candidate}.lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self.worker_id = candidate
+            self._file = lock_file
+            return
+
+        if worker_id is None:
+            raise ValueError(f"Les {MAX_WORKERS} id de worker sont déjà utilisés")
+        raise ValueError(f"L'id de worker {worker_id} est déjà utilisé par un autre processus")
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class OrderShards:
+    """Modèles Order liés à chaque shard, et routage des commandes par id.
+
+    Sans shard configuré, toutes les commandes restent dans la base principale
+    (modèle de base, id AutoField).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.databases = []
+        self.models = []
+        self.generator = None
+        self.worker_lock = None
+        self._worker_directory = None
+        self._worker_id = None
+        self._worker_pid = None
+        self.writes = []
+        self._next_shard = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.models)
+
+    def configure(self, paths, pragmas=None, worker_id=None):
+        """Lie les shards ; worker_id (ORDER_ID_WORKER) est sinon réservé automatiquement."""
+        self.close()
+        if self.worker_lock is not None:
+            self.worker_lock.release()
+            self.worker_lock = None
+        if len(paths) > MAX_SHARDS:
+            raise ValueError(f"Au plus {MAX_SHARDS} shards sont possibles")
+        self.databases = [create_database(path, pragmas=pragmas) for path in paths]
+        self.models = [self._bind(index, database) for index, database in enumerate(self.databases)]
+        self.generator = None
+        self._worker_id = worker_id
+        if paths:
+            self._worker_directory = os.path.dirname(os.path.abspath(paths[0]))
+            self._reserve_worker()
+        self.writes = [0] * len(paths)
+        self._next_shard = itertools.count()
+
+    def _bind(self, index, database):
+        meta = type('Meta', (), {'database': database, 'table_name': self.model._meta.table_name})
+        return type(f'{self.model.__name__}Shard{index}', (self.model,), {
+            'Meta': meta,
+            '__module__': self.model.__module__,
+        })
+
+    def _reserve_worker(self):
+        """Réserve un id de worker pour le processus courant et crée son générateur."""
+        inherited = self.worker_lock
+        # Nouveau verrou avant de fermer l'ancien : dans un processus fils, l'id du
+        # parent reste pris et n'est donc pas choisi de nouveau
+        self.worker_lock = WorkerIdLock(self._worker_directory, self._worker_id)
+        if inherited is not None:
+            inherited.release()
+        self.generator = SnowflakeGenerator(self.worker_lock.worker_id)
+        self._worker_pid = os.getpid()
+
+    def allocate(self):
+        """Choisit le prochain shard (tour à tour) ; retourne (modèle, nouvel id)."""
+        shard = next(self._next_shard) % len(self.models)
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                # Processus fils : le verrou, l'id de worker et la séquence hérités
+                # sont ceux du parent, partagés avec les autres fils
+                self._reserve_worker()
+            self.writes[shard] += 1
+            generator = self.generator
+        return self.models[shard], generator.next_id(shard)
+
+    def model_for(self, order_id):
+        shard = shard_of(order_id) if self.enabled else None
+        if shard is None or shard >= len(self.models):
+            return self.model
+        return self.models[shard]
+
+    def all_models(self):
+        """Modèle de la base principale puis celui de chaque shard."""
+        return [self.model] + self.models
+
+    def close(self):
+        """Ferme les connexions aux shards ouvertes par le thread courant."""
+        for database in self.databases:
+            if not database.is_closed():
+                database.close()
+
+    def stats(self):
+        return {
+            "shards": len(self.models),
+            "worker_id": self.generator.worker_id if self.generator else None,
+            "writes": list(self.writes),
+        }
@@ -0,0 +1,205 @@
+"""
+Synchronisation incrémentale du catalogue avec le flux de produits distant.
+
+Le flux est interrogé avec des requêtes conditionnelles (If-None-Match /
+If-Modified-Since), sur les connexions keep-alive du client HTTP de
+l'application ; seuls les produits modifiés sont écrits en base. Un flux
+modifié publie toujours une nouvelle version du catalogue, même si un autre
+processus a déjà écrit ces changements : son cache en mémoire serait sinon périmé.
+
+Un flux vide, ou qui retirerait de la vente plus de max_removed_ratio des
+produits en stock (panne partielle du fournisseur), est rejeté : la
+synchronisation échoue et le catalogue courant est conservé.
+"""
+import logging
+import threading
+import time
+from urllib import error as urllib_error
+
+from inf349.http_client import HTTPClient
+from inf349.importer import iter_json_array
+
+logger = logging.getLogger('inf349.sync')
+
+PRODUCT_SYNC_FIELDS = ('id', 'name', 'description', 'price', 'in_stock', 'weight', 'image')
+
+
+class SuspiciousFeed(ValueError):
+    """Flux rejeté : vide, ou retirant trop de produits en stock d'un coup."""
+
+
+class FeedResponse:
+    def __init__(self, modified, products=None, etag=None, last_modified=None):
+        self.modified = modified
+        self.products = products
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def fetch_feed(client, url, etag=None, last_modified=None, timeout=10):
+    """Télécharge le flux de produits avec client (HTTPClient), sauf s'il n'a pas changé depuis etag/last_modified."""
+    headers = {'Accept': 'application/json'}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    with client.stream('GET', url, headers=headers, timeout=timeout) as response:
+        if response.status == 304:
+            response.read()
+            return FeedResponse(False, etag=etag, last_modified=last_modified)
+        if response.status >= 400:
+            response.read()
+            raise urllib_error.HTTPError(url, response.status, f"HTTP {response.status}", response.headers, None)
+        products = list(iter_json_array(response, 'products'))
+        response.read()
+        return FeedResponse(
+            True,
+            products,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+        )
+
+
+def normalize_product(product):
+    return {field: product.get(field) for field in PRODUCT_SYNC_FIELDS}
+
+
+def diff_products(current, incoming):
+    """Compare le catalogue courant (dict id -> produit) au flux reçu.
+
+    Retourne (changed, removed_ids) : les produits nouveaux ou modifiés, et les
+    id encore en stock en base mais absents du flux (à retirer de la vente).
+    """
+    changed = []
+    seen = set()
+    for product in incoming:
+        row = normalize_product(product)
+        seen.add(row['id'])
+        existing = current.get(row['id'])
+        if existing is None or normalize_product(existing) != row:
+            changed.append(row)
+    removed_ids = [
+        product_id for product_id, product in current.items()
+        if product_id not in seen and product.get('in_stock')
+    ]
+    return changed, removed_ids
+
+
+def check_feed(current, incoming, removed_ids, max_removed_ratio):
+    """Lève SuspiciousFeed si le flux viderait ou réduirait trop le catalogue en stock."""
+    in_stock = sum(1 for product in current.values() if product.get('in_stock'))
+    if not incoming and current:
+        raise SuspiciousFeed(f"Flux de produits vide, {len(current)} produits en base conservés")
+    if in_stock and len(removed_ids) > in_stock * max_removed_ratio:
+        raise SuspiciousFeed(
+            f"Le flux retirerait {len(removed_ids)} des {in_stock} produits en stock "
+            f"(au plus {max_removed_ratio:.0%}), catalogue conservé"
+        )
+
+
+class CatalogSyncer:
+    """Applique les changements du flux distant via load_current() et apply_changes().
+
+    invalidate() est appelé quand le flux a changé mais que la base est déjà à
+    jour (changements écrits par un autre processus). Un flux rejeté par
+    check_feed() n'est pas appliqué et sera téléchargé de nouveau.
+    """
+
+    def __init__(self, url, load_current, apply_changes, timeout=10, invalidate=None, client=None,
+                 max_removed_ratio=0.5):
+        self.url = url
+        self.max_removed_ratio = max_removed_ratio
+        self.load_current = load_current
+        self.apply_changes = apply_changes
+        self.invalidate = invalidate
+        self.client = client or HTTPClient()
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self.runs = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.last_changed = 0
+        self.last_removed = 0
+        self.last_run_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def run_once(self):
+        """Exécute une synchronisation ; retourne le nombre de produits modifiés."""
+        with self._lock:
+            self.runs += 1
+            self.last_run_at = time.time()
+            try:
+                feed = fetch_feed(self.client, self.url, self.etag, self.last_modified, self.timeout)
+                if not feed.modified:
+                    self.not_modified += 1
+                    self.last_changed = self.last_removed = 0
+                    return 0
+
+                current = self.load_current()
+                changed, removed_ids = diff_products(current, feed.products)
+                check_feed(current, feed.products, removed_ids, self.max_removed_ratio)
+                if changed or removed_ids:
+                    self.apply_changes(changed, removed_ids)
+                elif self.invalidate is not None:
+                    self.invalidate()
+                self.etag = feed.etag
+                self.last_modified = feed.last_modified
+                self.last_changed = len(changed)
+                self.last_removed = len(removed_ids)
+                self.last_error = None
+                logger.info('Catalog sync: %s changed, %s removed', len(changed), len(removed_ids))
+                return len(changed)
+            except SuspiciousFeed as exc:
+                logger.error('Catalog sync rejected: %s', exc)
+                self.errors += 1
+                self.last_error = str(exc)
+                raise
+            except Exception as exc:
+                self.errors += 1
+                self.last_error = str(exc)
+                raise
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "runs": self.runs,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "last_changed": self.last_changed,
+            "last_removed": self.last_removed,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error,
+        }
+
+
+class BackgroundRefresher:
+    """Thread démon qui appelle target() toutes les `interval` secondes."""
+
+    def __init__(self, target, interval, name='catalog-sync'):
+        self.target = target
+        self.interval = interval
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.target()
+            except Exception:
+                logger.exception('Background catalog sync failed')
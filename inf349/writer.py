@@ -0,0 +1,163 @@
+"""
+Écriture groupée (« group commit ») : un thread écrivain par base exécute les
+écritures soumises par les threads des requêtes et les valide par petits lots,
+en une seule transaction par lot au lieu d'une par commande.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger('inf349.writer')
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """Thread unique qui exécute operation() pour chaque écriture soumise.
+
+    Le premier élément reçu ouvre un lot ; le lot est validé dès qu'il atteint
+    max_batch éléments ou que max_delay secondes se sont écoulées. Chaque
+    opération s'exécute dans un savepoint : un échec n'annule qu'elle. Les
+    futures ne sont résolues qu'après le commit.
+    """
+
+    def __init__(self, database, max_batch=256, max_delay=0.002, name='order-writer'):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.commit_time = 0.0
+        self.failures = 0
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, operation):
+        """Planifie operation() ; retourne une Future résolue avec son résultat."""
+        if self._stopped:
+            raise RuntimeError("Le thread d'écriture est arrêté")
+        future = Future()
+        self._queue.put((operation, future))
+        return future
+
+    def stop(self, timeout=None):
+        """Valide les écritures en attente puis arrête le thread."""
+        if not self._stopped:
+            self._stopped = True
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+        if not self.database.is_closed():
+            self.database.close()
+
+    def _commit(self, batch):
+        started_at = time.perf_counter()
+        batch = [(operation, future) for operation, future in batch if future.set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            self.database.connect(reuse_if_open=True)
+            with self.database.atomic():
+                for operation, _ in batch:
+                    try:
+                        with self.database.atomic():
+                            outcomes.append((True, operation()))
+                    except Exception as exc:
+                        outcomes.append((False, exc))
+        except Exception as exc:
+            logger.exception('Group commit of %s writes failed', len(batch))
+            self.failures += 1
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.commit_time += time.perf_counter() - started_at
+        for (_, future), (succeeded, value) in zip(batch, outcomes):
+            if succeeded:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "writes": self.items,
+            "average_batch": round(self.items / self.batches, 2) if self.batches else None,
+            "max_batch": self.max_batch_seen,
+            "commit_time_ms": round(self.commit_time * 1000, 3),
+            "failures": self.failures,
+            "pending": self._queue.qsize(),
+        }
+
+
+class GroupCommitQueue:
+    """Un GroupCommitWriter par base de données, créé à la première écriture."""
+
+    def __init__(self):
+        self.enabled = False
+        self.max_batch = 256
+        self.max_delay = 0.002
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=False, max_batch=256, max_delay=0.002):
+        self.stop()
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+    def submit(self, database, operation):
+        with self._lock:
+            writer = self._writers.get(database)
+            if writer is None:
+                writer = self._writers[database] = GroupCommitWriter(
+                    database,
+                    max_batch=self.max_batch,
+                    max_delay=self.max_delay,
+                    name=f'order-writer-{len(self._writers)}',
+                )
+        return writer.submit(operation)
+
+    def execute(self, database, operation):
+        """Soumet operation() et attend le commit de son lot ; retourne son résultat."""
+        return self.submit(database, operation).result()
+
+    def stop(self):
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers = {}
+        for writer in writers:
+            writer.stop()
+
+    def stats(self):
+        if not self.enabled:
+            return None
+        with self._lock:
+            writers = list(self._writers.values())
+        return [writer.stats() for writer in writers]
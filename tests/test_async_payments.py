@@ -0,0 +1,260 @@
+"""
+Tests des paiements asynchrones (PAYMENT_ASYNC) : 202, file bornée et états pending/paid/failed
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import inf349
+from inf349 import create_app, db, payment_queue, Order, Product
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+PAID_RESPONSE = FakeResponse(200, {
+    "credit_card": {
+        "name": "John Doe",
+        "first_digits": "4242",
+        "last_digits": "4242",
+        "expiration_year": 2027,
+        "expiration_month": 9,
+    },
+    "transaction": {"id": "txn_async", "success": True, "amount_charged": 2500},
+})
+
+DECLINED_RESPONSE = FakeResponse(422, {
+    "errors": {"credit_card": {"code": "card-declined", "name": "La carte de crédit a été refusée"}}
+})
+
+
+def make_app(tmp_path, **config):
+    app = create_app(dict({
+        "TESTING": True,
+        "DATABASE": str(tmp_path / "test.sqlite"),
+        "PAYMENT_ASYNC": True,
+    }, **config))
+    with app.app_context():
+        db.connect(reuse_if_open=True)
+        db.create_tables([Product, Order])
+        Product.create(id=1, name="Produit", description="desc", price=10.0, in_stock=True, weight=400, image="1.jpg")
+        for order_id in (1, 2, 3):
+            Order.create(
+                id=order_id,
+                product_id=1,
+                quantity=2,
+                total_price=20.0,
+                shipping_price=5.0,
+                total_price_tax=23.0,
+                email="john@example.com",
+                shipping_country="Canada",
+                shipping_address="1 rue du Test",
+                shipping_postal_code="G7X 3Y7",
+                shipping_city="Chicoutimi",
+                shipping_province="QC",
+            )
+        db.close()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    payment_queue.configure()
+
+
+def credit_card_payload(**overrides):
+    card = {
+        "name": "John Doe",
+        "number": "4242 4242 4242 4242",
+        "expiration_year": 2027,
+        "expiration_month": 9,
+        "cvv": "123",
+    }
+    card.update(overrides)
+    return {"credit_card": card}
+
+
+def test_payment_is_accepted_then_processed_in_background(app, monkeypatch):
+    calls = []
+
+    def fake_post(url, payload, timeout=10, extra_headers=None):
+        calls.append(payload)
+        return PAID_RESPONSE
+
+    monkeypatch.setattr(inf349, "http_post_json", fake_post)
+    client = app.test_client()
+
+    response = client.put("/order/1", json=credit_card_payload())
+    assert response.status_code == 202
+    assert response.headers["Location"].endswith("/order/1/payment")
+    assert response.get_json()["payment"]["status"] == "pending"
+
+    payment_queue.join()
+
+    assert calls[0]["amount_charged"] == 2500
+    assert client.get("/order/1/payment").get_json() == {"payment": {"status": "paid", "errors": None}}
+    order = client.get("/order/1").get_json()["order"]
+    assert order["paid"] is True
+    assert order["transaction"]["id"] == "txn_async"
+
+
+def test_declined_payment_is_recorded_as_failed_and_can_be_retried(app, monkeypatch):
+    responses = [DECLINED_RESPONSE, PAID_RESPONSE]
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: responses.pop(0))
+    client = app.test_client()
+
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 202
+    payment_queue.join()
+    assert client.get("/order/1/payment").get_json() == {"payment": {
+        "status": "failed",
+        "errors": {"credit_card": {"code": "card-declined", "name": "La carte de crédit a été refusée"}},
+    }}
+    assert client.get("/order/1").get_json()["order"]["paid"] is False
+
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 202
+    payment_queue.join()
+    assert client.get("/order/1/payment").get_json()["payment"]["status"] == "paid"
+
+
+def test_unavailable_service_is_recorded_as_failed(app, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr(inf349, "http_post_json", unavailable)
+    client = app.test_client()
+
+    client.put("/order/1", json=credit_card_payload())
+    payment_queue.join()
+
+    payment = client.get("/order/1/payment").get_json()["payment"]
+    assert payment["status"] == "failed"
+    assert payment["errors"]["payment"]["code"] == "service-unavailable"
+
+
+def test_invalid_card_is_rejected_before_enqueueing(app, monkeypatch):
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: pytest.fail("service appelé"))
+    client = app.test_client()
+
+    response = client.put("/order/1", json=credit_card_payload(cvv="12"))
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["credit_card"]["code"] == "invalid-cvv"
+    assert client.get("/order/1/payment").get_json()["payment"]["status"] is None
+
+
+def test_second_payment_while_pending_is_rejected(app, monkeypatch):
+    release = threading.Event()
+
+    def slow_post(*args, **kwargs):
+        release.wait(5)
+        return PAID_RESPONSE
+
+    monkeypatch.setattr(inf349, "http_post_json", slow_post)
+    client = app.test_client()
+
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 202
+    response = client.put("/order/1", json=credit_card_payload())
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["order"]["code"] == "payment-pending"
+
+    release.set()
+    payment_queue.join()
+    assert client.put("/order/1", json=credit_card_payload()).get_json()["errors"]["order"]["code"] == "already-paid"
+
+
+def mark_pending(order_id, claimed_at):
+    with db.connection_context():
+        Order.update(payment_status="pending", payment_claimed_at=claimed_at).where(Order.id == order_id).execute()
+
+
+def test_pending_payment_left_by_a_restart_can_be_retried_after_the_lease(app, monkeypatch):
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: PAID_RESPONSE)
+    client = app.test_client()
+    # Commande 1 : débit en cours dans un autre processus ; commande 2 : processus arrêté il y a une heure
+    mark_pending(1, datetime.utcnow())
+    mark_pending(2, datetime.utcnow() - timedelta(hours=1))
+
+    response = client.put("/order/1", json=credit_card_payload())
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["order"]["code"] == "payment-pending"
+
+    assert client.put("/order/2", json=credit_card_payload()).status_code == 202
+    payment_queue.join()
+    assert client.get("/order/2/payment").get_json()["payment"]["status"] == "paid"
+
+
+def test_synchronous_payments_use_the_same_claim(tmp_path, monkeypatch):
+    app = make_app(tmp_path, PAYMENT_ASYNC=False)
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: pytest.fail("service appelé"))
+    client = app.test_client()
+    mark_pending(1, datetime.utcnow())
+
+    response = client.put("/order/1", json=credit_card_payload())
+    assert response.get_json()["errors"]["order"]["code"] == "payment-pending"
+
+    card = credit_card_payload()["credit_card"]
+    response = client.post("/ui/order/1/payment", data=card)
+    assert response.status_code == 422
+    assert "Un paiement est déjà en cours" in response.get_data(as_text=True)
+
+    response = client.post("/ui/order/1", data={f"credit_card_{key}": value for key, value in card.items()})
+    assert "Un paiement est déjà en cours" in response.get_data(as_text=True)
+
+
+def test_failed_synchronous_payment_releases_the_claim(tmp_path, monkeypatch):
+    app = make_app(tmp_path, PAYMENT_ASYNC=False)
+    responses = [DECLINED_RESPONSE, PAID_RESPONSE]
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: responses.pop(0))
+    client = app.test_client()
+
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 422
+    assert client.get("/order/1/payment").get_json()["payment"]["status"] == "failed"
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 200
+    assert client.get("/order/1/payment").get_json()["payment"]["status"] == "paid"
+
+
+def test_full_queue_answers_503_and_keeps_order_payable(tmp_path, monkeypatch):
+    app = make_app(tmp_path, PAYMENT_WORKERS=1, PAYMENT_QUEUE_SIZE=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_post(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return PAID_RESPONSE
+
+    monkeypatch.setattr(inf349, "http_post_json", slow_post)
+    client = app.test_client()
+    try:
+        assert client.put("/order/1", json=credit_card_payload()).status_code == 202
+        started.wait(5)
+        assert client.put("/order/2", json=credit_card_payload()).status_code == 202
+
+        response = client.put("/order/3", json=credit_card_payload())
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert client.get("/order/3/payment").get_json()["payment"]["status"] is None
+
+        metrics = client.get("/api/metrics").get_json()["payment_queue"]
+        assert metrics["rejected"] == 1
+        assert metrics["in_flight"] == 1
+    finally:
+        release.set()
+        payment_queue.join()
+        payment_queue.configure()
+
+    assert client.get("/order/2/payment").get_json()["payment"]["status"] == "paid"
+    assert client.put("/order/3", json=credit_card_payload()).status_code == 200
+
+
+def test_payment_status_of_unknown_order_is_404(app):
+    assert app.test_client().get("/order/999/payment").status_code == 404
@@ -0,0 +1,198 @@
+"""
+Tests du cache en mémoire du catalogue de produits
+"""
+import gzip
+import threading
+import time
+
+import pytest
+
+from inf349 import create_app, db, Product, Order, catalog_cache
+from inf349.catalog import CatalogCache
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_catalog_cache.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(
+        id=1,
+        name="Produit en cache",
+        description="desc",
+        price=10.0,
+        in_stock=True,
+        weight=400,
+        image="1.jpg",
+    )
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path})
+    with app.test_client() as test_client:
+        yield test_client
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+def test_catalog_is_loaded_once_then_served_from_cache(client):
+    first = client.get("/api/products")
+    second = client.get("/")
+    third = client.get("/ui/products")
+
+    assert first.status_code == 200
+    assert first.get_json() == second.get_json()
+    assert third.status_code == 200
+    assert catalog_cache.misses == 1
+    assert catalog_cache.hits == 2
+
+
+def test_warm_catalog_does_not_open_database_connection(client, monkeypatch):
+    client.get("/api/products")
+
+    def fail_connect(*args, **kwargs):
+        raise AssertionError("la base ne doit pas être ouverte")
+
+    monkeypatch.setattr(db.obj, "connect", fail_connect)
+    response = client.get("/api/products")
+    assert response.status_code == 200
+
+
+def test_product_write_invalidates_catalog(client):
+    client.get("/api/products")
+    version = catalog_cache.version
+
+    db.connect(reuse_if_open=True)
+    try:
+        Product.create(
+            id=2,
+            name="Nouveau produit",
+            description="desc",
+            price=5.0,
+            in_stock=True,
+            weight=100,
+            image="2.jpg",
+        )
+    finally:
+        db.close()
+
+    assert catalog_cache.version > version
+    products = client.get("/api/products").get_json()["products"]
+    assert [product["id"] for product in products] == [1, 2]
+
+
+def test_catalog_cache_can_be_disabled(tmp_path):
+    path = str(tmp_path / "test_catalog_disabled.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "CATALOG_CACHE": False})
+    with app.test_client() as test_client:
+        test_client.get("/api/products")
+        test_client.get("/api/products")
+        metrics = test_client.get("/api/metrics").get_json()
+
+    assert metrics["catalog_cache"]["enabled"] is False
+    assert metrics["catalog_cache"]["hits"] == 0
+    assert metrics["catalog_cache"]["misses"] == 2
+
+
+def test_catalog_response_has_strong_etag_and_304_on_revalidation(client, monkeypatch):
+    first = client.get("/api/products")
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert "Accept-Encoding" in first.headers["Vary"]
+
+    def fail_connect(*args, **kwargs):
+        raise AssertionError("la base ne doit pas être ouverte")
+
+    monkeypatch.setattr(db.obj, "connect", fail_connect)
+    monkeypatch.setattr("inf349.load_catalog_products", fail_connect)
+
+    second = client.get("/", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.get_data() == b""
+
+
+def test_catalog_response_is_served_gzip_precompressed(client):
+    plain = client.get("/api/products")
+    compressed = client.get("/api/products", headers={"Accept-Encoding": "gzip"})
+
+    assert plain.headers.get("Content-Encoding") is None
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers["ETag"] != plain.headers["ETag"]
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+
+    revalidated = client.get("/api/products", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"],
+    })
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == compressed.headers["ETag"]
+
+
+def test_catalog_response_is_served_brotli_precompressed(client):
+    import brotli
+
+    plain = client.get("/api/products")
+    compressed = client.get("/api/products", headers={"Accept-Encoding": "gzip, br"})
+
+    assert compressed.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(compressed.get_data()) == plain.get_data()
+    assert compressed.headers["ETag"] not in (plain.headers["ETag"], client.get(
+        "/api/products", headers={"Accept-Encoding": "gzip"}).headers["ETag"])
+
+
+def test_compressed_variants_are_computed_on_first_request():
+    cache = CatalogCache()
+    encoded = cache.get_encoded(lambda: [{"id": 1}], lambda products: repr(products).encode())
+
+    assert encoded._compressed == {}
+    assert gzip.decompress(encoded.compressed("gzip")) == encoded.body
+    assert set(encoded._compressed) == {"gzip"}
+
+
+def test_concurrent_requests_encode_the_catalog_once():
+    cache = CatalogCache()
+    calls = []
+
+    def slow_encoder(products):
+        calls.append(1)
+        time.sleep(0.05)
+        return b"[]"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_encoded(list, slow_encoder)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(encoded is results[0] for encoded in results)
+
+
+def test_catalog_etag_changes_with_catalog_version(client):
+    etag = client.get("/api/products").headers["ETag"]
+
+    db.connect(reuse_if_open=True)
+    try:
+        product = Product.get_by_id(1)
+        product.price = 12.0
+        product.save()
+    finally:
+        db.close()
+
+    response = client.get("/api/products", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["products"][0]["price"] == 12.0
@@ -0,0 +1,198 @@
+"""
+Tests de la synchronisation incrémentale du catalogue, contre un flux servi localement
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from inf349 import (
+    apply_product_changes, catalog_cache, create_app, db, http_client, import_products, load_products_by_id,
+    sync_products,
+    Product, Order,
+)
+from inf349.sync import BackgroundRefresher, CatalogSyncer, SuspiciousFeed, diff_products
+
+
+def make_product(product_id, **overrides):
+    product = {
+        "id": product_id,
+        "name": f"Produit {product_id}",
+        "description": "desc",
+        "price": 10.0,
+        "in_stock": True,
+        "weight": 400,
+        "image": f"{product_id}.jpg",
+    }
+    product.update(overrides)
+    return product
+
+
+class FeedServer:
+    """Flux de produits local qui gère ETag / If-None-Match."""
+
+    def __init__(self, products):
+        self.products = products
+        self.requests = []
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps({"products": feed.products}).encode("utf-8")
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                feed.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/products/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def feed():
+    server = FeedServer([make_product(1), make_product(2), make_product(3)])
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def app(tmp_path, feed):
+    path = str(tmp_path / "test_catalog_sync.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    import_products([make_product(1), make_product(2, price=99.0), make_product(4)])
+    db.close()
+
+    yield create_app({"TESTING": True, "DATABASE": path, "PRODUCTS_URL": feed.url})
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+def test_diff_products_reports_changed_and_removed():
+    current = {1: make_product(1), 2: make_product(2), 3: make_product(3, in_stock=False)}
+    incoming = [make_product(1), make_product(2, price=5.0), make_product(5)]
+
+    changed, removed_ids = diff_products(current, incoming)
+
+    assert [product["id"] for product in changed] == [2, 5]
+    assert removed_ids == []
+
+    changed, removed_ids = diff_products(current, [make_product(1)])
+    assert changed == []
+    assert removed_ids == [2]
+
+
+def test_sync_upserts_only_changed_rows_and_publishes_new_version(app):
+    syncer = app.extensions["catalog_sync"]
+    version = catalog_cache.version
+
+    assert sync_products(syncer) == 2
+
+    db.connect(reuse_if_open=True)
+    try:
+        assert Product.get_by_id(2).price == 10.0
+        assert Product.get_by_id(3).name == "Produit 3"
+        assert Product.get_by_id(4).in_stock is False
+    finally:
+        db.close()
+    assert catalog_cache.version > version
+    assert syncer.stats()["last_removed"] == 1
+
+
+@pytest.mark.parametrize("products", [[], [make_product(1)]])
+def test_empty_or_shrunken_feed_is_rejected_and_catalog_kept(app, feed, products):
+    # Panne partielle du fournisseur : 2 des 3 produits en stock disparaîtraient
+    feed.products = products
+    syncer = app.extensions["catalog_sync"]
+    version = catalog_cache.version
+
+    with pytest.raises(SuspiciousFeed):
+        sync_products(syncer)
+
+    db.connect(reuse_if_open=True)
+    try:
+        assert [product.id for product in Product.select().where(Product.in_stock)] == [1, 2, 4]
+    finally:
+        db.close()
+    assert catalog_cache.version == version
+    assert syncer.etag is None
+    assert syncer.stats()["errors"] == 1
+
+
+def test_sync_sends_conditional_request_and_skips_unchanged_feed(app, feed):
+    syncer = app.extensions["catalog_sync"]
+    sync_products(syncer)
+    version = catalog_cache.version
+
+    assert sync_products(syncer) == 0
+    assert feed.requests[0] is None
+    assert feed.requests[1] == syncer.etag
+    assert syncer.stats()["not_modified"] == 1
+    assert catalog_cache.version == version
+
+    feed.products = [make_product(1, in_stock=False), make_product(2), make_product(3)]
+    assert sync_products(syncer) == 1
+
+
+def test_feed_already_applied_by_another_process_still_invalidates_the_cache(app, feed):
+    other_worker = CatalogSyncer(feed.url, load_products_by_id, apply_product_changes)
+    syncer = app.extensions["catalog_sync"]
+    sync_products(syncer)
+
+    feed.products = [make_product(1, price=42.0), make_product(2), make_product(3)]
+    assert sync_products(other_worker) == 1
+    version = catalog_cache.version
+
+    assert sync_products(syncer) == 0
+    assert syncer.stats()["not_modified"] == 0
+    assert catalog_cache.version > version
+
+
+def test_sync_uses_the_application_http_client(app, feed):
+    sync_products(app.extensions["catalog_sync"])
+    sync_products(app.extensions["catalog_sync"])
+
+    host = http_client.stats()["hosts"][f"http://127.0.0.1:{feed.server.server_port}"]
+    assert host["requests"] == 2
+
+
+def test_sync_stats_are_exposed_in_metrics(app):
+    sync_products(app.extensions["catalog_sync"])
+    with app.test_client() as client:
+        metrics = client.get("/api/metrics").get_json()
+    assert metrics["catalog_sync"]["runs"] == 1
+    assert metrics["catalog_sync"]["last_changed"] == 2
+
+
+def test_background_refresher_runs_periodically():
+    calls = []
+    refresher = BackgroundRefresher(lambda: calls.append(1), interval=0.01).start()
+    deadline = time.time() + 2
+    while len(calls) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    refresher.stop(timeout=1)
+    assert len(calls) >= 3
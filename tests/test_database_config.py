@@ -0,0 +1,53 @@
+import pytest
+
+from inf349 import create_app, db, Product, Order
+from inf349.database import DEFAULT_SQLITE_PRAGMAS
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "test_database_config.db")
+    app = create_app({"TESTING": True, "DATABASE": path})
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    db.close()
+    return app
+
+
+def test_create_app_binds_configured_database(app, tmp_path):
+    assert db.database == str(tmp_path / "test_database_config.db")
+    assert (tmp_path / "test_database_config.db").exists()
+
+
+def test_default_pragmas_are_applied_to_each_connection(app):
+    db.connect(reuse_if_open=True)
+    try:
+        assert db.execute_sql("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute_sql("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert db.execute_sql("PRAGMA cache_size").fetchone()[0] == DEFAULT_SQLITE_PRAGMAS["cache_size"]
+        assert db.execute_sql("PRAGMA busy_timeout").fetchone()[0] == DEFAULT_SQLITE_PRAGMAS["busy_timeout"]
+    finally:
+        db.close()
+
+
+def test_pragmas_can_be_overridden(tmp_path):
+    create_app({
+        "TESTING": True,
+        "DATABASE": str(tmp_path / "test_database_pragmas.db"),
+        "SQLITE_PRAGMAS": {"journal_mode": "delete", "busy_timeout": 250},
+    })
+    db.connect(reuse_if_open=True)
+    try:
+        assert db.execute_sql("PRAGMA journal_mode").fetchone()[0] == "delete"
+        assert db.execute_sql("PRAGMA busy_timeout").fetchone()[0] == 250
+    finally:
+        db.close()
+
+
+def test_orders_are_served_from_configured_database(app):
+    with app.test_client() as client:
+        response = client.post("/order", json={"product": {"id": 1, "quantity": 2}})
+        assert response.status_code == 302
+        assert client.get(response.headers["Location"]).status_code == 200
@@ -0,0 +1,105 @@
+"""
+Tests du mode pool de connexions SQLite
+"""
+import threading
+import time
+
+import pytest
+from playhouse.pool import MaxConnectionsExceeded
+
+from inf349 import create_app, db, Product, Order
+from inf349.database import InstrumentedPooledSqliteDatabase
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    original = db.obj
+    path = str(tmp_path / "test_database_pool.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    db.close()
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "DATABASE_POOL": True,
+        "DATABASE_POOL_MAX_CONNECTIONS": 2,
+    })
+    yield app
+
+    db.obj.close_all()
+    db.initialize(original)
+
+
+def test_requests_reuse_pooled_connections(pooled_app):
+    with pooled_app.test_client() as client:
+        for _ in range(3):
+            response = client.post("/order", json={"product": {"id": 1, "quantity": 1}})
+            assert response.status_code == 302
+    stats = db.obj.pool_stats()
+
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["checkouts"] == 3
+
+
+def test_connection_is_released_when_view_raises(pooled_app, monkeypatch):
+    def boom(*args, **kwargs):
+        raise RuntimeError("échec de la vue")
+
+    monkeypatch.setattr(Order, "create", boom)
+    pooled_app.testing = False
+    with pooled_app.test_client() as client:
+        response = client.post("/order", json={"product": {"id": 1, "quantity": 1}})
+        assert response.status_code == 500
+    assert db.obj.pool_stats()["checked_out"] == 0
+
+
+def test_pool_metrics_are_exposed(pooled_app):
+    with pooled_app.test_client() as client:
+        client.get("/order/1")
+        metrics = client.get("/api/metrics").get_json()
+    assert metrics["database_pool"]["max_connections"] == 2
+    assert metrics["database_pool"]["checkouts"] >= 1
+
+
+def test_pool_counts_waits_and_timeouts(tmp_path):
+    pool = InstrumentedPooledSqliteDatabase(str(tmp_path / "pool.db"), max_connections=1, timeout=0.2)
+    pool.connect()
+    released = threading.Event()
+
+    def borrow():
+        pool.connect()
+        pool.close()
+        released.set()
+
+    thread = threading.Thread(target=borrow)
+    thread.start()
+    time.sleep(0.05)
+    pool.close()
+    thread.join(2)
+    assert released.is_set()
+
+    pool.connect()
+    errors = []
+
+    def borrow_too_long():
+        try:
+            pool.connect()
+        except MaxConnectionsExceeded as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=borrow_too_long)
+    thread.start()
+    thread.join(2)
+    pool.close()
+
+    stats = pool.pool_stats()
+    assert len(errors) == 1
+    assert stats["waits"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["wait_time_ms"] > 0
+    pool.close_all()
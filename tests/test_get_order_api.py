@@ -61,7 +61,7 @@ def client():
     )
     db.close()
 
-    app = create_app({"TESTING": True})
+    app = create_app({"TESTING": True, "DATABASE": path})
     with app.test_client() as test_client:
         yield test_client
 
@@ -0,0 +1,156 @@
+import threading
+
+import pytest
+from peewee import IntegerField, IntegrityError, Model, SqliteDatabase
+
+from inf349 import create_app, db, order_cache, order_writer, Order, Product
+from inf349.writer import GroupCommitWriter
+
+
+@pytest.fixture
+def database(tmp_path):
+    db_file = SqliteDatabase(str(tmp_path / "test_group_commit_unit.db"))
+
+    class Item(Model):
+        value = IntegerField(unique=True)
+
+        class Meta:
+            database = db_file
+
+    db_file.create_tables([Item])
+    db_file.close()
+    yield db_file, Item
+
+
+def test_writes_are_committed_together_and_return_results(database):
+    database, Item = database
+    writer = GroupCommitWriter(database, max_delay=0.2)
+    try:
+        futures = [writer.submit(lambda value=value: Item.create(value=value).id) for value in range(5)]
+        ids = [future.result(timeout=5) for future in futures]
+    finally:
+        writer.stop()
+
+    assert ids == [1, 2, 3, 4, 5]
+    assert writer.stats()["batches"] == 1
+    assert writer.stats()["max_batch"] == 5
+    with database.connection_context():
+        assert Item.select().count() == 5
+
+
+def test_failed_write_is_rolled_back_alone(database):
+    database, Item = database
+    writer = GroupCommitWriter(database, max_delay=0.2)
+    try:
+        first = writer.submit(lambda: Item.create(value=1))
+        duplicate = writer.submit(lambda: Item.create(value=1))
+        last = writer.submit(lambda: Item.create(value=2))
+
+        assert first.result(timeout=5).value == 1
+        with pytest.raises(IntegrityError):
+            duplicate.result(timeout=5)
+        assert last.result(timeout=5).value == 2
+    finally:
+        writer.stop()
+
+    with database.connection_context():
+        assert sorted(item.value for item in Item.select()) == [1, 2]
+
+
+def test_batch_size_is_bounded(database):
+    database, Item = database
+    release = threading.Event()
+    writer = GroupCommitWriter(database, max_batch=3, max_delay=0.2)
+    try:
+        # Bloque le thread d'écriture pendant que les autres écritures s'accumulent
+        blocker = writer.submit(release.wait)
+        futures = [writer.submit(lambda value=value: Item.create(value=value)) for value in range(7)]
+        release.set()
+        blocker.result(timeout=5)
+        for future in futures:
+            future.result(timeout=5)
+    finally:
+        writer.stop()
+
+    assert writer.stats()["max_batch"] == 3
+    assert writer.stats()["writes"] == 8
+
+
+def test_stop_commits_pending_writes(database):
+    database, Item = database
+    writer = GroupCommitWriter(database, max_delay=10)
+    future = writer.submit(lambda: Item.create(value=42))
+    writer.stop(timeout=5)
+
+    assert future.result(timeout=0).value == 42
+    with pytest.raises(RuntimeError):
+        writer.submit(lambda: None)
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "test_group_commit.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    db.close()
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "ORDER_GROUP_COMMIT": True,
+        "ORDER_GROUP_COMMIT_DELAY": 0.05,
+        "ORDER_CACHE": True,
+    })
+    yield app
+    order_writer.configure()
+
+
+def test_concurrent_orders_share_transactions(app):
+    locations = []
+    lock = threading.Lock()
+
+    def place_order():
+        with app.test_client() as client:
+            response = client.post("/order", json={"product": {"id": 1, "quantity": 1}})
+            assert response.status_code == 302
+            with lock:
+                locations.append(response.headers["Location"])
+
+    threads = [threading.Thread(target=place_order) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(locations)) == 10
+    with app.test_client() as client:
+        for location in locations:
+            assert client.get(location).status_code == 200
+        stats = client.get("/api/metrics").get_json()["order_writer"]
+
+    assert stats[0]["writes"] == 10
+    assert stats[0]["batches"] < 10
+
+
+def test_updates_go_through_the_writer_and_refresh_the_cache(app):
+    with app.test_client() as client:
+        location = client.post("/order", json={"product": {"id": 1, "quantity": 2}}).headers["Location"]
+        order_id = int(location.rsplit("/", 1)[-1])
+        assert order_id in order_cache
+
+        response = client.put(location, json={"order": {
+            "email": "client@example.com",
+            "shipping_information": {
+                "country": "Canada", "address": "1 rue du Test", "postal_code": "G7X 3Y7",
+                "city": "Chicoutimi", "province": "QC",
+            },
+        }})
+        assert response.status_code == 200
+        assert client.get(location).get_json()["order"]["email"] == "client@example.com"
+        assert client.get("/api/metrics").get_json()["order_writer"][0]["writes"] == 2
+
+    with db.connection_context():
+        assert Order.get_by_id(order_id).email == "client@example.com"
@@ -0,0 +1,204 @@
+"""
+Tests du client HTTP keep-alive, contre un serveur HTTP/1.1 local
+"""
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import error as urllib_error
+
+import pytest
+
+import inf349
+from inf349 import create_app, http_get_json, http_post_json, stream_products_from_remote
+from inf349.http_client import ConnectError, HTTPClient, is_connect_failure
+
+
+class EchoServer:
+    """Répond en JSON avec le corps reçu ; note le port client de chaque requête."""
+
+    def __init__(self):
+        self.client_ports = []
+        self.status = 200
+        self.close_after_response = False
+        self.announce_close = False
+        self.connection_closed = threading.Event()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, payload):
+                server.client_ports.append(self.client_address[1])
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if server.announce_close:
+                    self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(body)
+                if server.close_after_response:
+                    # Fermeture sans prévenir, comme un keep-alive expiré côté serveur
+                    self.close_connection = True
+
+            def do_GET(self):
+                self._respond({"products": [{"id": 1}], "path": self.path})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond({"received": json.loads(self.rfile.read(length) or b"{}")})
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            def shutdown_request(self, request):
+                super().shutdown_request(request)
+                server.connection_closed.set()
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/pay/"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    echo = EchoServer()
+    yield echo
+    echo.close()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "test.sqlite")})
+    yield app
+    inf349.http_client.close()
+
+
+def test_requests_reuse_the_same_connection(app, server):
+    for index in range(3):
+        response = http_post_json(server.url, {"index": index})
+        assert response.status_code == 200
+        assert response.json() == {"received": {"index": index}}
+
+    assert len(set(server.client_ports)) == 1
+    host = inf349.http_client.stats()["hosts"][f"http://127.0.0.1:{server.server.server_port}"]
+    assert host["requests"] == 3
+    assert host["connections_opened"] == 1
+    assert host["connections_reused"] == 2
+    assert host["latency_ms"]["p99"] is not None
+
+
+def test_error_status_is_returned_for_post_and_raised_for_get(app, server):
+    server.status = 422
+    response = http_post_json(server.url, {"a": 1})
+    assert response.status_code == 422
+    assert response.json() == {"received": {"a": 1}}
+
+    with pytest.raises(urllib_error.HTTPError) as excinfo:
+        http_get_json(server.url)
+    assert excinfo.value.code == 422
+
+
+def test_get_json_parses_the_body(app, server):
+    assert http_get_json(server.url + "?page=2") == {"products": [{"id": 1}], "path": "/pay/?page=2"}
+
+
+def test_connection_close_header_is_honoured(app, server):
+    server.announce_close = True
+    http_post_json(server.url, {})
+    http_post_json(server.url, {})
+
+    assert len(set(server.client_ports)) == 2
+    assert inf349.http_client.stats()["idle_connections"] == 0
+
+
+def test_connection_closed_by_server_is_not_reused(app, server):
+    server.close_after_response = True
+    assert http_post_json(server.url, {"a": 1}).status_code == 200
+    assert server.connection_closed.wait(5)
+    # La connexion est revenue au pool mais le serveur l'a fermée : un POST
+    # ne doit pas être envoyé dessus
+    assert http_post_json(server.url, {"a": 2}).json() == {"received": {"a": 2}}
+    assert len(set(server.client_ports)) == 2
+
+
+def test_idle_connections_are_capped_by_pool_size(server):
+    client = HTTPClient(pool_size=1)
+    results = []
+
+    def call():
+        results.append(client.request("GET", server.url).status)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [200] * 4
+    assert client.stats()["idle_connections"] <= 1
+    client.close()
+
+
+def test_streamed_response_returns_to_the_pool_only_when_fully_read(server):
+    client = HTTPClient()
+    for _ in range(2):
+        with client.stream("GET", server.url) as response:
+            assert json.loads(response.read())["products"] == [{"id": 1}]
+    assert len(set(server.client_ports)) == 1
+    assert client.stats()["idle_connections"] == 1
+
+    with client.stream("GET", server.url) as response:
+        response.read(1)
+    assert client.stats()["idle_connections"] == 0
+
+
+def test_products_feed_is_streamed_through_the_pooled_client(app, server):
+    for _ in range(2):
+        assert stream_products_from_remote(list, url=server.url) == [{"id": 1}]
+
+    host = inf349.http_client.stats()["hosts"][f"http://127.0.0.1:{server.server.server_port}"]
+    assert host["requests"] == 2
+    assert host["connections_reused"] == 1
+
+
+def test_network_errors_are_raised_as_url_error():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    client = HTTPClient()
+    with pytest.raises(ConnectError) as excinfo:
+        client.request("POST", f"http://127.0.0.1:{port}/pay/", body=b"{}")
+    assert is_connect_failure(excinfo.value)
+    with pytest.raises(urllib_error.URLError):
+        client.request("GET", "ftp://example.com/")
+
+    host = client.stats()["hosts"][f"http://127.0.0.1:{port}"]
+    assert host["errors"] == 1
+
+
+def test_read_timeout_raises_timeout_error():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    try:
+        client = HTTPClient()
+        with pytest.raises(TimeoutError):
+            client.request("GET", f"http://127.0.0.1:{listener.getsockname()[1]}/", timeout=0.2)
+    finally:
+        listener.close()
+
+
+def test_metrics_expose_http_client(app, server):
+    http_post_json(server.url, {})
+    metrics = app.test_client().get("/api/metrics").get_json()
+    assert metrics["http_client"]["pool_size"] == 4
+    assert len(metrics["http_client"]["hosts"]) == 1
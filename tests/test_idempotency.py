@@ -0,0 +1,245 @@
+"""
+Tests de l'en-tête Idempotency-Key sur PUT /order/<id>
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib import error as urllib_error
+
+import pytest
+
+import inf349
+from inf349 import create_app, db, idempotency_keys, payment_queue, IdempotencyKey, Order, Product
+from inf349.idempotency import request_fingerprint
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+PAID_RESPONSE = FakeResponse(200, {
+    "credit_card": {"name": "John Doe", "first_digits": "4242", "last_digits": "4242",
+                    "expiration_year": 2027, "expiration_month": 9},
+    "transaction": {"id": "txn_1", "success": True, "amount_charged": 2500},
+})
+
+
+def make_app(tmp_path, **config):
+    app = create_app(dict({"TESTING": True, "DATABASE": str(tmp_path / "test.sqlite")}, **config))
+    with app.app_context():
+        db.connect(reuse_if_open=True)
+        db.create_tables([Product, Order, IdempotencyKey])
+        Product.create(id=1, name="Produit", description="desc", price=10.0, in_stock=True, weight=400, image="1.jpg")
+        Order.create(
+            id=1, product_id=1, quantity=2, total_price=20.0, shipping_price=5.0, total_price_tax=23.0,
+            email="john@example.com", shipping_country="Canada", shipping_address="1 rue du Test",
+            shipping_postal_code="G7X 3Y7", shipping_city="Chicoutimi", shipping_province="QC",
+        )
+        db.close()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(tmp_path)
+
+
+@pytest.fixture
+def remote_calls(monkeypatch):
+    calls = []
+
+    def fake_post(url, payload, timeout=10, extra_headers=None):
+        calls.append(payload)
+        return PAID_RESPONSE
+
+    monkeypatch.setattr(inf349, "http_post_json", fake_post)
+    return calls
+
+
+def credit_card_payload(**overrides):
+    card = {
+        "name": "John Doe",
+        "number": "4242 4242 4242 4242",
+        "expiration_year": 2027,
+        "expiration_month": 9,
+        "cvv": "123",
+    }
+    card.update(overrides)
+    return {"credit_card": card}
+
+
+def put_payment(client, key, payload=None):
+    return client.put("/order/1", json=payload or credit_card_payload(), headers={"Idempotency-Key": key})
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint("PUT", "/order/1", {"a": 1, "b": 2}) == request_fingerprint("PUT", "/order/1", {"b": 2, "a": 1})
+    assert request_fingerprint("PUT", "/order/1", {"a": 1}) != request_fingerprint("PUT", "/order/2", {"a": 1})
+
+
+def test_duplicate_key_replays_the_stored_response(app, remote_calls):
+    client = app.test_client()
+    first = put_payment(client, "key-1")
+    second = put_payment(client, "key-1")
+
+    assert first.status_code == second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(remote_calls) == 1
+    assert client.get("/api/metrics").get_json()["idempotency"]["replayed"] == 1
+
+
+def test_without_key_a_retry_is_not_replayed(app, remote_calls):
+    client = app.test_client()
+    client.put("/order/1", json=credit_card_payload())
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.get_json()["errors"]["order"]["code"] == "already-paid"
+
+
+def test_key_reused_with_another_payload_is_rejected(app, remote_calls):
+    client = app.test_client()
+    put_payment(client, "key-1")
+    response = put_payment(client, "key-1", credit_card_payload(cvv="456"))
+
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["idempotency_key"]["code"] == "idempotency-key-reused"
+    assert len(remote_calls) == 1
+
+
+def test_invalid_key_is_rejected(app, remote_calls):
+    response = put_payment(app.test_client(), " ")
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["idempotency_key"]["code"] == "invalid-idempotency-key"
+    assert remote_calls == []
+
+
+def test_server_errors_are_not_stored(app, monkeypatch):
+    responses = [urllib_error.URLError("connection refused"), PAID_RESPONSE]
+
+    def flaky_post(*args, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(inf349, "http_post_json", flaky_post)
+    client = app.test_client()
+
+    assert put_payment(client, "key-1").status_code == 503
+    retry = put_payment(client, "key-1")
+
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert retry.get_json()["order"]["paid"] is True
+
+
+def test_concurrent_duplicate_waits_for_the_first_attempt(app, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_post(*args, **kwargs):
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return PAID_RESPONSE
+
+    monkeypatch.setattr(inf349, "http_post_json", slow_post)
+    responses = []
+
+    def send():
+        responses.append(put_payment(app.test_client(), "key-1"))
+
+    first = threading.Thread(target=send)
+    first.start()
+    assert started.wait(5)
+    second = threading.Thread(target=send)
+    second.start()
+    deadline = time.monotonic() + 5
+    while idempotency_keys.stats()["waited"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(calls) == 1
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].get_json() == responses[1].get_json()
+    assert sorted(response.headers.get("Idempotent-Replayed", "") for response in responses) == ["", "true"]
+
+
+def reserve_key(key, created_at):
+    # Réservation laissée sans réponse par un autre processus
+    fingerprint = request_fingerprint("PUT", "/order/1", credit_card_payload())
+    with db.connection_context():
+        IdempotencyKey.create(key=key, fingerprint=fingerprint, created_at=created_at)
+
+
+def test_reservation_abandoned_by_a_stopped_process_is_taken_over(tmp_path, remote_calls):
+    app = make_app(tmp_path, IDEMPOTENCY_WAIT_TIMEOUT=0.2)
+    client = app.test_client()
+    # Plus ancienne que l'attente maximale, mais encore dans le bail (IDEMPOTENCY_LEASE)
+    reserve_key("key-fresh", datetime.utcnow() - timedelta(minutes=1))
+    reserve_key("key-stale", datetime.utcnow() - timedelta(hours=1))
+
+    response = put_payment(client, "key-fresh")
+    assert response.status_code == 409
+    assert remote_calls == []
+
+    response = put_payment(client, "key-stale")
+    assert response.status_code == 200
+    assert response.get_json()["order"]["paid"] is True
+    assert len(remote_calls) == 1
+    assert put_payment(client, "key-stale").headers["Idempotent-Replayed"] == "true"
+
+
+def test_request_whose_reservation_was_taken_over_does_not_overwrite_it(app):
+    def handler():
+        # Bail expiré pendant la requête : un autre processus a repris la clé et répondu
+        IdempotencyKey.delete().execute()
+        IdempotencyKey.create(key="key-1", fingerprint="f", status_code=201, response_body="autre",
+                              response_headers="{}", created_at=datetime.utcnow() + timedelta(seconds=1))
+        return 200, "premier", {}
+
+    with app.app_context(), db.connection_context():
+        stored = idempotency_keys.execute("key-1", "f", handler)
+        row = IdempotencyKey.get_by_id("key-1")
+
+    assert stored.body == "premier"
+    assert (row.status_code, row.response_body) == (201, "autre")
+
+
+def test_expired_keys_are_purged(app, remote_calls):
+    with db.connection_context():
+        IdempotencyKey.create(key="old", fingerprint="f", status_code=200, response_body="{}",
+                              response_headers="{}", created_at=datetime.utcnow() - timedelta(days=2))
+
+    assert put_payment(app.test_client(), "key-1").status_code == 200
+
+    with db.connection_context():
+        assert [row.key for row in IdempotencyKey.select()] == ["key-1"]
+    assert idempotency_keys.stats()["purged"] == 1
+
+
+def test_accepted_async_payment_is_replayed_with_its_location(tmp_path, remote_calls):
+    app = make_app(tmp_path, PAYMENT_ASYNC=True)
+    client = app.test_client()
+    try:
+        first = put_payment(client, "key-async")
+        payment_queue.join()
+        second = put_payment(client, "key-async")
+    finally:
+        payment_queue.configure()
+
+    assert first.status_code == second.status_code == 202
+    assert second.headers["Location"] == first.headers["Location"]
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert len(remote_calls) == 1
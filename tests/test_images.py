@@ -0,0 +1,85 @@
+"""
+Tests du pipeline d'images responsive (variantes, manifeste et balise <picture>)
+"""
+import os
+
+import pytest
+
+from inf349 import create_app, db, Product, Order
+from inf349.images import ImageManifest, build_image_variants, render_responsive_image
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def images_dir(tmp_path):
+    Image.new("RGB", (600, 400), (200, 30, 30)).save(tmp_path / "1.jpg", quality=95)
+    Image.new("RGB", (200, 100), (30, 30, 200)).save(tmp_path / "2.jpg", quality=95)
+    return tmp_path
+
+
+def test_build_image_variants_writes_content_hashed_files(images_dir):
+    manifest = build_image_variants(str(images_dir), widths=(160, 320), output=lambda message: None)
+
+    entry = manifest["1.jpg"]
+    assert (entry["width"], entry["height"]) == (600, 400)
+    assert [width for width, _ in entry["variants"]["jpeg"]] == [160, 320, 600]
+    assert [width for width, _ in manifest["2.jpg"]["variants"]["jpeg"]] == [160, 200]
+
+    for variants in entry["variants"].values():
+        for _, path in variants:
+            name = os.path.basename(path)
+            stem, digest, extension = name.split(".")
+            assert stem.startswith("1-") and len(digest) == 12
+            assert (images_dir / path).exists()
+
+    assert (images_dir / "variants" / "manifest.json").exists()
+
+
+def test_build_image_variants_removes_stale_files(images_dir):
+    build_image_variants(str(images_dir), widths=(160,), output=lambda message: None)
+    stale = images_dir / "variants" / "old-160w.000000000000.jpg"
+    stale.write_bytes(b"old")
+
+    build_image_variants(str(images_dir), widths=(160,), output=lambda message: None)
+    assert not stale.exists()
+
+
+def test_render_responsive_image_emits_picture_with_srcset(images_dir):
+    build_image_variants(str(images_dir), widths=(160, 320), output=lambda message: None)
+    html = render_responsive_image(ImageManifest(str(images_dir)), lambda path: f"/static/images/{path}", "1.jpg", 'Chaise "bois"')
+
+    assert html.startswith("<picture>")
+    assert 'type="image/webp"' in html
+    assert " 160w, " in html and " 600w" in html
+    assert 'sizes="(max-width: 640px) 100vw' in html
+    assert 'loading="lazy"' in html
+    assert 'width="600" height="400"' in html
+    assert 'alt="Chaise &#34;bois&#34;"' in html
+
+
+def test_render_responsive_image_falls_back_without_variants(images_dir):
+    html = render_responsive_image(ImageManifest(str(images_dir)), lambda path: f"/static/images/{path}", "3.jpg", "Lampe", lazy=False)
+    assert html == '<img src="/static/images/3.jpg" alt="Lampe" loading="eager" decoding="async">'
+
+
+def test_catalog_page_lazy_loads_images_below_the_fold(tmp_path):
+    path = str(tmp_path / "test_images.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    for product_id in range(1, 6):
+        Product.create(id=product_id, name=f"Produit {product_id}", description="desc", price=1.0,
+                       in_stock=True, weight=100, image=f"{product_id}.jpg")
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path})
+    with app.test_client() as client:
+        html = client.get("/ui/products").get_data(as_text=True)
+
+    assert html.count('loading="eager"') == 3
+    assert html.count('loading="lazy"') == 2
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
@@ -0,0 +1,110 @@
+import pytest
+
+from inf349 import create_app, create_schema, db, Order, Product
+from inf349.migrations import (
+    ORDER_CREATED_AT_INDEX,
+    ORDER_INDEXES,
+    ORDER_PROVINCE_INDEX,
+    get_schema_version,
+    latest_version,
+    migrate_database,
+    migration,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "test_migrations.db")})
+    db.connect(reuse_if_open=True)
+    yield app
+    db.close()
+
+
+def order_index_names():
+    return {index.name for index in db.get_indexes("order")}
+
+
+def create_legacy_schema():
+    # Schéma d'avant les migrations : sans index secondaires, created_at ni état du paiement, user_version à 0
+    db.create_tables([Product, Order])
+    for name in order_index_names():
+        db.execute_sql(f'DROP INDEX "{name}"')
+    for column in ("created_at", "payment_status", "payment_error", "payment_claimed_at"):
+        db.execute_sql(f'ALTER TABLE "order" DROP COLUMN {column}')
+    db.execute_sql(
+        'INSERT INTO "order" (product_id, quantity, email, paid) VALUES (?, ?, ?, ?)',
+        (1, 2, "client@example.com", False),
+    )
+
+
+def expected_index_names():
+    return {"order_" + "_".join(columns) for columns in ORDER_INDEXES + (ORDER_CREATED_AT_INDEX, ORDER_PROVINCE_INDEX)}
+
+
+def test_migrations_add_order_indexes_to_existing_database(app):
+    create_legacy_schema()
+    assert get_schema_version(db) == 0
+    assert order_index_names() == set()
+
+    applied = create_schema()
+
+    assert applied == [1, 2, 3, 4, 5, 6]
+    assert get_schema_version(db) == latest_version()
+    assert order_index_names() == expected_index_names()
+    legacy_order = Order.get(Order.email == "client@example.com")
+    assert legacy_order.quantity == 2
+    assert legacy_order.created_at is None
+    assert legacy_order.payment_status is None
+
+    plan = " ".join(str(row) for row in db.execute_sql(
+        'EXPLAIN QUERY PLAN SELECT * FROM "order" WHERE email = ?', ("client@example.com",)
+    ).fetchall())
+    assert "order_email" in plan
+
+
+def test_new_database_is_created_at_latest_version(app):
+    create_schema()
+
+    assert get_schema_version(db) == latest_version()
+    assert order_index_names() == expected_index_names()
+    assert create_schema() == []
+
+
+def test_migrations_are_applied_in_order_and_only_once(app):
+    calls = []
+    migrations = [
+        (1, "première", lambda migrator, database: calls.append(1)),
+        (2, "deuxième", lambda migrator, database: calls.append(2)),
+    ]
+
+    assert migrate_database(db, migrations) == [1, 2]
+    assert migrate_database(db, migrations) == []
+    assert calls == [1, 2]
+    assert get_schema_version(db) == 2
+
+
+def test_failed_migration_is_rolled_back(app):
+    def broken(migrator, database):
+        database.execute_sql("CREATE TABLE partial (id INTEGER)")
+        raise RuntimeError("échec")
+
+    with pytest.raises(RuntimeError):
+        migrate_database(db, [(1, "cassée", broken)])
+
+    assert get_schema_version(db) == 0
+    assert not db.table_exists("partial")
+
+
+def test_migration_versions_must_be_consecutive():
+    with pytest.raises(ValueError):
+        migration(latest_version() + 2, "trou dans la numérotation")(lambda migrator, database: None)
+
+
+def test_migrate_db_command(app):
+    create_legacy_schema()
+    db.close()
+
+    result = app.test_cli_runner().invoke(args=["migrate-db"])
+
+    assert "Applied migration 1" in result.output
+    assert f"Database schema at version {latest_version()}" in result.output
@@ -0,0 +1,136 @@
+import pytest
+
+import inf349
+from inf349 import create_app, db, order_cache, Order, Product
+from inf349.cache import OrderCache
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def json(self):
+        return {
+            "credit_card": {"name": "John Doe", "first_digits": "4242", "last_digits": "4242",
+                            "expiration_year": 2030, "expiration_month": 9},
+            "transaction": {"id": "txn-1", "success": True, "amount_charged": 2800},
+        }
+
+
+SHIPPING_INFORMATION = {
+    "country": "Canada", "address": "1 rue du Test", "postal_code": "G7X 3Y7",
+    "city": "Chicoutimi", "province": "QC",
+}
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_order_cache.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    Order.create(id=1, product_id=1, quantity=2, total_price=20.0,
+                 total_price_tax=20.0, shipping_price=5.0)
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "ORDER_CACHE": True})
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def get_order(client, order_id=1):
+    response = client.get(f"/order/{order_id}")
+    assert response.status_code == 200
+    return response.get_json()["order"]
+
+
+def test_order_is_served_from_cache_without_database(client, monkeypatch):
+    get_order(client)
+
+    def fail_connect(*args, **kwargs):
+        raise AssertionError("database should not be used")
+
+    monkeypatch.setattr(db.obj, "connect", fail_connect)
+    assert get_order(client)["id"] == 1
+    assert order_cache.stats()["hits"] == 1
+
+
+def test_created_order_is_written_to_cache(client):
+    response = client.post("/order", json={"product": {"id": 1, "quantity": 1}})
+    order_id = int(response.headers["Location"].rsplit("/", 1)[-1])
+
+    assert order_id in order_cache
+    assert get_order(client, order_id)["total_price"] == 10.0
+    assert order_cache.stats()["misses"] == 0
+
+
+def test_client_update_refreshes_cached_order(client):
+    assert get_order(client)["email"] is None
+
+    response = client.put("/order/1", json={"order": {
+        "email": "client@example.com", "shipping_information": SHIPPING_INFORMATION,
+    }})
+    assert response.status_code == 200
+
+    order = get_order(client)
+    assert order["email"] == "client@example.com"
+    assert order["shipping_information"]["province"] == "QC"
+    assert order_cache.stats()["misses"] == 1
+
+
+def test_payment_refreshes_cached_order(client, monkeypatch):
+    client.put("/order/1", json={"order": {
+        "email": "client@example.com", "shipping_information": SHIPPING_INFORMATION,
+    }})
+    assert get_order(client)["paid"] is False
+
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: FakeResponse())
+    response = client.put("/order/1", json={"credit_card": {
+        "name": "John Doe", "number": "4242 4242 4242 4242",
+        "expiration_year": 2030, "expiration_month": 9, "cvv": "123",
+    }})
+    assert response.status_code == 200
+
+    order = get_order(client)
+    assert order["paid"] is True
+    assert order["transaction"]["id"] == "txn-1"
+
+
+def test_unknown_order_is_not_cached(client):
+    assert client.get("/order/999").status_code == 404
+    assert 999 not in order_cache
+    assert client.get("/order/999").status_code == 404
+
+
+def test_stale_load_is_not_cached():
+    cache = OrderCache()
+    cache.configure(maxsize=8)
+
+    def load_while_writing():
+        cache.put(1, {"id": 1, "paid": True})
+        return {"id": 1, "paid": False}
+
+    assert cache.get(1, load_while_writing) == {"id": 1, "paid": False}
+    assert cache.get(1, lambda: None) == {"id": 1, "paid": True}
+
+
+def test_order_cache_can_be_disabled(tmp_path):
+    path = str(tmp_path / "test_order_cache_disabled.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Order.create(id=1, product_id=1, quantity=1, total_price=10.0)
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "ORDER_CACHE": False})
+    with app.test_client() as test_client:
+        assert get_order(test_client)["id"] == 1
+        assert test_client.get("/api/metrics").get_json()["order_cache"] is None
+
+
+def test_order_cache_is_off_by_default(tmp_path):
+    # Invalidation propre au processus : à activer seulement avec un seul processus écrivain
+    create_app({"TESTING": True, "DATABASE": str(tmp_path / "test_order_cache_default.db")})
+    assert not order_cache.enabled
@@ -0,0 +1,183 @@
+import os
+
+import pytest
+
+from inf349 import create_app, db, load_order, order_shards, Order, Product
+from inf349.sharding import (
+    MAX_SHARDS,
+    MIN_SHARDED_ID,
+    OrderShards,
+    SnowflakeGenerator,
+    WorkerIdLock,
+    shard_of,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "test_order_sharding.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    # Commande créée avant l'activation du sharding (id AutoField)
+    Order.create(product_id=1, quantity=1, total_price=10.0, total_price_tax=10.0, shipping_price=5.0)
+    db.close()
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "ORDER_SHARDS": 3,
+        "ORDER_SHARD_DATABASE": str(tmp_path / "orders-{shard}.db"),
+        "ORDER_ID_WORKER": 7,
+    })
+    yield app
+    order_shards.configure([])
+
+
+def create_order(client):
+    response = client.post("/order", json={"product": {"id": 1, "quantity": 2}})
+    assert response.status_code == 302
+    return int(response.headers["Location"].rsplit("/", 1)[-1])
+
+
+def test_snowflake_ids_are_unique_and_encode_the_shard():
+    now = [1767225600.0]
+
+    def clock():
+        now[0] += 0.0001
+        return now[0]
+
+    generator = SnowflakeGenerator(worker_id=5, clock=clock)
+    ids = [generator.next_id(shard % 4) for shard in range(1000)]
+
+    assert len(set(ids)) == len(ids)
+    # Exacts dans un nombre JavaScript
+    assert all(MIN_SHARDED_ID <= order_id < 2 ** 53 for order_id in ids)
+    assert [shard_of(order_id) for order_id in ids[:8]] == [0, 1, 2, 3, 0, 1, 2, 3]
+
+
+def test_snowflake_ids_increase_with_time():
+    now = [1767225600.0]
+    generator = SnowflakeGenerator(worker_id=0, clock=lambda: now[0])
+    first = generator.next_id(MAX_SHARDS - 1)
+    now[0] += 0.001
+    assert generator.next_id(0) > first
+
+
+def test_invalid_worker_or_shard_is_rejected():
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(worker_id=16)
+    with pytest.raises(ValueError):
+        SnowflakeGenerator(worker_id=0).next_id(MAX_SHARDS)
+
+
+def test_each_process_reserves_its_own_worker_id(tmp_path):
+    first = WorkerIdLock(str(tmp_path))
+    second = WorkerIdLock(str(tmp_path))
+    try:
+        assert first.worker_id != second.worker_id
+        with pytest.raises(ValueError):
+            WorkerIdLock(str(tmp_path), worker_id=first.worker_id)
+    finally:
+        second.release()
+
+    again = WorkerIdLock(str(tmp_path), worker_id=second.worker_id)
+    assert again.worker_id == second.worker_id
+    again.release()
+    first.release()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_forked_process_reserves_its_own_worker_id(tmp_path):
+    # Serveur pre-fork avec préchargement : les shards sont configurés avant le fork
+    shards = OrderShards(Order)
+    shards.configure([str(tmp_path / "orders-0.db")])
+    parent_worker = shards.generator.worker_id
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            shards.allocate()
+            os.write(write_end, str(shards.generator.worker_id).encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    child_worker = int(os.read(read_end, 16))
+    os.close(read_end)
+    os.waitpid(pid, 0)
+
+    assert child_worker != parent_worker
+    shards.allocate()
+    assert shards.generator.worker_id == parent_worker
+    shards.configure([])
+
+
+def test_configured_worker_id_already_taken_fails_at_startup(app, tmp_path):
+    taken = WorkerIdLock(str(tmp_path), worker_id=3)
+    try:
+        with pytest.raises(ValueError):
+            create_app({
+                "TESTING": True,
+                "DATABASE": str(tmp_path / "test_order_sharding.db"),
+                "ORDER_SHARDS": 2,
+                "ORDER_SHARD_DATABASE": str(tmp_path / "orders-{shard}.db"),
+                "ORDER_ID_WORKER": 3,
+            })
+    finally:
+        taken.release()
+
+
+def test_orders_are_spread_across_shard_files(app, tmp_path):
+    with app.test_client() as client:
+        order_ids = [create_order(client) for _ in range(6)]
+
+    assert sorted(shard_of(order_id) for order_id in order_ids) == [0, 0, 1, 1, 2, 2]
+    for shard, model in enumerate(order_shards.models):
+        assert model._meta.database.database == str(tmp_path / f"orders-{shard}.db")
+        with model._meta.database.connection_context():
+            assert model.select().count() == 2
+
+    with db.connection_context():
+        assert Order.select().count() == 1
+
+
+def test_orders_are_routed_by_id_for_reads_and_updates(app):
+    with app.test_client() as client:
+        order_id = create_order(client)
+
+        response = client.get(f"/order/{order_id}")
+        assert response.status_code == 200
+        assert response.get_json()["order"]["id"] == order_id
+
+        response = client.put(f"/order/{order_id}", json={"order": {
+            "email": "client@example.com",
+            "shipping_information": {
+                "country": "Canada", "address": "201, rue Président-Kennedy",
+                "postal_code": "G7X 3Y7", "city": "Chicoutimi", "province": "QC",
+            },
+        }})
+        assert response.status_code == 200
+
+    assert load_order(order_id).email == "client@example.com"
+    assert isinstance(load_order(order_id), Order)
+
+
+def test_orders_created_before_sharding_stay_readable(app):
+    with app.test_client() as client:
+        response = client.get("/order/1")
+        assert response.status_code == 200
+        assert response.get_json()["order"]["id"] == 1
+
+        assert client.get(f"/order/{MIN_SHARDED_ID + 1}").status_code == 404
+
+
+def test_shard_stats_in_metrics(app):
+    with app.test_client() as client:
+        create_order(client)
+        stats = client.get("/api/metrics").get_json()["order_shards"]
+
+    assert stats["shards"] == 3
+    assert stats["worker_id"] == 7
+    assert sum(stats["writes"]) == 1
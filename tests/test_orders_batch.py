@@ -0,0 +1,140 @@
+import pytest
+
+from inf349 import create_app, db, order_shards, Order, Product
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "test_orders_batch.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit en stock", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    Product.create(id=2, name="Produit hors stock", description="desc", price=20.0,
+                   in_stock=False, weight=600, image="2.jpg")
+    Product.create(id=3, name="Produit lourd", description="desc", price=5.5,
+                   in_stock=True, weight=1500, image="3.jpg")
+    db.close()
+
+    yield create_app({"TESTING": True, "DATABASE": path, "ORDER_BATCH_MAX_SIZE": 10})
+
+
+def post_batch(client, items):
+    return client.post("/orders/batch", json={"orders": items})
+
+
+def test_batch_creates_all_orders(app):
+    with app.test_client() as client:
+        response = post_batch(client, [
+            {"product": {"id": 1, "quantity": 2}},
+            {"product": {"id": 3, "quantity": 1}},
+        ])
+        assert response.status_code == 201
+        results = response.get_json()["orders"]
+
+        assert [result["status"] for result in results] == [201, 201]
+        first, second = (result["order"] for result in results)
+        assert first["product"] == {"id": 1, "quantity": 2}
+        assert first["total_price"] == 20.0
+        assert first["shipping_price"] == 10
+        assert second["product"] == {"id": 3, "quantity": 1}
+        assert second["id"] > first["id"]
+
+        # Chaque commande est lisible à l'URL retournée
+        order = client.get(results[1]["location"]).get_json()["order"]
+        assert order == second
+
+    with db.connection_context():
+        assert Order.select().count() == 2
+
+
+def test_batch_reports_errors_per_item(app):
+    with app.test_client() as client:
+        response = post_batch(client, [
+            {"product": {"id": 1, "quantity": 1}},
+            {"product": {"id": 2, "quantity": 1}},
+            {"product": {"id": 99, "quantity": 1}},
+            {"product": {"id": 1, "quantity": 0}},
+            "pas une commande",
+            {"product": {"id": 3, "quantity": 4}},
+        ])
+        assert response.status_code == 207
+        results = response.get_json()["orders"]
+
+    assert [result["status"] for result in results] == [201, 422, 422, 422, 422, 201]
+    assert results[1]["errors"]["product"]["code"] == "out-of-inventory"
+    assert results[2]["errors"]["product"]["code"] == "out-of-inventory"
+    assert results[3]["errors"]["product"]["code"] == "missing-fields"
+    assert results[4]["errors"]["product"]["code"] == "missing-fields"
+    with db.connection_context():
+        assert Order.select().count() == 2
+
+
+def test_batch_without_valid_item_creates_nothing(app):
+    with app.test_client() as client:
+        response = post_batch(client, [{"product": {"id": 2, "quantity": 1}}])
+        assert response.status_code == 422
+        assert response.get_json()["orders"][0]["errors"]["product"]["code"] == "out-of-inventory"
+
+    with db.connection_context():
+        assert Order.select().count() == 0
+
+
+@pytest.mark.parametrize("payload", [{}, {"orders": []}, {"orders": {"product": {}}},
+                                     {"orders": [{"product": {"id": 1, "quantity": 1}}] * 11}])
+def test_invalid_batch_is_rejected(app, payload):
+    with app.test_client() as client:
+        response = client.post("/orders/batch", json=payload)
+        assert response.status_code == 422
+        assert response.get_json()["errors"]["orders"]["code"] == "missing-fields"
+
+
+def test_batch_uses_one_product_query_and_one_transaction(app):
+    queries = []
+    original_execute_sql = db.obj.execute_sql
+
+    def execute_sql(sql, *args, **kwargs):
+        queries.append(sql)
+        return original_execute_sql(sql, *args, **kwargs)
+
+    db.obj.execute_sql = execute_sql
+    try:
+        with app.test_client() as client:
+            response = post_batch(client, [{"product": {"id": 1 + index % 2 * 2, "quantity": 1}}
+                                           for index in range(10)])
+            assert response.status_code == 201
+    finally:
+        del db.obj.execute_sql
+
+    assert sum(1 for sql in queries if 'FROM "product"' in sql) == 1
+    assert sum(1 for sql in queries if sql.startswith('INSERT INTO "order"')) == 1
+
+
+def test_batch_is_spread_across_shards(tmp_path):
+    path = str(tmp_path / "test_orders_batch_sharded.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    db.close()
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "ORDER_SHARDS": 2,
+        "ORDER_SHARD_DATABASE": str(tmp_path / "orders-{shard}.db"),
+    })
+    try:
+        with app.test_client() as client:
+            response = post_batch(client, [{"product": {"id": 1, "quantity": 1}}] * 4)
+            assert response.status_code == 201
+            for result in response.get_json()["orders"]:
+                assert client.get(result["location"]).status_code == 200
+
+        for model in order_shards.models:
+            with model._meta.database.connection_context():
+                assert model.select().count() == 2
+    finally:
+        order_shards.configure([])
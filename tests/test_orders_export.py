@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from inf349 import create_app, db, Order, Product
+from inf349.orders import EXPORT_CHUNK_ROWS, ORDER_EXPORT_COLUMNS
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_orders_export.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    Order.create(id=1, product_id=1, quantity=1, total_price=10.0, total_price_tax=11.5,
+                 shipping_price=5.0, email="a@example.com", shipping_country="Canada",
+                 shipping_address="1 rue A", shipping_postal_code="G7X 3Y7",
+                 shipping_city="Chicoutimi", shipping_province="QC", paid=True,
+                 credit_card_name="John Doe", credit_card_first_digits="4242",
+                 credit_card_last_digits="4242", credit_card_expiration_year=2030,
+                 credit_card_expiration_month=9, transaction_id="txn-1",
+                 transaction_success=True, transaction_amount_charged=1650,
+                 created_at=datetime(2026, 10, 16, 23, 30))
+    Order.create(id=2, product_id=1, quantity=2, total_price=20.0, total_price_tax=23.0,
+                 shipping_price=10.0, email="b@example.com", shipping_province="ON",
+                 created_at=datetime(2026, 10, 17, 8, 0))
+    Order.create(id=3, product_id=1, quantity=3, total_price=30.0, total_price_tax=30.0,
+                 shipping_price=10.0, created_at=datetime(2026, 10, 18, 12, 0))
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "ADMIN_TOKEN": "secret"})
+    with app.test_client() as test_client:
+        test_client.environ_base["HTTP_AUTHORIZATION"] = "Bearer secret"
+        yield test_client
+
+
+def export_ndjson(client, query=""):
+    response = client.get(f"/orders/export{query}")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_ndjson_export_reuses_order_layout(client):
+    orders = export_ndjson(client)
+
+    assert [order["id"] for order in orders] == [1, 2, 3]
+    expected = client.get("/order/1").get_json()["order"]
+    assert orders[0] == dict(expected, created_at="2026-10-16T23:30:00")
+
+
+def test_csv_export(client):
+    response = client.get("/orders/export?format=csv")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    assert "filename=orders.csv" in response.headers["Content-Disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert list(rows[0].keys()) == [name for name, _ in ORDER_EXPORT_COLUMNS]
+    assert rows[0]["shipping_province"] == "QC"
+    assert rows[0]["transaction_id"] == "txn-1"
+    assert rows[0]["paid"] == "True"
+    assert rows[2]["email"] == ""
+
+
+def test_csv_export_neutralises_formulas(client):
+    db.connect(reuse_if_open=True)
+    try:
+        Order.update(email="=HYPERLINK(\"http://evil.example\")", shipping_city="@SUM(A1:A2)",
+                     shipping_address="-1+2", credit_card_name="+33 1 23").where(Order.id == 2).execute()
+    finally:
+        db.close()
+
+    rows = list(csv.DictReader(io.StringIO(client.get("/orders/export?format=csv").get_data(as_text=True))))
+    assert rows[1]["email"] == "'=HYPERLINK(\"http://evil.example\")"
+    assert rows[1]["shipping_city"] == "'@SUM(A1:A2)"
+    assert rows[1]["shipping_address"] == "'-1+2"
+    assert rows[1]["credit_card_name"] == "'+33 1 23"
+    assert rows[1]["total_price"] == "20.0"
+    assert rows[0]["email"] == "a@example.com"
+
+
+@pytest.mark.parametrize("query, expected_ids", [
+    ("?paid=true", [1]),
+    ("?paid=false", [2, 3]),
+    ("?province=on", [2]),
+    ("?from=2026-10-17", [2, 3]),
+    ("?from=2026-10-17&to=2026-10-18", [2]),
+    ("?to=2026-10-17T00:31:00%2B01:00", [1]),
+    ("?paid=false&from=2026-10-18", [3]),
+])
+def test_export_filters(client, query, expected_ids):
+    assert [order["id"] for order in export_ndjson(client, query)] == expected_ids
+
+
+@pytest.mark.parametrize("query", ["?format=xml", "?paid=peut-être", "?from=hier"])
+def test_invalid_export_parameters(client, query):
+    response = client.get(f"/orders/export{query}")
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["export"]["code"] == "invalid-parameters"
+
+
+def test_export_is_streamed_in_chunks(client):
+    db.connect(reuse_if_open=True)
+    Order.insert_many([
+        {"product_id": 1, "quantity": 1, "total_price": 10.0} for _ in range(EXPORT_CHUNK_ROWS * 2)
+    ]).execute()
+    db.close()
+
+    response = client.get("/orders/export", buffered=False)
+    chunks = list(response.response)
+    response.close()
+
+    assert len(chunks) == 3
+    assert sum(chunk.count(b"\n") for chunk in chunks) == EXPORT_CHUNK_ROWS * 2 + 3
+
+
+@pytest.mark.parametrize("authorization", [None, "Bearer wrong", "secret"])
+def test_export_requires_the_admin_token(client, authorization):
+    client.environ_base.pop("HTTP_AUTHORIZATION")
+    headers = {"Authorization": authorization} if authorization else {}
+    response = client.get("/orders/export", headers=headers)
+
+    assert response.status_code == 403
+    assert response.get_json()["errors"]["authorization"]["code"] == "forbidden"
+
+
+def test_export_is_closed_without_configured_token(tmp_path):
+    app = create_app({"TESTING": True, "DATABASE": str(tmp_path / "test_orders_export_closed.db")})
+    with app.test_client() as test_client:
+        response = test_client.get("/orders/export", headers={"Authorization": "Bearer "})
+    assert response.status_code == 403
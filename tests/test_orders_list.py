@@ -0,0 +1,147 @@
+import pytest
+
+from inf349 import create_app, db, order_shards, Order, Product
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_orders_list.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    for order_id in range(1, 8):
+        Order.create(
+            id=order_id,
+            product_id=1 if order_id % 2 else 2,
+            quantity=order_id,
+            total_price=10.0 * order_id,
+            email="a@example.com" if order_id <= 3 else "b@example.com",
+            shipping_province="QC" if order_id % 3 else "ON",
+            paid=order_id in (2, 5),
+            transaction_id=f"txn-{order_id}" if order_id in (2, 5) else None,
+        )
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "ADMIN_TOKEN": "secret"})
+    with app.test_client() as test_client:
+        test_client.environ_base["HTTP_AUTHORIZATION"] = "Bearer secret"
+        yield test_client
+
+
+def list_ids(client, query=""):
+    response = client.get(f"/orders{query}")
+    assert response.status_code == 200
+    return [order["id"] for order in response.get_json()["orders"]]
+
+
+def test_list_orders_compact_representation(client):
+    response = client.get("/orders?limit=1")
+    body = response.get_json()
+
+    order = body["orders"][0]
+    assert order["id"] == 1
+    assert order["product"] == {"id": 1, "quantity": 1}
+    assert order["email"] == "a@example.com"
+    assert order["shipping_province"] == "QC"
+    assert order["paid"] is False
+    assert order["created_at"] is not None
+    assert "credit_card" not in order
+    assert body["next_cursor"]
+
+
+def test_keyset_pagination_visits_every_order_once(client):
+    seen = []
+    cursor = None
+    while True:
+        query = "?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(f"/orders{query}").get_json()
+        seen.extend(order["id"] for order in body["orders"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_descending_pagination(client):
+    body = client.get("/orders?sort=-id&limit=4").get_json()
+    assert [order["id"] for order in body["orders"]] == [7, 6, 5, 4]
+    assert list_ids(client, f"?sort=-id&limit=4&cursor={body['next_cursor']}") == [3, 2, 1]
+
+
+@pytest.mark.parametrize("query, expected_ids", [
+    ("?paid=true", [2, 5]),
+    ("?email=a@example.com", [1, 2, 3]),
+    ("?shipping_province=on", [3, 6]),
+    ("?product_id=2", [2, 4, 6]),
+    ("?paid=false&product_id=1&email=b@example.com", [7]),
+])
+def test_list_orders_filters(client, query, expected_ids):
+    assert list_ids(client, query) == expected_ids
+
+
+@pytest.mark.parametrize("query", [
+    "?limit=0", "?limit=101", "?sort=email", "?paid=oui", "?product_id=abc",
+    "?cursor=invalide", "?sort=-id&cursor=WyJpZCIsbnVsbCwzXQ",
+])
+def test_invalid_list_parameters(client, query):
+    response = client.get(f"/orders{query}")
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["orders"]["code"] == "invalid-parameters"
+
+
+def test_list_orders_requires_the_admin_token(client):
+    client.environ_base.pop("HTTP_AUTHORIZATION")
+    response = client.get("/orders", headers={"Authorization": "Bearer wrong"})
+
+    assert response.status_code == 403
+    assert response.get_json()["errors"]["authorization"]["code"] == "forbidden"
+    assert client.get("/orders").status_code == 403
+
+
+@pytest.mark.parametrize("column", ["paid", "email", "shipping_province", "product_id"])
+def test_filters_use_an_index(client, column):
+    query = Order.select(Order.id).where(getattr(Order, column) == 1).order_by(Order.id).limit(21)
+    sql, params = query.sql()
+    with db.connection_context():
+        plan = " ".join(row[-1] for row in db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+
+    assert f"INDEX order_{column} (" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_list_orders_merges_shards(tmp_path):
+    path = str(tmp_path / "test_orders_list_sharded.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Produit", description="desc", price=10.0,
+                   in_stock=True, weight=400, image="1.jpg")
+    Order.create(id=1, product_id=1, quantity=1, total_price=10.0)
+    db.close()
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "ORDER_SHARDS": 2,
+        "ORDER_SHARD_DATABASE": str(tmp_path / "orders-{shard}.db"),
+        "ADMIN_TOKEN": "secret",
+    })
+    try:
+        with app.test_client() as client:
+            client.environ_base["HTTP_AUTHORIZATION"] = "Bearer secret"
+            created = [
+                int(client.post("/order", json={"product": {"id": 1, "quantity": 1}})
+                    .headers["Location"].rsplit("/", 1)[-1])
+                for _ in range(4)
+            ]
+            first = client.get("/orders?limit=3").get_json()
+            second = client.get(f"/orders?limit=3&cursor={first['next_cursor']}").get_json()
+    finally:
+        order_shards.configure([])
+
+    ids = [order["id"] for order in first["orders"] + second["orders"]]
+    assert ids == [1] + sorted(created)
+    assert second["next_cursor"] is None
@@ -0,0 +1,189 @@
+"""
+Tests des nouvelles tentatives de paiement (attente aléatoire, budget global)
+"""
+import random
+
+import pytest
+
+import inf349
+from inf349 import create_app, db, payment_retry, Order, Product
+from inf349.http_client import ConnectError
+from inf349.resilience import RetryBudget, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+PAID_RESPONSE = FakeResponse(200, {
+    "credit_card": {"name": "John Doe", "first_digits": "4242", "last_digits": "4242",
+                    "expiration_year": 2027, "expiration_month": 9},
+    "transaction": {"id": "txn_1", "success": True, "amount_charged": 2500},
+})
+
+
+def connection_refused():
+    return ConnectError(ConnectionRefusedError(111, "Connection refused"))
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(payment_retry, "sleep", sleeps.append)
+
+    def make(**config):
+        app = create_app(dict({"TESTING": True, "DATABASE": str(tmp_path / "test.sqlite")}, **config))
+        with app.app_context():
+            db.connect(reuse_if_open=True)
+            db.create_tables([Product, Order, inf349.IdempotencyKey])
+            Product.create(id=1, name="Produit", description="desc", price=10.0, in_stock=True, weight=400, image="1.jpg")
+            for order_id in (1, 2):
+                Order.create(
+                    id=order_id, product_id=1, quantity=2, total_price=20.0, shipping_price=5.0, total_price_tax=23.0,
+                    email="john@example.com", shipping_country="Canada", shipping_address="1 rue du Test",
+                    shipping_postal_code="G7X 3Y7", shipping_city="Chicoutimi", shipping_province="QC",
+                )
+            db.close()
+        client = app.test_client()
+        client.sleeps = sleeps
+        return client
+
+    return make
+
+
+def fake_service(monkeypatch, outcomes):
+    """Remplace l'appel HTTP : chaque appel consomme outcomes (le dernier se répète)."""
+    calls = []
+
+    def fake_post(url, payload, timeout=10, extra_headers=None):
+        calls.append(dict(extra_headers or {}))
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(inf349, "http_post_json", fake_post)
+    return calls
+
+
+def credit_card_payload():
+    return {"credit_card": {
+        "name": "John Doe",
+        "number": "4242 4242 4242 4242",
+        "expiration_year": 2027,
+        "expiration_month": 9,
+        "cvv": "123",
+    }}
+
+
+def test_backoff_uses_decorrelated_jitter_within_bounds():
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0, rng=random.Random(0))
+    delays = policy.backoff()
+    samples = [next(delays) for _ in range(50)]
+
+    assert all(0.1 <= delay <= 1.0 for delay in samples)
+    assert len(set(samples)) > 1
+    assert max(samples) == 1.0
+
+
+def test_retry_budget_is_a_fraction_of_calls_within_the_window():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_retries=1, window=10, clock=clock)
+    for _ in range(4):
+        budget.record_call()
+
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+    assert budget.stats()["exhausted"] == 1
+
+    clock.now = 11
+    assert budget.try_spend()
+    assert budget.stats()["available"] == 0
+
+
+def test_connect_failure_is_retried(make_client, monkeypatch):
+    client = make_client()
+    calls = fake_service(monkeypatch, [connection_refused(), PAID_RESPONSE])
+
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert len(client.sleeps) == 1
+
+
+def test_attempts_are_capped(make_client, monkeypatch):
+    client = make_client(PAYMENT_RETRY_ATTEMPTS=3)
+    calls = fake_service(monkeypatch, [connection_refused()])
+
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 503
+    assert response.get_json()["errors"]["payment"]["code"] == "service-unavailable"
+    assert len(calls) == 3
+    assert len(client.sleeps) == 2
+
+
+def test_server_error_is_not_retried_without_idempotency_key(make_client, monkeypatch):
+    client = make_client()
+    calls = fake_service(monkeypatch, [FakeResponse(502, {}), PAID_RESPONSE])
+
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 503
+    assert len(calls) == 1
+    assert "Idempotency-Key" not in calls[0]
+
+
+def test_server_error_is_retried_with_idempotency_key(make_client, monkeypatch):
+    client = make_client()
+    calls = fake_service(monkeypatch, [FakeResponse(503, {}), PAID_RESPONSE])
+
+    response = client.put("/order/1", json=credit_card_payload(), headers={"Idempotency-Key": "key-1"})
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    # Même jeton pour les deux tentatives, propre à la commande
+    token = calls[0]["Idempotency-Key"]
+    assert calls[1]["Idempotency-Key"] == token
+    assert token != "key-1"
+
+    assert token == inf349.payment_idempotency_key(1, "key-1")
+    assert inf349.payment_idempotency_key(2, "key-1") != token
+
+
+def test_read_timeout_is_never_retried(make_client, monkeypatch):
+    client = make_client()
+    calls = fake_service(monkeypatch, [TimeoutError("timed out"), PAID_RESPONSE])
+
+    response = client.put("/order/1", json=credit_card_payload(), headers={"Idempotency-Key": "key-1"})
+
+    assert response.status_code == 503
+    assert len(calls) == 1
+    assert client.sleeps == []
+
+
+def test_exhausted_budget_stops_retries(make_client, monkeypatch):
+    client = make_client(PAYMENT_RETRY_BUDGET_RATIO=0, PAYMENT_RETRY_BUDGET_MIN=1)
+    calls = fake_service(monkeypatch, [connection_refused()])
+
+    client.put("/order/1", json=credit_card_payload())
+    assert len(calls) == 2
+    client.put("/order/1", json=credit_card_payload())
+    assert len(calls) == 3
+
+    budget = client.get("/api/metrics").get_json()["payment_service"]["retry_budget"]
+    assert budget == {"calls": 2, "retries": 1, "exhausted": 2, "available": 0}
@@ -11,7 +11,7 @@ def client(tmp_path):
     db.create_tables([Product, Order])
     db.close()
 
-    app = create_app({"TESTING": True})
+    app = create_app({"TESTING": True, "DATABASE": str(db_path)})
     with app.test_client() as test_client:
         yield test_client
 
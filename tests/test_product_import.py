@@ -0,0 +1,81 @@
+"""
+Tests unitaires pour l'import en continu des produits
+"""
+import io
+import json
+
+import pytest
+
+from inf349 import catalog_cache, db, import_products, Product, Order
+from inf349.importer import chunked, iter_json_array
+
+
+def make_product(product_id, **overrides):
+    product = {
+        "id": product_id,
+        "name": f"Produit {product_id}",
+        "description": "desc",
+        "price": 10.5 * product_id,
+        "in_stock": True,
+        "weight": 100 * product_id,
+        "image": f"{product_id}.jpg",
+    }
+    product.update(overrides)
+    return product
+
+
+@pytest.fixture
+def database(tmp_path):
+    db.init(str(tmp_path / "test_product_import.db"))
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    yield db
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 4096])
+def test_iter_json_array_streams_items_across_chunks(read_size):
+    products = [make_product(i, name=f"Café n°{i}") for i in range(1, 6)]
+    payload = {"meta": {"count": 5, "tags": ["a", "b"]}, "products": products, "total": 12345}
+    stream = io.BytesIO(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    assert list(iter_json_array(stream, "products", read_size=read_size)) == products
+
+
+def test_iter_json_array_handles_missing_or_empty_key():
+    assert list(iter_json_array(io.BytesIO(b'{"products": []}'), "products")) == []
+    assert list(iter_json_array(io.BytesIO(b'{"other": [1, 2]}'), "products")) == []
+    assert list(iter_json_array(io.BytesIO(b"{}"), "products")) == []
+
+
+def test_iter_json_array_rejects_truncated_stream():
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.BytesIO(b'{"products": [{"id": 1}, {"id"'), "products"))
+
+
+def test_chunked_splits_iterable():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_import_products_inserts_in_batches_and_reports_progress(database):
+    progress = []
+    count = import_products((make_product(i) for i in range(1, 11)), batch_size=4, progress=progress.append)
+
+    assert count == 10
+    assert progress == [4, 4, 2]
+    assert Product.select().count() == 10
+    assert Product.get_by_id(3).weight == 300
+
+
+def test_import_products_upserts_existing_rows_and_invalidates_catalog(database):
+    import_products([make_product(1), make_product(2)])
+    version = catalog_cache.version
+
+    import_products([make_product(2, price=1.0, in_stock=False), make_product(3)])
+
+    assert catalog_cache.version > version
+    assert Product.select().count() == 3
+    updated = Product.get_by_id(2)
+    assert updated.price == 1.0
+    assert updated.in_stock is False
@@ -0,0 +1,113 @@
+"""
+Tests d'API pour la pagination et les filtres de GET /api/products
+"""
+import pytest
+
+from inf349 import create_app, db, Product, Order
+from inf349.catalog import encode_cursor
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_products_pagination.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    for product_id in range(1, 11):
+        Product.create(
+            id=product_id,
+            name=f"Produit {product_id}",
+            description="desc",
+            price=float(product_id % 4),
+            in_stock=product_id % 2 == 0,
+            weight=100 * product_id,
+            image=f"{product_id}.jpg",
+        )
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path})
+    with app.test_client() as test_client:
+        yield test_client
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+def collect_pages(client, query):
+    ids = []
+    cursor = None
+    while True:
+        url = f"/api/products?{query}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(url)
+        assert response.status_code == 200
+        body = response.get_json()
+        ids.extend(product["id"] for product in body["products"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_first_page_is_limited_and_returns_cursor(client):
+    response = client.get("/api/products?limit=3")
+    body = response.get_json()
+    assert [product["id"] for product in body["products"]] == [1, 2, 3]
+    assert body["next_cursor"] is not None
+
+
+def test_pages_cover_catalog_without_duplicates(client):
+    assert collect_pages(client, "limit=3") == list(range(1, 11))
+
+
+def test_sort_by_price_uses_id_as_tie_breaker(client):
+    ids = collect_pages(client, "limit=2&sort=price")
+    assert ids == [4, 8, 1, 5, 9, 2, 6, 10, 3, 7]
+
+    ids = collect_pages(client, "limit=4&sort=-price")
+    assert ids == [7, 3, 10, 6, 2, 9, 5, 1, 8, 4]
+
+
+def test_filters_on_stock_price_and_weight(client):
+    ids = collect_pages(client, "limit=2&in_stock=true&min_price=1&max_weight=800")
+    assert ids == [2, 6]
+
+
+def test_invalid_parameters_return_422(client):
+    for query in ("limit=0", "limit=abc", "sort=name", "in_stock=maybe", "cursor=xyz"):
+        response = client.get(f"/api/products?{query}")
+        assert response.status_code == 422
+        assert response.get_json()["errors"]["products"]["code"] == "invalid-parameters"
+
+
+def test_cursor_from_another_sort_is_rejected(client):
+    cursor = client.get("/api/products?limit=2").get_json()["next_cursor"]
+    response = client.get(f"/api/products?limit=2&sort=price&cursor={cursor}")
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("price", [1, 2]),
+    ("price", {"a": 1}),
+    ("price", "10"),
+    ("price", True),
+    ("weight", 1.5),
+    ("id", "3"),
+    ("-price", float("inf")),
+])
+def test_crafted_cursor_value_is_rejected(client, sort, value):
+    cursor = encode_cursor(sort, value, 2)
+    response = client.get(f"/api/products?limit=2&sort={sort}&cursor={cursor}")
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["products"]["code"] == "invalid-parameters"
+
+
+def test_price_page_query_uses_index(client):
+    db.connect(reuse_if_open=True)
+    try:
+        plan = db.execute_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM product WHERE in_stock = 1 "
+            "AND (price, id) > (1.0, 2) ORDER BY price, id LIMIT 3"
+        ).fetchall()
+    finally:
+        db.close()
+    assert any("USING INDEX" in row[-1] for row in plan)
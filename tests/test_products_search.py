@@ -0,0 +1,91 @@
+"""
+Tests d'API pour la recherche plein texte (GET /api/products/search)
+"""
+import pytest
+
+from inf349 import create_app, create_search_index, db, Product, ProductIndex, Order
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_products_search.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    create_search_index()
+    Product.create(id=1, name="Chaise en bois", description="Chaise robuste pour la cuisine",
+                   price=40.0, in_stock=True, weight=3000, image="1.jpg")
+    Product.create(id=2, name="Table de cuisine", description="Table en chêne massif",
+                   price=200.0, in_stock=True, weight=20000, image="2.jpg")
+    Product.create(id=3, name="Lampe", description="Lampe de bureau à DEL",
+                   price=25.0, in_stock=False, weight=800, image="3.jpg")
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path})
+    with app.test_client() as test_client:
+        yield test_client
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.execute_sql("DROP TABLE IF EXISTS product_index")
+    db.close()
+
+
+def search_ids(client, query):
+    response = client.get(f"/api/products/search?{query}")
+    assert response.status_code == 200
+    return [product["id"] for product in response.get_json()["products"]]
+
+
+def test_search_ranks_name_matches_first(client):
+    assert search_ids(client, "q=cuisine") == [2, 1]
+
+
+def test_search_matches_prefixes_and_ignores_accents(client):
+    assert search_ids(client, "q=cha") == [1]
+    assert search_ids(client, "q=chene") == [2]
+
+
+def test_search_requires_every_word(client):
+    assert search_ids(client, "q=lampe bureau") == [3]
+    assert search_ids(client, "q=lampe cuisine") == []
+
+
+def test_search_index_follows_product_updates(client):
+    db.connect(reuse_if_open=True)
+    try:
+        product = Product.get_by_id(3)
+        product.name = "Lanterne"
+        product.save()
+        Product.get_by_id(1).delete_instance()
+    finally:
+        db.close()
+
+    assert search_ids(client, "q=lanterne") == [3]
+    assert search_ids(client, "q=chaise") == []
+
+
+def test_search_neutralizes_fts_syntax(client):
+    assert search_ids(client, 'q=" OR name:*') == []
+    assert search_ids(client, "q=table)") == [2]
+
+
+def test_search_without_words_returns_422(client):
+    for query in ("q=", "q=%21%21", "q=table&limit=0"):
+        response = client.get(f"/api/products/search?{query}")
+        assert response.status_code == 422
+        assert response.get_json()["errors"]["search"]["code"] == "invalid-parameters"
+
+
+def test_existing_index_is_not_rebuilt(client, monkeypatch):
+    rebuilds = []
+    monkeypatch.setattr(ProductIndex, "rebuild", classmethod(lambda cls: rebuilds.append(cls)))
+
+    db.connect(reuse_if_open=True)
+    try:
+        assert create_search_index() is False
+    finally:
+        db.close()
+
+    assert rebuilds == []
+    assert search_ids(client, "q=lampe") == [3]
@@ -0,0 +1,122 @@
+"""
+Tests de bout en bout contre les services distants simulés (inf349.remote_standin), en HTTP réel
+"""
+import random
+import time
+
+import pytest
+
+from inf349 import create_app, db, import_products_from_remote, http_client, Order, Product
+from inf349.remote_standin import RemoteStandIn, parse_latency
+
+
+@pytest.fixture
+def standin():
+    server = RemoteStandIn(products=20, seed=1).start()
+    yield server
+    server.stop()
+
+
+def make_client(tmp_path, standin, **config):
+    app = create_app(dict({
+        "TESTING": True,
+        "DATABASE": str(tmp_path / "test.sqlite"),
+        "PRODUCTS_URL": standin.products_url,
+        "PAYMENT_URL": standin.payment_url,
+    }, **config))
+    with app.app_context():
+        db.connect(reuse_if_open=True)
+        db.create_tables([Product, Order])
+        import_products_from_remote(standin.products_url)
+        product = Product.get_by_id(1)
+        Order.create(
+            id=1, product_id=1, quantity=2, total_price=product.price * 2, shipping_price=5.0,
+            total_price_tax=product.price * 2, email="john@example.com", shipping_country="Canada",
+            shipping_address="1 rue du Test", shipping_postal_code="G7X 3Y7", shipping_city="Chicoutimi",
+            shipping_province="QC",
+        )
+        db.close()
+    return app.test_client()
+
+
+def credit_card_payload(number="4242 4242 4242 4242"):
+    return {"credit_card": {
+        "name": "John Doe",
+        "number": number,
+        "expiration_year": 2099,
+        "expiration_month": 9,
+        "cvv": "123",
+    }}
+
+
+def test_latency_specs():
+    assert parse_latency("fixed:50")(None) == 0.05
+    sample = parse_latency("uniform:10:20")
+    rng = random.Random(0)
+    assert all(0.01 <= sample(rng) <= 0.02 for _ in range(100))
+    for spec in ("nope", "fixed", "uniform:1", "exponential:0"):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+def test_catalog_is_served_with_etag(tmp_path, standin):
+    client = make_client(tmp_path, standin)
+    products = client.get("/api/products?limit=100").get_json()["products"]
+
+    assert len(products) == 20
+    assert standin.counts["products"] == {200: 1}
+
+
+def test_payment_is_charged_over_http(tmp_path, standin):
+    client = make_client(tmp_path, standin)
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 200
+    order = response.get_json()["order"]
+    assert order["paid"] is True
+    assert order["transaction"]["id"].startswith("STANDIN")
+    assert order["credit_card"]["last_digits"] == "4242"
+    assert standin.counts["pay"] == {200: 1}
+
+
+def test_declined_card(tmp_path, standin):
+    client = make_client(tmp_path, standin)
+    response = client.put("/order/1", json=credit_card_payload("4000 0000 0000 0002"))
+
+    assert response.status_code == 422
+    assert response.get_json()["errors"]["credit_card"]["code"] == "card-declined"
+
+
+def test_injected_server_errors(tmp_path, standin):
+    client = make_client(tmp_path, standin)
+    standin.error_rate = 1.0
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 503
+    assert response.get_json()["errors"]["payment"]["code"] == "service-error"
+    assert sum(standin.counts["pay"].values()) == 1
+
+
+def test_injected_timeouts_use_the_payment_timeout(tmp_path, standin):
+    client = make_client(tmp_path, standin, PAYMENT_TIMEOUT=0.3)
+    standin.timeout_rate = 1.0
+    standin.hang_seconds = 2
+
+    started_at = time.perf_counter()
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 503
+    assert response.get_json()["errors"]["payment"]["code"] == "service-unavailable"
+    assert time.perf_counter() - started_at < 1.5
+    http_client.close()
+
+
+def test_latency_is_applied(tmp_path):
+    standin = RemoteStandIn(products=1, payment_latency="fixed:100").start()
+    try:
+        client = make_client(tmp_path, standin)
+        started_at = time.perf_counter()
+        client.put("/order/1", json=credit_card_payload())
+        assert time.perf_counter() - started_at >= 0.1
+    finally:
+        standin.stop()
@@ -0,0 +1,182 @@
+"""
+Tests du cache LRU et du cache de rendu des templates UI
+"""
+import pytest
+from jinja2 import DictLoader, Environment
+
+import inf349
+
+from inf349 import create_app, db, Product, Order
+from inf349.cache import LRUCache
+from inf349.rendering import FragmentCacheExtension, RenderCache
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "test_render_cache.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    Product.create(id=1, name="Zèbre en peluche", description="desc", price=15.0,
+                   in_stock=True, weight=300, image="1.jpg")
+    Product.create(id=2, name="Ananas", description="desc", price=3.0,
+                   in_stock=True, weight=900, image="2.jpg")
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path})
+    with app.test_client() as test_client:
+        yield test_client
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries_after_ttl():
+    now = [100.0]
+    cache = LRUCache(maxsize=2, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_fragment_cache_tag_renders_without_cache():
+    env = Environment(extensions=[FragmentCacheExtension])
+    template = env.from_string("{% cache 'x', n %}[{{ n }}]{% endcache %}")
+    assert template.render(n=1) == "[1]"
+
+
+def test_fragment_cache_tag_reuses_cached_fragment():
+    env = Environment(extensions=[FragmentCacheExtension])
+    env.fragment_cache = LRUCache(8)
+    version = [1]
+    env.fragment_cache_version = lambda: version[0]
+    template = env.from_string("{% cache 'x', key %}{{ value }}{% endcache %}")
+
+    assert template.render(key=1, value="a") == "a"
+    assert template.render(key=1, value="b") == "a"
+    assert template.render(key=2, value="b") == "b"
+    version[0] = 2
+    assert template.render(key=1, value="c") == "c"
+
+
+def test_fragments_use_the_version_read_before_loading_the_page():
+    env = Environment(loader=DictLoader({"page": "{% cache 'x' %}{{ label }}{% endcache %}"}),
+                      extensions=[FragmentCacheExtension])
+    env.fragment_cache = LRUCache(8)
+    version = [1]
+    env.fragment_cache_version = lambda: version[0]
+    pages = RenderCache(LRUCache(8), lambda: version[0], lambda template, **context: env.get_template(template).render(**context))
+    names = ["ancien"]
+
+    def load_with_concurrent_write():
+        context = {"label": names[0]}
+        # Écriture dans le catalogue entre le chargement et le rendu
+        names[0] = "nouveau"
+        version[0] += 1
+        return context
+
+    assert pages.render_template("page", load_with_concurrent_write) == "ancien"
+    assert pages.render_template("page", lambda: {"label": names[0]}) == "nouveau"
+
+
+def test_ui_pages_are_rendered_once_per_catalog_version(client):
+    first = client.get("/ui/products").get_data(as_text=True)
+    second = client.get("/ui/products").get_data(as_text=True)
+    client.get("/ui/order")
+    client.get("/ui/order")
+
+    assert first == second
+    stats = client.get("/api/metrics").get_json()["render_cache"]
+    assert stats["misses"] == 2
+    assert stats["hits"] == 2
+
+
+def test_order_form_lists_products_by_name(client):
+    html = client.get("/ui/order").get_data(as_text=True)
+    assert html.index("Ananas") < html.index("Zèbre en peluche")
+
+
+def test_product_write_refreshes_cached_pages(client):
+    assert "Zèbre en peluche" in client.get("/ui/products").get_data(as_text=True)
+
+    db.connect(reuse_if_open=True)
+    try:
+        product = Product.get_by_id(1)
+        product.name = "Girafe en peluche"
+        product.save()
+    finally:
+        db.close()
+
+    html = client.get("/ui/products").get_data(as_text=True)
+    assert "Girafe en peluche" in html
+    assert "Zèbre en peluche" not in html
+    assert "Girafe en peluche" in client.get("/ui/order").get_data(as_text=True)
+
+
+def test_order_form_errors_cache_fragments_under_the_version_read_first(client, monkeypatch):
+    load_products = inf349.get_catalog_products_by_name
+
+    def load_then_rename():
+        # Écriture dans Product pendant le chargement du formulaire
+        products = load_products()
+        product = Product.get_by_id(1)
+        product.name = "Girafe en peluche"
+        product.save()
+        return products
+
+    monkeypatch.setattr(inf349, "get_catalog_products_by_name", load_then_rename)
+    response = client.post("/ui/order", data={"product_id": "1"})
+    assert response.status_code == 422
+    assert "Zèbre en peluche" in response.get_data(as_text=True)
+    monkeypatch.undo()
+
+    for response in (client.post("/ui/order", data={"product_id": "1"}), client.get("/ui/order")):
+        html = response.get_data(as_text=True)
+        assert "Girafe en peluche" in html
+        assert "Zèbre en peluche" not in html
+
+
+def test_render_cache_can_be_disabled(tmp_path):
+    path = str(tmp_path / "test_render_cache_disabled.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    db.close()
+
+    app = create_app({"TESTING": True, "DATABASE": path, "RENDER_CACHE": False})
+    with app.test_client() as test_client:
+        assert test_client.get("/ui/products").status_code == 200
+        assert test_client.get("/api/metrics").get_json()["render_cache"] is None
+
+
+def test_templates_are_precompiled_into_bytecode_cache(tmp_path):
+    path = str(tmp_path / "test_render_cache_bytecode.db")
+    db.init(path)
+    cache_dir = tmp_path / "jinja-cache"
+
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": path,
+        "TEMPLATE_BYTECODE_CACHE_DIR": str(cache_dir),
+        "PRECOMPILE_TEMPLATES": True,
+    })
+
+    assert len(list(cache_dir.iterdir())) == 4
+    assert app.jinja_env.cache is not None and len(app.jinja_env.cache) == 4
@@ -0,0 +1,215 @@
+"""
+Tests du disjoncteur et du délai adaptatif autour du service de paiement
+"""
+from urllib import error as urllib_error
+
+import pytest
+
+import inf349
+from inf349 import create_app, db, payment_breaker, payment_timeout, Order, Product
+from inf349.resilience import CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+PAID_RESPONSE = FakeResponse(200, {
+    "credit_card": {"name": "John Doe", "first_digits": "4242", "last_digits": "4242",
+                    "expiration_year": 2027, "expiration_month": 9},
+    "transaction": {"id": "txn_1", "success": True, "amount_charged": 2500},
+})
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.consecutive_failures == 0
+
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["times_opened"] == 1
+
+
+def test_breaker_half_open_trial_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.retry_after() == 10
+
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Un seul appel d'essai à la fois
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+    clock.now = 15
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_adaptive_timeout_follows_p99_within_bounds():
+    timeout = AdaptiveTimeout(initial=10, minimum=0.5, maximum=10, factor=3, min_samples=5)
+    for _ in range(4):
+        timeout.observe(0.1)
+    assert timeout.current() == 10
+
+    timeout.observe(0.1)
+    assert timeout.current() == 0.5
+
+    for _ in range(5):
+        timeout.observe(1.0)
+    assert timeout.current() == pytest.approx(3.0)
+
+    for _ in range(5):
+        timeout.observe(8.0)
+    assert timeout.current() == 10
+    assert timeout.stats()["samples"] == 15
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "DATABASE": str(tmp_path / "test.sqlite"),
+        "PAYMENT_BREAKER_FAILURES": 3,
+        "PAYMENT_TIMEOUT_MIN": 0.5,
+    })
+    with app.app_context():
+        db.connect(reuse_if_open=True)
+        db.create_tables([Product, Order])
+        Product.create(id=1, name="Produit", description="desc", price=10.0, in_stock=True, weight=400, image="1.jpg")
+        Order.create(
+            id=1, product_id=1, quantity=2, total_price=20.0, shipping_price=5.0, total_price_tax=23.0,
+            email="john@example.com", shipping_country="Canada", shipping_address="1 rue du Test",
+            shipping_postal_code="G7X 3Y7", shipping_city="Chicoutimi", shipping_province="QC",
+        )
+        db.close()
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def credit_card_payload():
+    return {"credit_card": {
+        "name": "John Doe",
+        "number": "4242 4242 4242 4242",
+        "expiration_year": 2027,
+        "expiration_month": 9,
+        "cvv": "123",
+    }}
+
+
+def test_open_breaker_fails_fast_without_calling_the_service(client, monkeypatch):
+    calls = []
+
+    def unavailable(url, payload, timeout=10, extra_headers=None):
+        calls.append(timeout)
+        raise urllib_error.URLError("connection refused")
+
+    monkeypatch.setattr(inf349, "http_post_json", unavailable)
+
+    for _ in range(3):
+        assert client.put("/order/1", json=credit_card_payload()).status_code == 503
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 503
+    assert response.get_json()["errors"]["payment"]["code"] == "service-unavailable"
+    assert len(calls) == 3
+    breaker = client.get("/api/metrics").get_json()["payment_service"]["breaker"]
+    assert breaker["state"] == "open"
+    assert breaker["rejected"] == 1
+
+
+def test_server_errors_count_as_failures_but_declines_do_not(client, monkeypatch):
+    responses = [FakeResponse(500, {}), FakeResponse(502, {}), FakeResponse(422, {
+        "errors": {"credit_card": {"code": "card-declined", "name": "refusée"}}
+    }), FakeResponse(500, {})]
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: responses.pop(0))
+
+    statuses = [client.put("/order/1", json=credit_card_payload()).status_code for _ in range(4)]
+
+    assert statuses == [503, 503, 422, 503]
+    assert payment_breaker.state == CLOSED
+    assert payment_breaker.consecutive_failures == 1
+
+
+def test_half_open_trial_success_closes_the_breaker(client, monkeypatch):
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: FakeResponse(503, {}))
+    for _ in range(3):
+        client.put("/order/1", json=credit_card_payload())
+    assert payment_breaker.state == OPEN
+
+    payment_breaker.opened_at -= payment_breaker.reset_timeout
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: PAID_RESPONSE)
+    response = client.put("/order/1", json=credit_card_payload())
+
+    assert response.status_code == 200
+    assert response.get_json()["order"]["paid"] is True
+    assert payment_breaker.state == CLOSED
+
+
+def test_half_open_trial_raising_an_unexpected_error_reopens_the_breaker(client, monkeypatch):
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: FakeResponse(503, {}))
+    for _ in range(3):
+        client.put("/order/1", json=credit_card_payload())
+    assert payment_breaker.state == OPEN
+
+    def undecodable(*args, **kwargs):
+        # Page d'erreur qui n'est pas en UTF-8
+        raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+    payment_breaker.opened_at -= payment_breaker.reset_timeout
+    monkeypatch.setattr(inf349, "http_post_json", undecodable)
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 503
+    assert payment_breaker.state == OPEN
+
+    payment_breaker.opened_at -= payment_breaker.reset_timeout
+    monkeypatch.setattr(inf349, "http_post_json", lambda *args, **kwargs: PAID_RESPONSE)
+    assert client.put("/order/1", json=credit_card_payload()).status_code == 200
+    assert payment_breaker.state == CLOSED
+
+
+def test_payment_timeout_adapts_to_observed_latency(client, monkeypatch):
+    timeouts = []
+
+    def fast_declined(url, payload, timeout=10, extra_headers=None):
+        timeouts.append(timeout)
+        return FakeResponse(422, {"errors": {"credit_card": {"code": "card-declined", "name": "refusée"}}})
+
+    monkeypatch.setattr(inf349, "http_post_json", fast_declined)
+    for _ in range(payment_timeout.min_samples + 1):
+        client.put("/order/1", json=credit_card_payload())
+
+    assert timeouts[0] == 10
+    assert timeouts[-1] == 0.5
+    assert client.get("/api/metrics").get_json()["payment_service"]["timeout"]["timeout"] == 0.5
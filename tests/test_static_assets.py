@@ -0,0 +1,88 @@
+"""
+Tests des empreintes de contenu des fichiers statiques
+"""
+import os
+import re
+
+import pytest
+from flask import url_for
+
+from inf349 import create_app, db, Product, Order
+from inf349.assets import AssetManifest
+
+
+@pytest.fixture
+def app(tmp_path):
+    path = str(tmp_path / "test_static_assets.db")
+    db.init(path)
+    db.connect(reuse_if_open=True)
+    db.create_tables([Product, Order])
+    db.close()
+
+    yield create_app({"TESTING": True, "DATABASE": path})
+
+    db.connect(reuse_if_open=True)
+    db.drop_tables([Order, Product], safe=True)
+    db.close()
+
+
+def test_templates_link_fingerprinted_stylesheet(app):
+    with app.test_client() as client:
+        html = client.get("/ui/order").get_data(as_text=True)
+    assert re.search(r'href="/static/styles\.[0-9a-f]{12}\.css"', html)
+    assert "v=" not in html
+
+
+def test_fingerprinted_asset_is_served_with_immutable_cache(app):
+    with app.test_request_context():
+        url = url_for("static", filename="styles.css")
+
+    with app.test_client() as client:
+        response = client.get(url)
+        plain = client.get("/static/styles.css")
+
+    assert response.status_code == 200
+    assert response.get_data() == plain.get_data()
+    assert response.cache_control.immutable is True
+    assert response.cache_control.max_age == 31536000
+    assert plain.cache_control.immutable is not True
+    response.close()
+    plain.close()
+
+
+def test_stale_fingerprint_serves_current_file_without_long_cache(app):
+    with app.test_client() as client:
+        response = client.get("/static/styles.000000000000.css")
+    assert response.status_code == 200
+    assert response.cache_control.immutable is not True
+    response.close()
+
+
+def test_manifest_fingerprints_and_resolves_files(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { color: red; }")
+    (tmp_path / "photo-160w.abcdefabcdef.jpg").write_bytes(b"jpg")
+    manifest = AssetManifest(str(tmp_path), auto_reload=True)
+
+    name = manifest.fingerprint("css/site.css")
+    assert re.fullmatch(r"css/site\.[0-9a-f]{12}\.css", name)
+    assert manifest.resolve(name) == ("css/site.css", True)
+
+    # Fichier déjà nommé d'après son contenu : inchangé et immutable
+    assert manifest.fingerprint("photo-160w.abcdefabcdef.jpg") == "photo-160w.abcdefabcdef.jpg"
+    assert manifest.resolve("photo-160w.abcdefabcdef.jpg") == ("photo-160w.abcdefabcdef.jpg", True)
+
+    (tmp_path / "css" / "site.css").write_text("body { color: blue; }")
+    os.utime(tmp_path / "css" / "site.css", (1, 1))
+    assert manifest.fingerprint("css/site.css") != name
+
+    assert manifest.fingerprint("missing.css") == "missing.css"
+    assert manifest.resolve("../secret.css") == ("../secret.css", False)
+
+
+def test_build_writes_manifest_used_by_new_instances(tmp_path):
+    (tmp_path / "app.js").write_text("console.log(1);")
+    built = AssetManifest(str(tmp_path)).build()
+
+    assert (tmp_path / "assets-manifest.json").exists()
+    assert AssetManifest(str(tmp_path)).fingerprint("app.js") == built["app.js"]